@@ -4,11 +4,95 @@ from pathlib import Path
 
 class Settings(BaseSettings):
     database_url: str = "sqlite:///./neurovault.db"
+    # Driver URL for the API's async sessions; derived from database_url when empty
+    async_database_url: str = ""
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout_s: float = 30.0
+    # Route request-path writes through one writer thread (see db_writer;
+    # ingestion jobs commit on their own sessions)
+    db_single_writer: bool = True
+
+    # Search-time score updates are buffered and flushed in bulk UPDATEs
+    score_flush_interval_ms: int = 500
+    score_flush_max_pending: int = 1000
+
+    # Search result cache (entries per process; 0 disables). Every committed
+    # change to a user's documents or chunks, ORM flushes and bulk UPDATEs
+    # alike, invalidates the user's entries
+    search_cache_size: int = 1024
+    search_cache_ttl_s: float = 30.0
+
+    # Semantic query cache: queries per user (0 disables), cosine distance
+    # for reusing a cached query's candidates, share of hits checked
+    query_cache_size: int = 256
+    query_cache_max_distance: float = 0.08
+    query_cache_verify_rate: float = 0.05
+
+    # Access events are buffered and written in batches; raw rows older than
+    # the retention are dropped (already folded into the rollups).
+    # 0 days = keep forever; daily rollups are always kept.
+    access_log_flush_interval_ms: int = 1000
+    access_log_flush_max_pending: int = 1000
+    access_log_retention_days: int = 30
+    access_rollup_hourly_retention_days: int = 90
+    access_log_compact_interval_min: int = 60
+
+    # Lifecycle state is recomputed once at startup (picks up changed weights
+    # or thresholds); a positive interval also repeats the pass periodically
+    reclassify_interval_min: int = 0
+    reclassify_batch_size: int = 5000
+
+    # SQLite connection profile (ignored for other databases)
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_mmap_mb: int = 256
+    sqlite_cache_mb: int = 64
     embedding_model: str = "all-MiniLM-L6-v2"
+    embedding_batch_size: int = 64
     faiss_index_path: str = "./faiss_indexes"
     faiss_nlist: int = 100
     faiss_nprobe: int = 10
 
+    # Uploads are streamed to disk in fixed-size blocks
+    upload_path: str = "./uploads"
+    upload_chunk_bytes: int = 1024 * 1024
+
+    # Background ingestion workers
+    ingest_workers: int = 2
+
+    # Bulk ingestion
+    bulk_parse_workers: int = 4
+    bulk_embedding_batch_size: int = 256
+    bulk_max_files: int = 10000
+    # Archives whose members would expand past this are rejected (zip bombs)
+    bulk_max_expanded_mb: int = 2048
+
+    # Directory sync: server directories POST /api/documents/sync may read
+    # (comma-separated; subdirectories included). Empty disables the endpoint
+    sync_roots: str = ""
+    sync_hash_workers: int = 8
+    sync_batch_size: int = 200
+
+    # Duplicate detection at ingest (cosine similarity for linking a chunk)
+    dedup_enabled: bool = True
+    dedup_similarity_threshold: float = 0.97
+
+    # PDF parsing (0 workers = one per CPU core)
+    pdf_parse_workers: int = 0
+    pdf_pages_per_task: int = 8
+    pdf_parallel_min_pages: int = 16
+
+    # Extracted-text cache keyed by file SHA-256 (0 MB disables it)
+    extraction_cache_path: str = "./extraction_cache"
+    extraction_cache_max_mb: int = 512
+
+    # OCR (0 workers = half the CPU cores)
+    ocr_workers: int = 0
+    ocr_max_dimension: int = 3000
+    ocr_page_timeout_s: float = 60.0
+
     # Cognitive score weights
     cognitive_weight_semantic: float = 0.6
     cognitive_weight_recency: float = 0.2
@@ -21,6 +105,9 @@ class Settings(BaseSettings):
     tier_active_threshold: float = 0.75
     tier_contextual_threshold: float = 0.50
     tier_archived_threshold: float = 0.25
+    # Scores this far below a threshold still count as reaching it, so a new,
+    # never accessed document (storage score exactly 0.5) starts Contextual
+    tier_threshold_tolerance: float = 0.001
 
     # CORS
     cors_origins: str = "http://localhost:5173,http://localhost:3000"
@@ -32,9 +119,34 @@ class Settings(BaseSettings):
     def cors_origins_list(self) -> list[str]:
         return [o.strip() for o in self.cors_origins.split(",")]
 
+    @property
+    def sync_root_dirs(self) -> list[Path]:
+        return [Path(r.strip()).expanduser().resolve() for r in self.sync_roots.split(",") if r.strip()]
+
+    @property
+    def is_sqlite(self) -> bool:
+        return self.database_url.startswith("sqlite")
+
+    @property
+    def async_db_url(self) -> str:
+        if self.async_database_url:
+            return self.async_database_url
+        for sync, aio in (("sqlite://", "sqlite+aiosqlite://"), ("postgresql://", "postgresql+asyncpg://")):
+            if self.database_url.startswith(sync):
+                return aio + self.database_url[len(sync):]
+        return self.database_url
+
     @property
     def faiss_index_dir(self) -> Path:
         return Path(self.faiss_index_path)
 
+    @property
+    def upload_dir(self) -> Path:
+        return Path(self.upload_path)
+
+    @property
+    def extraction_cache_dir(self) -> Path:
+        return Path(self.extraction_cache_path)
+
 
 settings = Settings()
@@ -1,20 +1,106 @@
-from sqlalchemy import create_engine
+import json
+import logging
+
+from sqlalchemy import Engine, Float, create_engine, event, inspect, text
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.sql.functions import FunctionElement
 from app.config import settings
 
+logger = logging.getLogger(__name__)
+
+
+def _pool_args(url: str) -> dict:
+    if ":memory:" in url:
+        return {}
+    args = {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout_s,
+    }
+    if url.startswith("sqlite+aiosqlite"):
+        # aiosqlite defaults to NullPool, which rejects the sizing arguments
+        args["poolclass"] = AsyncAdaptedQueuePool
+    return args
+
+
+def configure_sqlite(engine: Engine) -> Engine:
+    """
+    Apply the SQLite production profile to every new connection: WAL so
+    readers never wait for the writer, synchronous=NORMAL (durable across
+    application crashes, fsync only at checkpoints), memory-mapped reads,
+    a larger page cache and a busy timeout instead of immediate lock errors.
+    """
+    pragmas = [
+        f"PRAGMA journal_mode={settings.sqlite_journal_mode}",
+        f"PRAGMA synchronous={settings.sqlite_synchronous}",
+        f"PRAGMA busy_timeout={settings.sqlite_busy_timeout_ms}",
+        f"PRAGMA mmap_size={settings.sqlite_mmap_mb * 1024 * 1024}",
+        f"PRAGMA cache_size={-settings.sqlite_cache_mb * 1024}",
+        "PRAGMA temp_store=MEMORY",
+    ]
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_conn, _record):
+        cursor = dbapi_conn.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+    return engine
+
+
+# Synchronous engine: ingestion jobs, sync CLI and startup migrations
 engine = create_engine(
     settings.database_url,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.database_url else {},
+    connect_args={"check_same_thread": False} if settings.is_sqlite else {},
     echo=False,
+    **_pool_args(settings.database_url),
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine: API request handlers
+async_engine = create_async_engine(
+    settings.async_db_url, echo=False, **_pool_args(settings.async_db_url)
+)
+
+if settings.is_sqlite:
+    configure_sqlite(engine)
+    configure_sqlite(async_engine.sync_engine)
+
+# Objects stay usable after commit; async sessions cannot lazy-load expired attributes
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 
 class Base(DeclarativeBase):
     pass
 
 
+class epoch_seconds(FunctionElement):
+    """
+    A naive-UTC DateTime column as float seconds since the Unix epoch,
+    computed by the database so vectorized code can load it without
+    building datetime objects. NULL stays NULL.
+    """
+
+    type = Float()
+    inherit_cache = True
+
+
+@compiles(epoch_seconds, "sqlite")
+def _epoch_seconds_sqlite(element, compiler, **kw):
+    # Julian day 2440587.5 is 1970-01-01 00:00 UTC
+    return f"((julianday({compiler.process(element.clauses, **kw)}) - 2440587.5) * 86400.0)"
+
+
+@compiles(epoch_seconds)
+def _epoch_seconds_default(element, compiler, **kw):
+    return f"CAST(EXTRACT(EPOCH FROM {compiler.process(element.clauses, **kw)}) AS DOUBLE PRECISION)"
+
+
 def get_db():
     db = SessionLocal()
     try:
@@ -23,6 +109,158 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 def init_db():
-    from app.models import document, access_log  # noqa: F401
+    from app.models import (  # noqa: F401
+        document, access_log, access_rollup, ingest_job, sync_manifest, chunk,
+        document_content,
+    )
     Base.metadata.create_all(bind=engine)
+    _migrate_dedup_columns()
+    _migrate_faiss_ids()
+    _migrate_content_text()
+    _migrate_lifecycle()
+
+
+def _migrate_dedup_columns():
+    """
+    Add the duplicate-detection columns (content_hash, duplicate_of) and
+    their indexes to documents tables created before they existed.
+    """
+    from app.models.document import Document
+
+    table = Document.__table__
+    columns = {c["name"] for c in inspect(engine).get_columns("documents")}
+    missing = [name for name in ("content_hash", "duplicate_of") if name not in columns]
+    if not missing:
+        return
+    with engine.begin() as conn:
+        for name in missing:
+            kind = table.c[name].type.compile(dialect=engine.dialect)
+            conn.execute(text(f"ALTER TABLE documents ADD COLUMN {name} {kind}"))
+    for index in table.indexes:
+        if {c.name for c in index.columns} & set(missing):
+            index.create(bind=engine, checkfirst=True)
+    logger.info(f"Added {', '.join(missing)} to documents")
+
+
+def _migrate_faiss_ids():
+    """
+    Move chunk references of documents indexed before the chunks table
+    existed (documents.faiss_ids / chunk_hashes JSON) into chunk rows.
+    The first document holding a vector owns it; later ones link to it.
+    """
+    columns = {c["name"] for c in inspect(engine).get_columns("documents")}
+    if "faiss_ids" not in columns:
+        return
+    # Only databases written by the dedup-aware version have chunk_hashes
+    hashes_column = "chunk_hashes" if "chunk_hashes" in columns else "NULL"
+    with engine.begin() as conn:
+        legacy = conn.execute(text(
+            f"SELECT id, user_id, faiss_ids, {hashes_column} FROM documents "
+            "WHERE faiss_ids IS NOT NULL AND faiss_ids != '[]' "
+            "AND id NOT IN (SELECT DISTINCT doc_id FROM chunks) ORDER BY created_at"
+        )).all()
+        if not legacy:
+            return
+        owned: set[tuple[str, int]] = set()
+        rows = []
+        for doc_id, user_id, faiss_ids, chunk_hashes in legacy:
+            hashes = json.loads(chunk_hashes or "[]")
+            for ordinal, fid in enumerate(json.loads(faiss_ids)):
+                rows.append({
+                    "doc_id": doc_id,
+                    "user_id": user_id,
+                    "ordinal": ordinal,
+                    "faiss_id": fid,
+                    "text_hash": hashes[ordinal] if ordinal < len(hashes) else "",
+                    "linked": (user_id, fid) in owned,
+                })
+                owned.add((user_id, fid))
+        conn.execute(text(
+            "INSERT INTO chunks (doc_id, user_id, ordinal, faiss_id, text_hash, linked) "
+            "VALUES (:doc_id, :user_id, :ordinal, :faiss_id, :text_hash, :linked)"
+        ), rows)
+
+
+def _migrate_content_text():
+    """
+    Move text stored inline in documents.content_text (before the
+    document_content table existed) into compressed frames, then clear it.
+    """
+    from app.services.content_store import iter_frames
+
+    columns = {c["name"] for c in inspect(engine).get_columns("documents")}
+    if "content_text" not in columns:
+        return
+    with engine.begin() as conn:
+        if "content_length" not in columns:
+            conn.execute(text("ALTER TABLE documents ADD COLUMN content_length INTEGER"))
+        legacy = conn.execute(text(
+            "SELECT id FROM documents WHERE content_text IS NOT NULL"
+        )).scalars().all()
+        moved = 0
+        for doc_id in legacy:  # one document's text in memory at a time
+            content = conn.execute(
+                text("SELECT content_text FROM documents WHERE id = :id"), {"id": doc_id}
+            ).scalar_one()
+            conn.execute(text("DELETE FROM document_content WHERE doc_id = :id"), {"id": doc_id})
+            frames = [{"id": doc_id, "n": n, "data": data} for n, data in enumerate(iter_frames(content))]
+            if frames:
+                conn.execute(text(
+                    "INSERT INTO document_content (doc_id, frame, data) VALUES (:id, :n, :data)"
+                ), frames)
+            conn.execute(text(
+                "UPDATE documents SET content_text = NULL, content_length = :len WHERE id = :id"
+            ), {"id": doc_id, "len": len(content)})
+            moved += 1
+    if moved:
+        logger.info(f"Moved the text of {moved} documents into document_content")
+
+
+def _migrate_lifecycle():
+    """
+    Add the decay-invariant lifecycle columns to documents tables created
+    before they existed, and fill them for documents that lack them.
+    """
+    import numpy as np
+    from sqlalchemy import bindparam, select, update
+    from app.models.document import Document
+    from app.services.cognition import UNTIL_COLUMNS, cognition_engine, lifecycle_values
+
+    table = Document.__table__
+    columns = {c["name"] for c in inspect(engine).get_columns("documents")}
+    with engine.begin() as conn:
+        for name in ("activation", *UNTIL_COLUMNS):
+            if name not in columns:
+                kind = table.c[name].type.compile(dialect=engine.dialect)
+                conn.execute(text(f"ALTER TABLE documents ADD COLUMN {name} {kind}"))
+    for index in table.indexes:
+        index.create(bind=engine, checkfirst=True)
+
+    with engine.begin() as conn:
+        rows = conn.execute(
+            select(table.c.id, epoch_seconds(table.c.last_accessed), table.c.access_count)
+            .where(table.c.activation.is_(None))
+        ).all()
+        if not rows:
+            return
+        ids, last, counts = zip(*rows)
+        values = lifecycle_values(cognition_engine.lifecycle_batch(
+            np.array(last, dtype=np.float64),
+            np.array([c or 0 for c in counts], dtype=np.float64),
+        ))
+        conn.execute(
+            update(table)
+            .where(table.c.id == bindparam("doc_id"))
+            .values({name: bindparam(f"new_{name}") for name in values}),
+            [
+                {"doc_id": doc_id, **{f"new_{name}": values[name][i] for name in values}}
+                for i, doc_id in enumerate(ids)
+            ],
+        )
+    logger.info(f"Computed lifecycle state for {len(ids)} documents")
@@ -4,10 +4,19 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.config import settings
-from app.database import init_db
+from app.database import init_db, async_engine
 from app.services.embedding_service import embedding_service
 from app.services.faiss_service import faiss_service
-from app.routers import documents, search, analytics
+from app.services.storage_service import storage_service
+from app.services.parser_service import parser_service
+from app.services.ocr_service import ocr_service
+from app.services.extraction_cache import extraction_cache
+from app.services.job_queue import job_queue
+from app.services.db_writer import db_writer
+from app.services.score_buffer import score_buffer
+from app.services.access_tracker import access_tracker
+from app.services.reclassifier import reclassifier
+from app.routers import documents, search, analytics, jobs
 
 logging.basicConfig(
     level=logging.INFO,
@@ -33,11 +42,39 @@ async def lifespan(app: FastAPI):
     faiss_service.init(settings.faiss_index_dir)
     logger.info("✅ FAISS service initialized")
 
+    # Initialize upload spool directory
+    storage_service.init(settings.upload_dir)
+    logger.info("✅ Upload storage initialized")
+
+    extraction_cache.init(settings.extraction_cache_dir)
+    logger.info("✅ Extraction cache initialized")
+
+    # Start background ingestion workers
+    job_queue.start()
+    logger.info("✅ Ingestion job queue started")
+
+    # Start the write-behind flusher for search-time score updates
+    score_buffer.start()
+
+    # Start the batched access-log writer (rolls up pre-existing logs once)
+    access_tracker.start()
+
+    # Periodic tier decay for documents that are not being searched
+    reclassifier.start()
+
     logger.info("🧠 NeuroVault is ready!")
     yield
 
     # ── Shutdown ─────────────────────────────────────────────────
     logger.info("NeuroVault shutting down...")
+    job_queue.shutdown()
+    parser_service.shutdown()
+    ocr_service.shutdown()
+    reclassifier.shutdown()
+    score_buffer.shutdown()
+    access_tracker.shutdown()
+    db_writer.shutdown()
+    await async_engine.dispose()
 
 
 app = FastAPI(
@@ -60,6 +97,7 @@ app.add_middleware(
 app.include_router(documents.router)
 app.include_router(search.router)
 app.include_router(analytics.router)
+app.include_router(jobs.router)
 
 
 @app.get("/health")
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, String, Integer, Float, DateTime, Index
+from app.database import Base
+
+
+class _AccessRollup:
+    """Accesses of one document within one time bucket."""
+
+    document_id = Column(String(36), primary_key=True)
+    bucket = Column(DateTime, primary_key=True)  # start of the hour / day (UTC)
+    user_id = Column(String(100), nullable=False)
+    access_count = Column(Integer, default=0, nullable=False)
+    relevance_sum = Column(Float, default=0.0, nullable=False)
+    last_accessed_at = Column(DateTime, nullable=False)
+
+
+class AccessRollupHourly(_AccessRollup, Base):
+    __tablename__ = "access_rollup_hourly"
+    __table_args__ = (Index("ix_access_rollup_hourly_user_bucket", "user_id", "bucket"),)
+
+
+class AccessRollupDaily(_AccessRollup, Base):
+    __tablename__ = "access_rollup_daily"
+    __table_args__ = (Index("ix_access_rollup_daily_user_bucket", "user_id", "bucket"),)
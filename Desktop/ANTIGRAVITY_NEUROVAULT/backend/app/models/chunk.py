@@ -0,0 +1,28 @@
+from sqlalchemy import Column, String, Integer, Boolean, Index, UniqueConstraint
+from app.database import Base
+
+
+class Chunk(Base):
+    """
+    One indexed chunk of a document: its FAISS vector and its span in the
+    document text. A linked chunk reuses the vector of another document's
+    chunk (duplicate content); the unlinked row for a vector is its owner.
+    """
+
+    __tablename__ = "chunks"
+    __table_args__ = (
+        UniqueConstraint("doc_id", "ordinal"),
+        Index("ix_chunks_user_faiss", "user_id", "faiss_id"),
+        Index("ix_chunks_user_hash", "user_id", "text_hash"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    doc_id = Column(String(36), index=True, nullable=False)
+    user_id = Column(String(100), nullable=False)
+    ordinal = Column(Integer, nullable=False)
+    faiss_id = Column(Integer, nullable=False)
+    # Character span in the document text (NULL for rows migrated from faiss_ids)
+    char_start = Column(Integer, nullable=True)
+    char_end = Column(Integer, nullable=True)
+    text_hash = Column(String(32), nullable=False)
+    linked = Column(Boolean, default=False, nullable=False)
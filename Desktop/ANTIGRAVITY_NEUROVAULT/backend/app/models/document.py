@@ -1,17 +1,24 @@
 import json
 from datetime import datetime
-from sqlalchemy import Column, String, Integer, Float, DateTime, Text, JSON
+from sqlalchemy import Column, String, Integer, Float, DateTime, Text, Index, and_, case
 from app.database import Base
 
 
 class Document(Base):
     __tablename__ = "documents"
+    __table_args__ = (
+        Index("ix_documents_user_activation", "user_id", "activation"),
+        Index("ix_documents_user_active_until", "user_id", "active_until"),
+        Index("ix_documents_user_contextual_until", "user_id", "contextual_until"),
+        Index("ix_documents_user_archived_until", "user_id", "archived_until"),
+    )
 
     id = Column(String(36), primary_key=True, index=True)
     user_id = Column(String(100), index=True, nullable=False)
     filename = Column(String(500), nullable=False)
     file_type = Column(String(50), nullable=False)
-    content_text = Column(Text, nullable=True)
+    # Extracted text lives in document_content; its length is set once indexing finishes
+    content_length = Column(Integer, nullable=True)
     chunk_count = Column(Integer, default=0)
 
     # Cognitive state
@@ -24,22 +31,54 @@ class Document(Base):
     last_accessed = Column(DateTime, default=datetime.utcnow)
     created_at = Column(DateTime, default=datetime.utcnow)
 
-    # FAISS references (list of int IDs stored as JSON)
-    faiss_ids = Column(Text, default="[]")
+    # Decay-invariant lifecycle state (cognition_engine.lifecycle), rewritten
+    # only on access: log-space recency anchored at a fixed epoch, and the
+    # moment the storage score drops below each tier's threshold
+    activation = Column(Float, nullable=True)
+    active_until = Column(DateTime, nullable=True)
+    contextual_until = Column(DateTime, nullable=True)
+    archived_until = Column(DateTime, nullable=True)
 
     # File metadata
     file_size = Column(Integer, default=0)
+    content_hash = Column(String(64), index=True, nullable=True)  # SHA-256 of the file
+    # Document whose indexed chunks this one links to instead of holding its own
+    duplicate_of = Column(String(36), index=True, nullable=True)
     project_tags = Column(Text, default="[]")  # JSON list of tags
     description = Column(Text, nullable=True)
 
-    def get_faiss_ids(self) -> list[int]:
-        return json.loads(self.faiss_ids or "[]")
-
-    def set_faiss_ids(self, ids: list[int]):
-        self.faiss_ids = json.dumps(ids)
-
     def get_project_tags(self) -> list[str]:
         return json.loads(self.project_tags or "[]")
 
     def set_project_tags(self, tags: list[str]):
         self.project_tags = json.dumps(tags)
+
+    def tier_at(self, now: datetime) -> str:
+        """Lifecycle tier at `now` (the stored tier until lifecycle state is set)."""
+        if self.active_until is None:
+            return self.tier
+        if now < self.active_until:
+            return "Active"
+        if now < self.contextual_until:
+            return "Contextual"
+        if now < self.archived_until:
+            return "Archived"
+        return "Dormant"
+
+    @classmethod
+    def in_tier(cls, tier: str, now: datetime):
+        """SQL condition for documents in a lifecycle tier at `now` (indexed comparisons)."""
+        return {
+            "Active": cls.active_until > now,
+            "Contextual": and_(cls.active_until <= now, cls.contextual_until > now),
+            "Archived": and_(cls.contextual_until <= now, cls.archived_until > now),
+            "Dormant": cls.archived_until <= now,
+        }.get(tier, cls.id.is_(None))
+
+    @classmethod
+    def tier_case(cls, now: datetime):
+        """SQL expression for the lifecycle tier at `now`, as tier_at derives it."""
+        return case(
+            *((cls.in_tier(tier, now), tier) for tier in ("Active", "Contextual", "Archived", "Dormant")),
+            else_=cls.tier,
+        )
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, String, Integer, LargeBinary
+from app.database import Base
+
+
+class DocumentContent(Base):
+    """One zlib-compressed frame of a document's extracted text."""
+
+    __tablename__ = "document_content"
+
+    doc_id = Column(String(36), primary_key=True)
+    frame = Column(Integer, primary_key=True)  # frame n holds characters [n*F, (n+1)*F)
+    data = Column(LargeBinary, nullable=False)
@@ -0,0 +1,28 @@
+import json
+from datetime import datetime
+
+from sqlalchemy import Column, String, DateTime, Text
+from app.database import Base
+
+
+class IngestJob(Base):
+    __tablename__ = "ingest_jobs"
+
+    id = Column(String(36), primary_key=True, index=True)
+    user_id = Column(String(100), index=True, nullable=False)
+    kind = Column(String(20), default="upload")  # upload, update
+    document_id = Column(String(36), index=True, nullable=True)
+    filename = Column(String(500), nullable=True)
+    status = Column(String(20), default="queued")  # queued, running, succeeded, failed
+    error = Column(Text, nullable=True)
+    result = Column(Text, nullable=True)  # JSON payload of a finished job
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    def get_result(self) -> dict | None:
+        return json.loads(self.result) if self.result else None
+
+    def set_result(self, result: dict):
+        self.result = json.dumps(result)
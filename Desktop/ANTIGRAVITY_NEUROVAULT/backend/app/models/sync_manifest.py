@@ -0,0 +1,21 @@
+from datetime import datetime
+
+from sqlalchemy import Column, String, Integer, Float, DateTime, UniqueConstraint
+from app.database import Base
+
+
+class SyncManifestEntry(Base):
+    """Last synced state of one file under a synced directory."""
+
+    __tablename__ = "sync_manifest"
+    __table_args__ = (UniqueConstraint("user_id", "root", "rel_path"),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(String(100), index=True, nullable=False)
+    root = Column(String(1000), index=True, nullable=False)
+    rel_path = Column(String(1000), nullable=False)
+    size = Column(Integer, nullable=False)
+    mtime = Column(Float, nullable=False)
+    sha256 = Column(String(64), nullable=False)
+    document_id = Column(String(36), index=True, nullable=False)
+    synced_at = Column(DateTime, default=datetime.utcnow)
@@ -1,11 +1,16 @@
+from datetime import datetime, timedelta
+
+import numpy as np
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
+from app.database import get_async_db
 from app.models.document import Document
+from app.models.access_rollup import AccessRollupDaily, AccessRollupHourly
 from app.schemas.document import AnalyticsResponse, TierStats, DocumentResponse
 from app.services.cognition import cognition_engine, TIER_COLORS
+from app.services.access_tracker import day_bucket, hour_bucket
 from app.config import settings
 
 router = APIRouter(prefix="/api/analytics", tags=["analytics"])
@@ -14,67 +19,71 @@ TIER_ORDER = ["Active", "Contextual", "Archived", "Dormant"]
 
 
 @router.get("/", response_model=AnalyticsResponse)
-def get_analytics(
+async def get_analytics(
     user_id: str = Query(default="default_user"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    docs = db.query(Document).filter(Document.user_id == user_id).all()
-    total = len(docs)
-    avg_score = sum(d.cognitive_score for d in docs) / total if total else 0.0
+    ids, tiers, scores = await current_scores(db, user_id, datetime.utcnow())
+    counts = _count_tiers(tiers)
+    total = len(ids)
 
     # Tier distribution
-    tier_counts: dict[str, list[float]] = {t: [] for t in TIER_ORDER}
-    for d in docs:
-        tier_counts[d.tier].append(d.cognitive_score)
-
     tier_stats = [
         TierStats(
             tier=tier,
-            count=len(scores),
-            avg_score=sum(scores) / len(scores) if scores else 0.0,
+            count=counts[tier],
+            avg_score=float(scores[tiers == tier].mean()) if counts[tier] else 0.0,
             color=TIER_COLORS.get(tier, "#888"),
         )
         for tier in TIER_ORDER
-        for scores in [tier_counts[tier]]
     ]
 
-    # Top documents by cognitive score
-    top_docs = sorted(docs, key=lambda d: d.cognitive_score, reverse=True)[:10]
+    # Top documents by cognitive score: rank the scores, load only those rows
+    top = np.argsort(-scores, kind="stable")[:10]
+    docs = {
+        d.id: d for d in await db.scalars(
+            select(Document).where(Document.id.in_([ids[i] for i in top]))
+        )
+    }
 
     return AnalyticsResponse(
         total_documents=total,
         tier_distribution=tier_stats,
-        avg_cognitive_score=round(avg_score, 4),
-        top_documents=[_to_resp(d) for d in top_docs],
+        avg_cognitive_score=round(float(scores.mean()) if total else 0.0, 4),
+        top_documents=[
+            _to_resp(docs[ids[i]], float(scores[i]), tiers[i]) for i in top if ids[i] in docs
+        ],
     )
 
 
 @router.get("/lifecycle")
-def lifecycle_data(
+async def lifecycle_data(
     user_id: str = Query(default="default_user"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Score histogram data for D3.js visualization."""
-    docs = db.query(Document).filter(Document.user_id == user_id).all()
+    docs = await _user_documents(db, user_id)
+    now = datetime.utcnow()
     nodes = [
         {
             "id": d.id,
             "filename": d.filename,
-            "score": round(d.cognitive_score, 4),
-            "tier": d.tier,
+            "score": round(score, 4),
+            "tier": tier,
             "access_count": d.access_count,
             "file_type": d.file_type,
-            "color": TIER_COLORS.get(d.tier, "#888"),
+            "color": TIER_COLORS.get(tier, "#888"),
             "created_at": d.created_at.isoformat(),
             "last_accessed": d.last_accessed.isoformat(),
         }
         for d in docs
+        for score, tier in [_lifecycle(d, now)]
     ]
 
     # Histogram buckets (10 buckets from 0 to 1)
     buckets = [0] * 10
-    for d in docs:
-        idx = min(9, int(d.cognitive_score * 10))
+    for node in nodes:
+        idx = min(9, int(node["score"] * 10))
         buckets[idx] += 1
 
     histogram = [
@@ -94,19 +103,19 @@ def lifecycle_data(
 
 
 @router.get("/tiers")
-def tier_summary(
+async def tier_summary(
     user_id: str = Query(default="default_user"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    docs = db.query(Document).filter(Document.user_id == user_id).all()
+    _, tiers, scores = await current_scores(db, user_id, datetime.utcnow())
+    counts = _count_tiers(tiers)
     result = {}
     for tier in TIER_ORDER:
-        tier_docs = [d for d in docs if d.tier == tier]
         result[tier] = {
-            "count": len(tier_docs),
+            "count": counts[tier],
             "avg_score": (
-                round(sum(d.cognitive_score for d in tier_docs) / len(tier_docs), 4)
-                if tier_docs else 0.0
+                round(float(scores[tiers == tier].mean()), 4)
+                if counts[tier] else 0.0
             ),
             "color": TIER_COLORS.get(tier, "#888"),
             "description": cognition_engine.tier_description(tier),
@@ -114,15 +123,103 @@ def tier_summary(
     return result
 
 
+@router.get("/activity")
+async def access_activity(
+    user_id: str = Query(default="default_user"),
+    granularity: str = Query(default="day", pattern="^(hour|day)$"),
+    days: int = Query(default=30, ge=1, le=365),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Accesses over time and the most accessed documents, read from the rollups."""
+    if granularity == "hour":
+        rollup, since = AccessRollupHourly, hour_bucket(datetime.utcnow() - timedelta(days=days))
+    else:
+        rollup, since = AccessRollupDaily, day_bucket(datetime.utcnow() - timedelta(days=days))
+    in_window = (rollup.user_id == user_id, rollup.bucket >= since)
+
+    series = await db.execute(
+        select(rollup.bucket, func.sum(rollup.access_count))
+        .where(*in_window)
+        .group_by(rollup.bucket)
+        .order_by(rollup.bucket)
+    )
+    points = [{"bucket": bucket.isoformat(), "count": int(count)} for bucket, count in series]
+
+    accesses = func.sum(rollup.access_count).label("accesses")
+    top = await db.execute(
+        select(rollup.document_id, Document.filename, accesses)
+        .join(Document, Document.id == rollup.document_id)
+        .where(*in_window)
+        .group_by(rollup.document_id, Document.filename)
+        .order_by(accesses.desc())
+        .limit(10)
+    )
+
+    return {
+        "granularity": granularity,
+        "since": since.isoformat(),
+        "total_accesses": sum(p["count"] for p in points),
+        "series": points,
+        "top_documents": [
+            {"id": doc_id, "filename": filename, "access_count": int(count)}
+            for doc_id, filename, count in top
+        ],
+    }
+
+
 # ──────────────────────────────────────────
-def _to_resp(doc: Document) -> DocumentResponse:
+async def _user_documents(db: AsyncSession, user_id: str) -> list[Document]:
+    return list(await db.scalars(select(Document).where(Document.user_id == user_id)))
+
+
+async def current_scores(
+    db: AsyncSession, user_id: str, now: datetime, *where
+) -> tuple[list[str], np.ndarray, np.ndarray]:
+    """
+    Ids, tiers (computed in SQL) and current storage scores of a user's
+    documents matching `where`, derived from the stored lifecycle columns
+    without loading whole rows.
+    """
+    rows = (await db.execute(
+        select(
+            Document.id, Document.tier_case(now), Document.activation,
+            Document.access_count, Document.cognitive_score,
+        ).where(Document.user_id == user_id, *where).order_by(Document.id)
+    )).all()
+    if not rows:
+        return [], np.array([], dtype=object), np.array([], dtype=np.float64)
+    ids, tiers, activation, counts, stored = zip(*rows)
+    activation = np.array(activation, dtype=np.float64)  # None → NaN
+    scores = cognition_engine.lifecycle_scores(
+        activation, np.array([c or 0 for c in counts], dtype=np.float64), now
+    )
+    # Documents without lifecycle state keep their stored score
+    scores = np.where(np.isnan(activation), np.array(stored, dtype=np.float64), scores)
+    return list(ids), np.array(tiers, dtype=object), scores
+
+
+def _count_tiers(tiers: np.ndarray) -> dict[str, int]:
+    return {tier: int(np.count_nonzero(tiers == tier)) for tier in TIER_ORDER}
+
+
+def _lifecycle(doc: Document, now: datetime) -> tuple[float, str]:
+    """Current storage score and tier, derived from the stored lifecycle state."""
+    if doc.activation is None:
+        return doc.cognitive_score, doc.tier
+    return (
+        cognition_engine.lifecycle_score(doc.activation, doc.access_count, now),
+        doc.tier_at(now),
+    )
+
+
+def _to_resp(doc: Document, score: float, tier: str) -> DocumentResponse:
     return DocumentResponse(
         id=doc.id,
         user_id=doc.user_id,
         filename=doc.filename,
         file_type=doc.file_type,
-        tier=doc.tier,
-        cognitive_score=doc.cognitive_score,
+        tier=tier,
+        cognitive_score=score,
         semantic_score=doc.semantic_score,
         access_count=doc.access_count,
         last_accessed=doc.last_accessed,
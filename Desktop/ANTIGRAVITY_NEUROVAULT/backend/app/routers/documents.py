@@ -1,16 +1,33 @@
 import uuid
 import logging
+import mimetypes
 from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
 from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.config import settings
+from app.database import get_async_db
 from app.models.document import Document
-from app.models.access_log import AccessLog
+from app.models.ingest_job import IngestJob
 from app.schemas.document import DocumentResponse, DocumentDetail
-from app.services.embedding_service import embedding_service
-from app.services.faiss_service import faiss_service
+from app.schemas.job import JobResponse
+from app.routers.analytics import current_scores
+from app.routers.jobs import job_response
 from app.services.parser_service import parser_service
+from app.services.content_store import content_store
+from app.services.access_tracker import access_tracker
+from app.services.score_buffer import score_buffer
+from app.services.ingestion import ingestion_service
+from app.services.db_writer import db_writer
+from app.services.job_queue import job_queue
+from app.services.storage_service import StoredFile, storage_service
+from app.services.sync_service import sync_service
 from app.services.cognition import cognition_engine
 from app.services.explainer import explainer_service
 
@@ -28,161 +45,354 @@ ALLOWED_TYPES = {
     "image/tiff": "tiff",
 }
 
+ARCHIVE_TYPES = {"application/zip", "application/x-zip-compressed"}
+
+# Text read for the detail preview (whitespace is collapsed before it is cut to length)
+PREVIEW_READ_CHARS = 2048
+
 
-@router.post("/upload", response_model=DocumentResponse)
+@router.post("/upload", response_model=JobResponse, status_code=202)
 async def upload_document(
     file: UploadFile = File(...),
     user_id: str = Query(default="default_user"),
     description: str = Query(default=""),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    """Upload a document: parse → chunk → embed → index → store."""
-    content_type = file.content_type or "text/plain"
-    file_type = ALLOWED_TYPES.get(content_type, content_type.split("/")[-1])
+    """Upload a document: spool to disk, then queue parse → chunk → embed → index."""
+    file_type = _file_type(file.content_type, file.filename)
+    filename = file.filename
 
-    file_bytes = await file.read()
-    file_size = len(file_bytes)
+    # Spool to disk in blocks so memory stays bounded regardless of file size
+    doc_id = str(uuid.uuid4())
+    path, file_size, digest = await storage_service.spool(file, user_id, doc_id)
 
-    # Parse
-    text = parser_service.extract_text(file_bytes, file_type)
-    if not text.strip():
-        text = f"[No text extracted from {file.filename}]"
+    def run(job_db: Session) -> dict:
+        return _ingest_new(
+            job_db, doc_id, user_id, filename, file_type, path, file_size, digest, description
+        )
 
-    # Chunk
-    chunks = parser_service.chunk_text(text)
-    if not chunks:
-        chunks = [text[:512]]
+    job = await _submit_job("upload", user_id, run, document_id=doc_id, filename=filename)
+    return job_response(job)
 
-    # Embed
-    vectors = embedding_service.encode(chunks)
 
-    # Compute initial cognitive score (no query context)
-    now = datetime.utcnow()
-    initial_score = cognition_engine.compute_storage_score(now, 0)
-    tier = cognition_engine.classify_tier(initial_score)
+@router.post("/bulk", response_model=JobResponse, status_code=202)
+async def bulk_upload(
+    files: list[UploadFile] = File(...),
+    user_id: str = Query(default="default_user"),
+    description: str = Query(default=""),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Upload many documents at once, as several files and/or zip archives.
+    One job parses them in parallel, embeds across document boundaries and
+    commits the whole batch with a single index checkpoint. BULK_MAX_FILES
+    bounds the whole request: plain files and archive members together.
+    """
+    plain = sum(1 for f in files if not _is_archive(f.content_type, f.filename))
+    if plain > settings.bulk_max_files:
+        raise HTTPException(
+            status_code=400, detail=f"At most {settings.bulk_max_files} files per bulk upload"
+        )
+    batch_id = str(uuid.uuid4())
+    stored: list[tuple[StoredFile, str]] = []
+    archives: list[Path] = []
+    for file in files:
+        if _is_archive(file.content_type, file.filename):
+            path, _, _ = await storage_service.stage(file, user_id, batch_id)
+            archives.append(path)
+        else:
+            doc_id = str(uuid.uuid4())
+            path, size, digest = await storage_service.spool(file, user_id, doc_id)
+            stored.append((
+                StoredFile(doc_id, file.filename, path, size, digest),
+                _file_type(file.content_type, file.filename),
+            ))
 
-    # Store document
-    doc_id = str(uuid.uuid4())
-    doc = Document(
-        id=doc_id,
-        user_id=user_id,
-        filename=file.filename,
-        file_type=file_type,
-        content_text=text,
-        chunk_count=len(chunks),
-        tier=tier,
-        cognitive_score=initial_score,
-        semantic_score=0.0,
-        access_count=0,
-        last_accessed=now,
-        created_at=now,
-        file_size=file_size,
-        description=description,
-    )
-    db.add(doc)
-    db.flush()  # get the id
+    def run(job_db: Session) -> dict:
+        batch = list(stored)
+        try:
+            for archive in archives:
+                remaining = settings.bulk_max_files - len(batch)
+                for member in storage_service.extract_archive(archive, user_id, remaining):
+                    batch.append((member, _file_type(None, member.filename)))
+        except Exception:
+            for member, _ in batch:
+                storage_service.remove(user_id, member.doc_id)
+            raise
+        finally:
+            storage_service.remove_staging(user_id, batch_id)
+        result = ingestion_service.ingest_batch(job_db, user_id, batch, description)
+        logger.info(
+            f"Bulk upload: {result['succeeded']} indexed, {result['failed']} failed, "
+            f"{result['chunks']} chunks in {result['elapsed_s']}s"
+        )
+        return result
 
-    # Index in FAISS
-    faiss_ids = faiss_service.add_vectors(user_id, doc_id, vectors)
-    doc.set_faiss_ids(faiss_ids)
-    db.commit()
-    db.refresh(doc)
+    job = await _submit_job("bulk", user_id, run, filename=f"{len(files)} files")
+    return job_response(job)
+
+
+@router.post("/sync", response_model=JobResponse, status_code=202)
+async def sync_directory(
+    directory: str = Query(..., description="Directory on the server's file system"),
+    user_id: str = Query(default="default_user"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Mirror a local directory into the vault as a background job: new and
+    changed files are indexed, files removed from the directory are deleted.
+    Runs in the server so it shares the live FAISS indexes. Only
+    directories under SYNC_ROOTS are accepted.
+    """
+    root = Path(directory).expanduser().resolve()
+    if not any(root.is_relative_to(allowed) for allowed in settings.sync_root_dirs):
+        raise HTTPException(status_code=403, detail=f"{directory} is not under an allowed sync root")
+    if not root.is_dir():
+        raise HTTPException(status_code=400, detail=f"{directory} is not a directory")
+
+    def run(job_db: Session) -> dict:
+        return sync_service.sync(job_db, root, user_id)
 
-    logger.info(f"Uploaded: {file.filename} → {doc_id} ({len(chunks)} chunks, tier={tier})")
-    return _to_response(doc)
+    job = await _submit_job("sync", user_id, run, filename=str(root))
+    return job_response(job)
 
 
 @router.get("/", response_model=list[DocumentResponse])
-def list_documents(
+async def list_documents(
     user_id: str = Query(default="default_user"),
     tier: str = Query(default=None),
     skip: int = Query(default=0, ge=0),
     limit: int = Query(default=50, le=200),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    q = db.query(Document).filter(Document.user_id == user_id)
-    if tier:
-        q = q.filter(Document.tier == tier)
-    docs = q.order_by(Document.cognitive_score.desc()).offset(skip).limit(limit).all()
-    return [_to_response(d) for d in docs]
+    """
+    Highest current score first: scores are derived from the lifecycle
+    state as analytics does (the stored cognitive_score goes stale), and
+    only the requested page is loaded whole.
+    """
+    now = datetime.utcnow()
+    ids, _, scores = await current_scores(
+        db, user_id, now, *((Document.in_tier(tier, now),) if tier else ())
+    )
+    page = [ids[i] for i in np.argsort(-scores, kind="stable")[skip:skip + limit]]
+    docs = {d.id: d for d in await db.scalars(select(Document).where(Document.id.in_(page)))}
+    return [_to_response(docs[doc_id]) for doc_id in page if doc_id in docs]
 
 
 @router.get("/{doc_id}", response_model=DocumentDetail)
-def get_document(doc_id: str, db: Session = Depends(get_db)):
-    doc = _get_doc_or_404(doc_id, db)
+async def get_document(
+    doc_id: str,
+    explain: bool = Query(default=False),
+    db: AsyncSession = Depends(get_async_db),
+):
+    doc = await _get_doc_or_404(doc_id, db)
     resp = _to_response(doc)
-    detail = DocumentDetail(
+    preview = await db.run_sync(content_store.read, doc.id, 0, PREVIEW_READ_CHARS)
+    return DocumentDetail(
         **resp.model_dump(),
-        content_preview=parser_service.get_preview(doc.content_text or ""),
-        explanation=explainer_service.build(
-            doc.id,
-            doc.filename,
-            doc.semantic_score,
-            doc.last_accessed,
-            doc.access_count,
-            doc.created_at,
-            doc.tier,
-        ),
+        content_preview=parser_service.get_preview(preview),
+        explanation=_explain(doc, doc.semantic_score) if explain else None,
     )
-    return detail
+
+
+@router.get("/{doc_id}/explanation")
+async def get_explanation(
+    doc_id: str,
+    semantic_score: Optional[float] = Query(default=None, ge=0.0, le=1.0),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Score breakdown for a document, computed on demand. Pass the
+    semantic_score of a search result to explain that hit; without it the
+    document's last recorded semantic score is used.
+    """
+    doc = await _get_doc_or_404(doc_id, db)
+    return _explain(doc, doc.semantic_score if semantic_score is None else semantic_score)
+
+
+@router.put("/{doc_id}", response_model=JobResponse, status_code=202)
+async def update_document(
+    doc_id: str,
+    file: UploadFile = File(...),
+    description: Optional[str] = Query(default=None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Replace a document's file; the queued job re-embeds only the chunks that changed."""
+    doc = await _get_doc_or_404(doc_id, db)
+    file_type = _file_type(file.content_type, file.filename)
+    filename = file.filename
+
+    path, file_size, digest = await storage_service.spool(file, doc.user_id, doc.id)
+
+    def run(job_db: Session) -> dict:
+        return _reindex_existing(
+            job_db, doc_id, filename, file_type, path, file_size, digest, description
+        )
+
+    job = await _submit_job("update", doc.user_id, run, document_id=doc_id, filename=filename)
+    return job_response(job)
 
 
 @router.delete("/{doc_id}")
-def delete_document(
+async def delete_document(
     doc_id: str,
     user_id: str = Query(default="default_user"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    doc = _get_doc_or_404(doc_id, db)
-    faiss_service.remove_document(user_id, doc.get_faiss_ids())
-    db.delete(doc)
-    db.commit()
+    doc = await _get_doc_or_404(doc_id, db)
+    if doc.user_id != user_id:  # someone else's document: as if it did not exist
+        raise HTTPException(status_code=404, detail="Document not found")
+    # Index and file removal block, so the delete runs on the writer thread
+    await db_writer.run(lambda s: _delete_document(s, doc_id))
     return {"status": "deleted", "doc_id": doc_id}
 
 
 @router.post("/{doc_id}/access")
-def record_access(
+async def record_access(
     doc_id: str,
     query_used: str = Query(default=""),
     relevance_score: float = Query(default=0.0),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    doc = _get_doc_or_404(doc_id, db)
-    doc.access_count += 1
-    doc.last_accessed = datetime.utcnow()
-    new_score = cognition_engine.compute_storage_score(doc.last_accessed, doc.access_count)
-    doc.cognitive_score = new_score
-    doc.tier = cognition_engine.classify_tier(new_score)
-
-    log = AccessLog(
-        document_id=doc_id,
-        user_id=doc.user_id,
-        accessed_at=doc.last_accessed,
-        query_used=query_used,
-        relevance_score=relevance_score,
-        access_type="direct",
+    """
+    Buffer the access; the access tracker's next flush counts it into the
+    document. The returned score and tier include accesses still buffered.
+    """
+    doc = await _get_doc_or_404(doc_id, db)
+    accessed_at = datetime.utcnow()
+    buffered = access_tracker.record(
+        doc_id, doc.user_id, accessed_at,
+        query_used=query_used, relevance_score=relevance_score, access_type="direct",
     )
-    db.add(log)
-    db.commit()
-    return {"status": "ok", "cognitive_score": new_score, "tier": doc.tier}
+    new_score = cognition_engine.compute_storage_score(accessed_at, (doc.access_count or 0) + buffered)
+    return {"status": "ok", "cognitive_score": new_score, "tier": cognition_engine.classify_tier(new_score)}
 
 
 # ──────────────────────────────────────────
-def _get_doc_or_404(doc_id: str, db: Session) -> Document:
+def _ingest_new(
+    db: Session,
+    doc_id: str,
+    user_id: str,
+    filename: str,
+    file_type: str,
+    path: Path,
+    file_size: int,
+    digest: str,
+    description: str,
+) -> dict:
+    """Job body for uploads: store the document, then stream it into the index."""
+    # Store document first so chunks become searchable as they are indexed
+    doc = ingestion_service.create_document(
+        doc_id, user_id, filename, file_type, file_size, description
+    )
+    db.add(doc)
+    db.commit()
+
+    # Stream pages → chunks → embedding batches → FAISS
+    try:
+        stats = ingestion_service.ingest(db, doc, path, digest)
+    except Exception:
+        storage_service.remove(user_id, doc_id)
+        raise
+    db.refresh(doc)
+
+    logger.info(f"Uploaded: {filename} → {doc_id} ({doc.chunk_count} chunks, tier={doc.tier})")
+    return {"document": _to_response(doc).model_dump(mode="json"), **stats}
+
+
+def _reindex_existing(
+    db: Session,
+    doc_id: str,
+    filename: str,
+    file_type: str,
+    path: Path,
+    file_size: int,
+    digest: str,
+    description: Optional[str],
+) -> dict:
+    """Job body for updates: diff the new version's chunks against the stored ones."""
     doc = db.query(Document).filter(Document.id == doc_id).first()
+    if not doc:
+        raise LookupError(f"Document {doc_id} no longer exists")
+
+    # Access history (access_count, last_accessed, access logs) is left untouched
+    doc.filename = filename
+    doc.file_type = file_type
+    doc.file_size = file_size
+    if description is not None:
+        doc.description = description
+
+    stats = ingestion_service.reindex(db, doc, path, digest)
+    storage_service.prune(doc.user_id, doc.id, keep=path)
+    db.refresh(doc)
+
+    logger.info(
+        f"Updated: {filename} → {doc_id} "
+        f"(reused={stats['chunks_reused']}, embedded={stats['chunks_embedded']}, "
+        f"removed={stats['chunks_removed']})"
+    )
+    return {"document": _to_response(doc).model_dump(mode="json"), **stats}
+
+
+def _delete_document(db: Session, doc_id: str):
+    """Runs on the writer thread."""
+    doc = db.get(Document, doc_id)
+    if doc:
+        ingestion_service.delete_document(db, doc, commit=False)
+        score_buffer.discard(doc_id)
+
+
+# ──────────────────────────────────────────
+async def _submit_job(kind: str, user_id: str, fn, **kwargs) -> IngestJob:
+    """Record a queued job on the writer thread, serialized with the other API writes."""
+    def submit(db: Session) -> IngestJob:
+        job = job_queue.submit(db, kind, user_id, fn, **kwargs)
+        db.expunge(job)  # stays loaded after the writer's commit
+        return job
+
+    return await db_writer.run(submit)
+
+
+def _file_type(content_type: Optional[str], filename: Optional[str]) -> str:
+    """Map an upload's MIME type (or, failing that, its extension) to a file type."""
+    if not content_type or content_type == "application/octet-stream":
+        content_type = mimetypes.guess_type(filename or "")[0] or "text/plain"
+    return ALLOWED_TYPES.get(content_type, content_type.split("/")[-1])
+
+
+def _is_archive(content_type: Optional[str], filename: Optional[str]) -> bool:
+    return content_type in ARCHIVE_TYPES or (filename or "").lower().endswith(".zip")
+
+
+async def _get_doc_or_404(doc_id: str, db: AsyncSession) -> Document:
+    doc = await db.get(Document, doc_id)
     if not doc:
         raise HTTPException(status_code=404, detail="Document not found")
     return doc
 
 
+def _explain(doc: Document, semantic: float) -> dict:
+    components = cognition_engine.score_components(semantic, doc.last_accessed, doc.access_count)
+    return explainer_service.build(
+        doc.id, doc.filename, semantic,
+        doc.last_accessed, doc.access_count, doc.created_at,
+        cognition_engine.classify_tier(components["total"]),
+        components=components,
+    )
+
+
 def _to_response(doc: Document) -> DocumentResponse:
+    now = datetime.utcnow()
     return DocumentResponse(
         id=doc.id,
         user_id=doc.user_id,
         filename=doc.filename,
         file_type=doc.file_type,
-        tier=doc.tier,
-        cognitive_score=doc.cognitive_score,
+        tier=doc.tier_at(now),
+        cognitive_score=(
+            doc.cognitive_score if doc.activation is None
+            else cognition_engine.lifecycle_score(doc.activation, doc.access_count, now)
+        ),
         semantic_score=doc.semantic_score,
         access_count=doc.access_count,
         last_accessed=doc.last_accessed,
@@ -191,4 +401,5 @@ def _to_response(doc: Document) -> DocumentResponse:
         file_size=doc.file_size,
         description=doc.description,
         project_tags=doc.get_project_tags(),
+        duplicate_of=doc.duplicate_of,
     )
@@ -1,131 +1,297 @@
 import time
 import logging
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+from typing import Optional
 
-from app.database import get_db
+import numpy as np
+from fastapi import APIRouter, BackgroundTasks, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session, load_only
+
+from app.config import settings
+from app.database import AsyncSessionLocal, SessionLocal, epoch_seconds
 from app.models.document import Document
 from app.schemas.search import SearchRequest, SearchResponse, SearchResult, ScoreBreakdown
 from app.services.embedding_service import embedding_service
 from app.services.faiss_service import faiss_service
-from app.services.cognition import cognition_engine
+from app.services.chunk_service import chunk_service
+from app.services.cognition import TIERS, cognition_engine
 from app.services.explainer import explainer_service
 from app.services.parser_service import parser_service
+from app.services.score_buffer import score_buffer
+from app.services.search_cache import normalize_query, search_cache
+from app.services.query_cache import query_cache
+from app.services.singleflight import SingleFlight
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/search", tags=["search"])
 
+SNIPPET_CHARS = 250
+
+search_flight = SingleFlight()
+
+# Columns needed to score, explain and return a search hit
+SCORING_COLUMNS = (
+    Document.id,
+    Document.user_id,
+    Document.filename,
+    Document.file_type,
+    Document.last_accessed,
+    Document.access_count,
+    Document.created_at,
+)
+
 
 @router.post("/", response_model=SearchResponse)
-def semantic_search(req: SearchRequest, db: Session = Depends(get_db)):
+async def semantic_search(req: SearchRequest, background: BackgroundTasks):
     """
     Query Pipeline:
     User Query → Embed → FAISS Vector Search → Cognitive Re-rank → Explainable Results
+
+    Embedding and FAISS run in the threadpool; database access is async.
+    Repeated searches are answered from the result cache, and identical
+    concurrent ones share a single run.
     """
     t0 = time.perf_counter()
 
     if not req.query.strip():
         raise HTTPException(status_code=400, detail="Query cannot be empty")
 
-    # 1. Embed the query
-    query_vec = embedding_service.encode_single(req.query)
-    if query_vec is None or query_vec.size == 0:
-        raise HTTPException(status_code=500, detail="Failed to embed query")
+    # 0. Serve a cached response computed from the user's current data
+    cache_key = (
+        req.user_id, normalize_query(req.query), req.k,
+        req.min_score, req.tier_filter, req.explain,
+    )
+    if search_cache.enabled:
+        cached = search_cache.get(cache_key, req.user_id)
+        if cached is not None:
+            return cached.model_copy(update={
+                "query": req.query,
+                "query_time_ms": round((time.perf_counter() - t0) * 1000, 2),
+            })
+    # Identical searches already in flight are joined instead of run again
+    response, shared = await search_flight.do(
+        cache_key, lambda: _run_search(req, cache_key, background)
+    )
+    if shared:
+        response = response.model_copy(update={
+            "query": req.query,
+            "query_time_ms": round((time.perf_counter() - t0) * 1000, 2),
+        })
+    return response
 
-    # 2. FAISS vector similarity search
-    raw_results = faiss_service.search(req.user_id, query_vec, k=req.k * 3)
 
-    if not raw_results:
-        return SearchResponse(
-            query=req.query,
-            total_results=0,
-            results=[],
-            query_time_ms=round((time.perf_counter() - t0) * 1000, 2),
-        )
+async def _run_search(
+    req: SearchRequest, cache_key: tuple, background: BackgroundTasks
+) -> SearchResponse:
+    """
+    The search pipeline proper. It may be shared by several waiting requests,
+    so it opens its own session instead of borrowing one request's.
+    """
+    t0 = time.perf_counter()
+    async with AsyncSessionLocal() as db:
+        # Read before any data so a concurrent write invalidates this result
+        generation = search_cache.generation(req.user_id)
 
-    # 3. Fetch documents and cognitive re-rank
-    ranked = []
-    for item in raw_results:
-        doc = db.query(Document).filter(Document.id == item["doc_id"]).first()
-        if not doc or doc.user_id != req.user_id:
-            continue
+        # 1. Embed the query
+        query_vec = await run_in_threadpool(embedding_service.encode_single, req.query)
+        if query_vec is None or query_vec.size == 0:
+            raise HTTPException(status_code=500, detail="Failed to embed query")
 
-        semantic_sim = float(item["semantic_score"])
+        # 2. Candidate documents: reused from a near-identical recent query, or a FAISS
+        #    vector similarity search with hits mapped to documents via the chunks table
+        raw_results = (
+            query_cache.lookup(req.user_id, query_vec, req.k) if query_cache.enabled else None
+        )
+        if raw_results is None:
+            hits = await run_in_threadpool(faiss_service.search, req.user_id, query_vec, req.k * 3)
+            raw_results = await db.run_sync(chunk_service.resolve, req.user_id, hits)
+            query_cache.store(req.user_id, generation, query_vec, req.k, raw_results)
+        else:
+            # The candidates were scored against another query; score them against this one
+            raw_results = await run_in_threadpool(
+                rescore_candidates, req.user_id, query_vec, raw_results
+            )
+            if query_cache.should_verify():
+                background.add_task(_verify_candidates, req.user_id, query_vec, req.k, raw_results)
 
-        # Apply cognitive scoring on top of semantic
-        cognitive_score = cognition_engine.compute_score(
-            semantic_sim, doc.last_accessed, doc.access_count
+        if not raw_results:
+            response = SearchResponse(
+                query=req.query,
+                total_results=0,
+                results=[],
+                query_time_ms=round((time.perf_counter() - t0) * 1000, 2),
+            )
+            _remember(cache_key, generation, response, [], req, datetime.utcnow())
+            return response
+
+        # 3. Fetch all candidate documents in one query and cognitive re-rank them in one
+        #    vectorized pass (filters applied, top k selected with argpartition)
+        docs = await db.run_sync(
+            fetch_candidates, req.user_id, [item["doc_id"] for item in raw_results]
         )
-        tier = cognition_engine.classify_tier(cognitive_score)
-
-        # Apply filters
-        if req.tier_filter and tier != req.tier_filter:
-            continue
-        if cognitive_score < req.min_score:
-            continue
-
-        # Build explanation
-        explanation = explainer_service.build(
-            doc.id, doc.filename, semantic_sim,
-            doc.last_accessed, doc.access_count, doc.created_at, tier
+        candidates = [
+            (item, *docs[item["doc_id"]]) for item in raw_results if item["doc_id"] in docs
+        ]
+        now = datetime.utcnow()
+        top = cognition_engine.rerank(
+            np.array([item["semantic_score"] for item, _, _ in candidates], dtype=np.float64),
+            np.array([last for _, _, last in candidates], dtype=np.float64),  # None → NaN
+            np.array([doc.access_count or 0 for _, doc, _ in candidates], dtype=np.float64),
+            k=req.k,
+            min_score=req.min_score,
+            tier_filter=req.tier_filter,
+            now=now,
         )
 
-        ranked.append({
-            "doc": doc,
-            "semantic": semantic_sim,
-            "cognitive": cognitive_score,
-            "tier": tier,
-            "explanation": explanation,
-        })
+        ranked = []
+        for i, score, tier_idx, recency, access in zip(
+            top["index"], top["score"], top["tier"], top["recency"], top["access"]
+        ):
+            item, doc, _ = candidates[i]
+            ranked.append({
+                "doc": doc,
+                "semantic": float(item["semantic_score"]),
+                "chunk_id": item["chunk_id"],
+                "cognitive": float(score),
+                "tier": TIERS[tier_idx],
+                "recency": float(recency),
+                "access": float(access),
+            })
 
-    # 4. Sort by cognitive score descending
-    ranked.sort(key=lambda x: x["cognitive"], reverse=True)
-    ranked = ranked[:req.k]
-
-    # 5. Update document access states in DB
-    for item in ranked:
-        doc = item["doc"]
-        doc.semantic_score = item["semantic"]
-        doc.cognitive_score = item["cognitive"]
-        doc.tier = item["tier"]
-
-    db.commit()
-
-    # 6. Build response
-    results = []
-    for rank, item in enumerate(ranked, start=1):
-        doc = item["doc"]
-        exp = item["explanation"]
-        snippet = parser_service.get_preview(doc.content_text or "", 250)
-
-        breakdown = ScoreBreakdown(
-            semantic_similarity=exp["semantic_similarity"],
-            semantic_percentage=exp["semantic_percentage"],
-            recency_score=exp["recency_score"],
-            recency_label=exp["recency_label"],
-            access_score=exp["access_score"],
-            access_label=exp["access_label"],
-            tier=exp["tier"],
-            final_score=exp["final_score"],
-            explanation=exp["explanation"],
+        # 4. Record the new document states; written behind in bulk, off the read path
+        updates = [
+            {
+                "id": item["doc"].id,
+                "user_id": item["doc"].user_id,
+                "semantic_score": item["semantic"],
+                "cognitive_score": item["cognitive"],
+                "tier": item["tier"],
+            }
+            for item in ranked
+        ]
+        score_buffer.add(updates)
+
+        # 5. Build response, with each snippet taken from the document's best-matching chunk
+        # (slightly over-fetched so the preview can tell when it was truncated)
+        spans = await db.run_sync(
+            chunk_service.snippets, [item["chunk_id"] for item in ranked], SNIPPET_CHARS + 1
+        )
+        results = []
+        for rank, item in enumerate(ranked, start=1):
+            doc = item["doc"]
+            snippet = parser_service.get_preview(spans.get(item["chunk_id"], ""), SNIPPET_CHARS)
+            results.append(SearchResult(
+                document_id=doc.id,
+                filename=doc.filename,
+                file_type=doc.file_type,
+                tier=item["tier"],
+                final_score=item["cognitive"],
+                semantic_score=item["semantic"],
+                content_snippet=snippet,
+                breakdown=_breakdown(item, now) if req.explain else None,
+                rank=rank,
+            ))
+
+        elapsed_ms = round((time.perf_counter() - t0) * 1000, 2)
+
+        response = SearchResponse(
+            query=req.query,
+            total_results=len(results),
+            results=results,
+            query_time_ms=elapsed_ms,
         )
+        _remember(cache_key, generation, response, ranked, req, now)
+        return response
 
-        results.append(SearchResult(
-            document_id=doc.id,
-            filename=doc.filename,
-            file_type=doc.file_type,
-            tier=item["tier"],
-            final_score=item["cognitive"],
-            content_snippet=snippet,
-            breakdown=breakdown,
-            rank=rank,
-        ))
-
-    elapsed_ms = round((time.perf_counter() - t0) * 1000, 2)
-
-    return SearchResponse(
-        query=req.query,
-        total_results=len(results),
-        results=results,
-        query_time_ms=elapsed_ms,
+
+@router.get("/metrics")
+async def cache_metrics():
+    """
+    Hit rates of the result cache and the semantic query cache, the query
+    cache's measured recall, and how many searches joined one in flight.
+    """
+    return {
+        "result_cache": search_cache.stats(),
+        "query_cache": query_cache.stats(),
+        "coalesced": search_flight.stats(),
+    }
+
+
+# ──────────────────────────────────────────
+def rescore_candidates(user_id: str, query_vec: np.ndarray, candidates: list[dict]) -> list[dict]:
+    """
+    Copies of cached candidates with semantic_score recomputed for this
+    query from each candidate chunk's stored vector, best first.
+    """
+    scores = faiss_service.similarities(
+        user_id, query_vec, [item["faiss_id"] for item in candidates]
+    )
+    rescored = [
+        {**item, "semantic_score": float(score)}
+        for item, score in zip(candidates, scores)
+        if not np.isnan(score)
+    ]
+    return sorted(rescored, key=lambda x: x["semantic_score"], reverse=True)
+
+
+def _verify_candidates(user_id: str, query_vec: np.ndarray, k: int, reused: list[dict]):
+    """Compare reused candidates with a real search for this query (after the response)."""
+    hits = faiss_service.search(user_id, query_vec, k * 3)
+    with SessionLocal() as db:
+        exact = chunk_service.resolve(db, user_id, hits)
+    query_cache.record_accuracy(
+        [c["doc_id"] for c in reused[:k]], [c["doc_id"] for c in exact[:k]]
+    )
+
+
+def _remember(
+    key: tuple, generation: int, response: SearchResponse,
+    ranked: list[dict], req: SearchRequest, now: datetime,
+):
+    """Cache a response until the TTL or the first result's next threshold crossing."""
+    if not search_cache.enabled:
+        return
+    expires_at = min([
+        now + timedelta(seconds=settings.search_cache_ttl_s),
+        *(
+            cognition_engine.next_crossing(
+                item["semantic"], item["doc"].last_accessed, item["doc"].access_count,
+                thresholds=(req.min_score,), now=now,
+            )
+            for item in ranked
+        ),
+    ])
+    search_cache.put(key, generation, expires_at, response)
+
+
+def _breakdown(item: dict, now: datetime) -> ScoreBreakdown:
+    """Explain a ranked hit, reusing the factors computed by the re-rank."""
+    doc = item["doc"]
+    exp = explainer_service.build(
+        doc.id, doc.filename, item["semantic"],
+        doc.last_accessed, doc.access_count, doc.created_at, item["tier"],
+        components=cognition_engine.components(
+            item["semantic"], item["recency"], item["access"], item["cognitive"]
+        ),
+        now=now,
+    )
+    return ScoreBreakdown(**{name: exp[name] for name in ScoreBreakdown.model_fields})
+
+
+def fetch_candidates(
+    db: Session, user_id: str, doc_ids: list[str]
+) -> dict[str, tuple[Document, Optional[float]]]:
+    """
+    Load a user's candidate documents in a single IN query, scoring columns
+    only, each with its last access as epoch seconds (computed in SQL, so
+    the re-rank gets numbers without converting datetimes).
+    """
+    if not doc_ids:
+        return {}
+    rows = (
+        db.query(Document, epoch_seconds(Document.last_accessed))
+        .options(load_only(*SCORING_COLUMNS))
+        .filter(Document.id.in_(doc_ids), Document.user_id == user_id)
     )
+    return {doc.id: (doc, last) for doc, last in rows}
@@ -29,6 +29,7 @@ class DocumentResponse(BaseModel):
     file_size: int
     description: Optional[str] = None
     project_tags: list[str] = []
+    duplicate_of: Optional[str] = None
 
     class Config:
         from_attributes = True
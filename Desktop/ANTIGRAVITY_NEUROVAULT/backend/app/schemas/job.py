@@ -0,0 +1,17 @@
+from datetime import datetime
+from typing import Optional
+from pydantic import BaseModel
+
+
+class JobResponse(BaseModel):
+    job_id: str
+    kind: str
+    status: str
+    user_id: str
+    document_id: Optional[str] = None
+    filename: Optional[str] = None
+    error: Optional[str] = None
+    result: Optional[dict] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
@@ -8,6 +8,7 @@ class SearchRequest(BaseModel):
     user_id: str
     min_score: float = 0.0
     tier_filter: Optional[str] = None  # e.g. "Active", "Contextual"
+    explain: bool = False  # include a score breakdown with each result
 
 
 class ScoreBreakdown(BaseModel):
@@ -28,8 +29,10 @@ class SearchResult(BaseModel):
     file_type: str
     tier: str
     final_score: float
+    semantic_score: float
     content_snippet: str
-    breakdown: ScoreBreakdown
+    # Only with explain=true; otherwise GET /api/documents/{id}/explanation
+    breakdown: Optional[ScoreBreakdown] = None
     rank: int
 
 
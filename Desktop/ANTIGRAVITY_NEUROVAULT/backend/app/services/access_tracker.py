@@ -0,0 +1,265 @@
+import time
+import logging
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+import numpy as np
+from sqlalchemy import bindparam, case, delete, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.access_log import AccessLog
+from app.models.access_rollup import AccessRollupDaily, AccessRollupHourly
+from app.models.document import Document
+from app.services.cognition import (
+    TIERS, UNTIL_COLUMNS, cognition_engine, lifecycle_values, to_epoch_seconds,
+)
+from app.services.db_writer import db_writer
+from app.services.search_cache import invalidate_on_commit
+
+logger = logging.getLogger(__name__)
+
+BACKFILL_BATCH = 5000
+
+
+def hour_bucket(ts: datetime) -> datetime:
+    return ts.replace(minute=0, second=0, microsecond=0)
+
+
+def day_bucket(ts: datetime) -> datetime:
+    return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+ROLLUPS: list[tuple[type, Callable[[datetime], datetime]]] = [
+    (AccessRollupHourly, hour_bucket),
+    (AccessRollupDaily, day_bucket),
+]
+
+LIFECYCLE_COLUMNS = ("activation", *UNTIL_COLUMNS)
+
+_documents = Document.__table__
+# Core executemany: documents deleted since the access are simply not matched
+_UPDATE_ACCESSED = (
+    update(_documents)
+    .where(_documents.c.id == bindparam("doc_id"))
+    .values(
+        access_count=bindparam("count"),
+        last_accessed=bindparam("last"),
+        cognitive_score=bindparam("score"),
+        tier=bindparam("new_tier"),
+        **{name: bindparam(f"new_{name}") for name in LIFECYCLE_COLUMNS},
+    )
+)
+
+
+class AccessTracker:
+    """
+    Batched writer for document access events. record() only appends to an
+    in-memory buffer; every ACCESS_LOG_FLUSH_INTERVAL_MS (or once
+    ACCESS_LOG_FLUSH_MAX_PENDING events wait) the batch is inserted into
+    access_logs, folded into the hourly and daily rollups and applied to the
+    documents (access_count, last_accessed, score, tier and lifecycle state,
+    coalesced per document) in one transaction on the DB writer. Compaction
+    periodically drops raw rows and
+    hourly rollups past their retention; daily rollups keep the history.
+    """
+
+    def __init__(self):
+        self._pending: list[dict] = []
+        # Buffered accesses per document, so record() can report them in O(1)
+        self._buffered: Counter[str] = Counter()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_compact = 0.0
+
+    def start(self):
+        self._backfill()
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._loop, name="access-log-flush", daemon=True
+            )
+            self._thread.start()
+
+    def record(
+        self,
+        document_id: str,
+        user_id: str,
+        accessed_at: datetime,
+        query_used: str = "",
+        relevance_score: float = 0.0,
+        access_type: str = "direct",
+    ) -> int:
+        """Buffer an access; returns how many accesses of the document are buffered."""
+        with self._lock:
+            self._pending.append({
+                "document_id": document_id,
+                "user_id": user_id,
+                "accessed_at": accessed_at,
+                "query_used": query_used,
+                "relevance_score": relevance_score or 0.0,
+                "access_type": access_type,
+            })
+            self._buffered[document_id] += 1
+            buffered = self._buffered[document_id]
+            full = len(self._pending) >= settings.access_log_flush_max_pending
+        if full:
+            self._wake.set()
+        return buffered
+
+    def flush(self):
+        """Hand buffered events to the writer as one batch."""
+        with self._lock:
+            events, self._pending = self._pending, []
+            self._buffered.clear()
+        if events:
+            db_writer.submit(lambda db: self._write(db, events))
+
+    def compact(self, db: Session, now: Optional[datetime] = None) -> dict:
+        """Drop raw rows and hourly rollups past their retention."""
+        now = now or datetime.utcnow()
+        removed = {"access_logs": 0, "hourly_rollups": 0}
+        if settings.access_log_retention_days > 0:
+            cutoff = now - timedelta(days=settings.access_log_retention_days)
+            removed["access_logs"] = db.execute(
+                delete(AccessLog).where(AccessLog.accessed_at < cutoff)
+            ).rowcount
+        if settings.access_rollup_hourly_retention_days > 0:
+            cutoff = hour_bucket(now - timedelta(days=settings.access_rollup_hourly_retention_days))
+            removed["hourly_rollups"] = db.execute(
+                delete(AccessRollupHourly).where(AccessRollupHourly.bucket < cutoff)
+            ).rowcount
+        if any(removed.values()):
+            logger.info(
+                f"Compacted access logs: {removed['access_logs']} raw rows, "
+                f"{removed['hourly_rollups']} hourly rollups removed"
+            )
+        return removed
+
+    def shutdown(self):
+        """Stop the flusher and write out what is still buffered."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def _loop(self):
+        interval = settings.access_log_flush_interval_ms / 1000
+        while not self._stop.is_set():
+            self._wake.wait(interval)
+            self._wake.clear()
+            try:
+                self.flush()
+                if time.monotonic() - self._last_compact >= settings.access_log_compact_interval_min * 60:
+                    self._last_compact = time.monotonic()
+                    db_writer.submit(self.compact)
+            except Exception:
+                logger.exception("Access log flush failed")
+
+    def _write(self, db: Session, events: list[dict]):
+        db.execute(insert(AccessLog), events)
+        self._roll_up(db, events)
+        self._touch_documents(db, events)
+
+    @staticmethod
+    def _touch_documents(db: Session, events: list[dict]):
+        """Count the accesses into their documents and recompute their lifecycle state."""
+        accessed: dict[str, list] = {}
+        for e in events:
+            entry = accessed.setdefault(e["document_id"], [0, e["accessed_at"]])
+            entry[0] += 1
+            entry[1] = max(entry[1], e["accessed_at"])
+        stored = dict(db.execute(
+            select(_documents.c.id, _documents.c.access_count)
+            .where(_documents.c.id.in_(list(accessed)))
+        ).all())
+        ids = [doc_id for doc_id in accessed if doc_id in stored]
+        if not ids:
+            return
+        counts = np.array([(stored[i] or 0) + accessed[i][0] for i in ids], dtype=np.float64)
+        last = np.array([to_epoch_seconds(accessed[i][1]) for i in ids])
+        scores = cognition_engine.storage_scores(last, counts)
+        tiers = cognition_engine.classify_tiers(scores)
+        values = lifecycle_values(cognition_engine.lifecycle_batch(last, counts))
+        invalidate_on_commit(db, {e["user_id"] for e in events if e["document_id"] in stored})
+        db.execute(_UPDATE_ACCESSED, [
+            {
+                "doc_id": doc_id,
+                "count": int(counts[j]),
+                "last": accessed[doc_id][1],
+                "score": float(scores[j]),
+                "new_tier": TIERS[tiers[j]],
+                **{f"new_{name}": values[name][j] for name in LIFECYCLE_COLUMNS},
+            }
+            for j, doc_id in enumerate(ids)
+        ])
+
+    def _roll_up(self, db: Session, events: list[dict]):
+        """Add events to the rollups (one upsert per table, coalesced per bucket)."""
+        for model, truncate in ROLLUPS:
+            buckets: dict[tuple[str, datetime], dict] = {}
+            for e in events:
+                key = (e["document_id"], truncate(e["accessed_at"]))
+                row = buckets.get(key)
+                if row is None:
+                    row = buckets[key] = {
+                        "document_id": e["document_id"],
+                        "bucket": key[1],
+                        "user_id": e["user_id"],
+                        "access_count": 0,
+                        "relevance_sum": 0.0,
+                        "last_accessed_at": e["accessed_at"],
+                    }
+                row["access_count"] += 1
+                row["relevance_sum"] += e["relevance_score"] or 0.0
+                row["last_accessed_at"] = max(row["last_accessed_at"], e["accessed_at"])
+            _upsert_rollup(db, model, list(buckets.values()))
+
+    def _backfill(self):
+        """Fold raw rows logged before the rollup tables existed into them."""
+        with SessionLocal() as db:
+            if db.scalar(select(AccessRollupDaily.document_id).limit(1)) is not None:
+                return
+            if db.scalar(select(AccessLog.id).limit(1)) is None:
+                return
+            rows = db.execute(
+                select(AccessLog.document_id, AccessLog.user_id,
+                       AccessLog.accessed_at, AccessLog.relevance_score)
+                .where(AccessLog.accessed_at.is_not(None))
+                .execution_options(yield_per=BACKFILL_BATCH)
+            ).mappings()
+            total = 0
+            for batch in rows.partitions():
+                self._roll_up(db, [dict(r) for r in batch])
+                total += len(batch)
+            db.commit()
+        logger.info(f"Rolled up {total} existing access log rows")
+
+
+def _upsert_rollup(db: Session, model: type, rows: list[dict]):
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    stmt = dialect.insert(model)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["document_id", "bucket"],
+        set_={
+            "access_count": model.access_count + stmt.excluded.access_count,
+            "relevance_sum": model.relevance_sum + stmt.excluded.relevance_sum,
+            "last_accessed_at": case(
+                (stmt.excluded.last_accessed_at > model.last_accessed_at,
+                 stmt.excluded.last_accessed_at),
+                else_=model.last_accessed_at,
+            ),
+        },
+    )
+    db.execute(stmt, rows)
+
+
+access_tracker = AccessTracker()
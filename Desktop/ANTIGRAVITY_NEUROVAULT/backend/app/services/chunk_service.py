@@ -0,0 +1,128 @@
+import logging
+from typing import Iterator
+
+from sqlalchemy.orm import Session
+
+from app.models.chunk import Chunk
+from app.services.content_store import content_store
+
+logger = logging.getLogger(__name__)
+
+# Keep IN (...) lists well below SQLite's bound-parameter limit
+IN_BATCH = 500
+
+
+def _batches(ids: list) -> Iterator[list]:
+    for i in range(0, len(ids), IN_BATCH):
+        yield ids[i:i + IN_BATCH]
+
+
+class ChunkService:
+    """
+    SQL side of the vector index: maps FAISS IDs to documents and chunk
+    spans through the chunks table, indexed on (user_id, faiss_id).
+    """
+
+    def for_document(self, db: Session, doc_id: str) -> list[Chunk]:
+        return (
+            db.query(Chunk)
+            .filter(Chunk.doc_id == doc_id)
+            .order_by(Chunk.ordinal)
+            .all()
+        )
+
+    def owners(self, db: Session, user_id: str, faiss_ids: list[int]) -> dict[int, str]:
+        """Document that owns each FAISS vector (vectors without an owner are omitted)."""
+        return {fid: doc_id for fid, (doc_id, _) in self._owner_rows(db, user_id, faiss_ids).items()}
+
+    def _owner_rows(
+        self, db: Session, user_id: str, faiss_ids: list[int]
+    ) -> dict[int, tuple[str, int]]:
+        """FAISS ID → (doc_id, chunk row id) of the chunk owning the vector."""
+        owners: dict[int, tuple[str, int]] = {}
+        for batch in _batches(sorted(set(faiss_ids))):
+            rows = db.query(Chunk.faiss_id, Chunk.doc_id, Chunk.id).filter(
+                Chunk.user_id == user_id,
+                Chunk.faiss_id.in_(batch),
+                Chunk.linked.is_(False),
+            )
+            owners.update((fid, (doc_id, chunk_id)) for fid, doc_id, chunk_id in rows)
+        return owners
+
+    def linking(
+        self, db: Session, user_id: str, faiss_ids: list[int], exclude_doc: str
+    ) -> list[Chunk]:
+        """Chunks of other documents that link to any of these vectors."""
+        chunks: list[Chunk] = []
+        for batch in _batches(sorted(set(faiss_ids))):
+            chunks.extend(
+                db.query(Chunk).filter(
+                    Chunk.user_id == user_id,
+                    Chunk.faiss_id.in_(batch),
+                    Chunk.linked.is_(True),
+                    Chunk.doc_id != exclude_doc,
+                )
+            )
+        return chunks
+
+    def find_hashes(
+        self, db: Session, user_id: str, text_hashes: list[str], exclude_doc: str
+    ) -> dict[str, int]:
+        """
+        Text hash → FAISS ID of an owned chunk with that exact text in another
+        document, for each hash that has one.
+        """
+        found: dict[str, int] = {}
+        for batch in _batches(sorted(set(text_hashes))):
+            rows = db.query(Chunk.text_hash, Chunk.faiss_id).filter(
+                Chunk.user_id == user_id,
+                Chunk.text_hash.in_(batch),
+                Chunk.linked.is_(False),
+                Chunk.doc_id != exclude_doc,
+            )
+            for text_hash, fid in rows:
+                found.setdefault(text_hash, fid)
+        return found
+
+    def resolve(
+        self, db: Session, user_id: str, hits: list[tuple[int, float]]
+    ) -> list[dict]:
+        """
+        Turn raw FAISS hits into one result per document, keeping each
+        document's best score and the chunk (and its vector) that produced it.
+        Returns [{doc_id, semantic_score, chunk_id, faiss_id}] best first.
+        """
+        owners = self._owner_rows(db, user_id, [fid for fid, _ in hits])
+        best: dict[str, dict] = {}
+        for fid, score in hits:
+            if fid not in owners:
+                continue
+            doc_id, chunk_id = owners[fid]
+            if doc_id not in best or score > best[doc_id]["semantic_score"]:
+                best[doc_id] = {
+                    "doc_id": doc_id, "semantic_score": score, "chunk_id": chunk_id, "faiss_id": fid,
+                }
+        return sorted(best.values(), key=lambda x: x["semantic_score"], reverse=True)
+
+    def snippets(self, db: Session, chunk_ids: list[int], max_chars: int) -> dict[int, str]:
+        """
+        Opening text (up to `max_chars`) of each chunk's span; only the content
+        frames holding those spans are read. Chunks without a recorded span
+        fall back to the start of the document.
+        """
+        spans: dict[int, tuple[str, int, int]] = {}
+        for batch in _batches(sorted(set(chunk_ids))):
+            rows = db.query(Chunk.id, Chunk.doc_id, Chunk.char_start, Chunk.char_end).filter(
+                Chunk.id.in_(batch)
+            )
+            for chunk_id, doc_id, start, end in rows:
+                start = start or 0
+                end = min(end, start + max_chars) if end is not None else start + max_chars
+                spans[chunk_id] = (doc_id, start, end)
+        return content_store.read_spans(db, spans)
+
+    def delete_for(self, db: Session, doc_id: str):
+        db.query(Chunk).filter(Chunk.doc_id == doc_id).delete(synchronize_session=False)
+
+
+chunk_service = ChunkService()
@@ -1,10 +1,41 @@
 import math
-from datetime import datetime
-from typing import Literal
+from datetime import datetime, timedelta
+from typing import Literal, Optional
+
+import numpy as np
+
 from app.config import settings
 
 TierName = Literal["Active", "Contextual", "Archived", "Dormant"]
 
+# Highest to lowest; classify_tiers returns indexes into this tuple
+TIERS: tuple[TierName, ...] = ("Active", "Contextual", "Archived", "Dormant")
+
+# Semantic similarity assumed when scoring without a query
+STORAGE_SEMANTIC = 0.5
+
+# Decay-invariant lifecycle state (see CognitionEngine.lifecycle)
+ACTIVATION_EPOCH = datetime(2020, 1, 1)
+FOREVER = datetime(9999, 12, 31)
+# Moment the storage score falls below each tier's threshold, TIERS order
+UNTIL_COLUMNS = ("active_until", "contextual_until", "archived_until")
+
+# Array methods take times as float seconds since the Unix epoch (UTC), NaN
+# when missing, so columns can be loaded as numbers (see database.epoch_seconds)
+UNIX_EPOCH = datetime(1970, 1, 1)
+
+
+def to_epoch_seconds(ts: Optional[datetime]) -> float:
+    return (ts - UNIX_EPOCH).total_seconds() if ts is not None else math.nan
+
+
+def from_epoch_seconds(seconds: float) -> Optional[datetime]:
+    return None if math.isnan(seconds) else UNIX_EPOCH + timedelta(seconds=seconds)
+
+
+ACTIVATION_EPOCH_S = to_epoch_seconds(ACTIVATION_EPOCH)
+FOREVER_S = to_epoch_seconds(FOREVER)
+
 TIER_COLORS = {
     "Active": "#00ff88",
     "Contextual": "#00d4ff",
@@ -35,6 +66,18 @@ class CognitionEngine:
         self.w_access = settings.cognitive_weight_access
         self.lambda_decay = settings.recency_decay_lambda
 
+    @property
+    def tier_thresholds(self) -> tuple[float, float, float]:
+        """Lowest score in the Active, Contextual and Archived tiers (tolerance applied)."""
+        return tuple(
+            t - settings.tier_threshold_tolerance
+            for t in (
+                settings.tier_active_threshold,
+                settings.tier_contextual_threshold,
+                settings.tier_archived_threshold,
+            )
+        )
+
     def recency_score(self, last_accessed: datetime) -> float:
         """Exponential decay: e^(-λ·days_since_access)."""
         now = datetime.utcnow()
@@ -63,18 +106,187 @@ class CognitionEngine:
 
     def compute_storage_score(self, last_accessed: datetime, access_count: int) -> float:
         """Score without query context (for background reclassification)."""
-        return self.compute_score(0.5, last_accessed, access_count)
+        return self.compute_score(STORAGE_SEMANTIC, last_accessed, access_count)
+
+    def score_batch(
+        self,
+        semantic: np.ndarray,
+        last_accessed: np.ndarray,
+        access_counts: np.ndarray,
+        now: Optional[datetime] = None,
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        compute_score over whole arrays (similarities, last access in epoch
+        seconds, numeric access counts) against a single `now`. Returns
+        (scores, recency, access). A missing access time (NaN) scores no recency.
+        """
+        days = (to_epoch_seconds(now or datetime.utcnow()) - last_accessed) / 86400.0
+        recency = np.where(
+            np.isnan(last_accessed), 0.0, np.exp(-self.lambda_decay * np.maximum(days, 0.0))
+        )
+        access = np.log1p(access_counts) / math.log(1 + 100)
+        scores = self.w_semantic * semantic + self.w_recency * recency + self.w_access * access
+        return np.clip(scores, 0.0, 1.0), recency, access
+
+    def storage_scores(
+        self,
+        last_accessed: np.ndarray,
+        access_counts: np.ndarray,
+        now: Optional[datetime] = None,
+    ) -> np.ndarray:
+        """compute_storage_score over whole arrays (see score_batch)."""
+        scores, _, _ = self.score_batch(STORAGE_SEMANTIC, last_accessed, access_counts, now)
+        return scores
+
+    def rerank(
+        self,
+        semantic: np.ndarray,
+        last_accessed: np.ndarray,
+        access_counts: np.ndarray,
+        k: int,
+        min_score: float = 0.0,
+        tier_filter: Optional[str] = None,
+        now: Optional[datetime] = None,
+    ) -> dict[str, np.ndarray]:
+        """
+        Score and classify all candidates in one pass and select the best k
+        that pass the filters (argpartition, then a sort of those k only).
+        Returns arrays aligned best first: "index" (into the inputs), "score",
+        "tier" (indexes into TIERS), "recency" and "access".
+        """
+        scores, recency, access = self.score_batch(semantic, last_accessed, access_counts, now)
+        tiers = self.classify_tiers(scores)
+
+        keep = scores >= min_score
+        if tier_filter:
+            keep &= tiers == (TIERS.index(tier_filter) if tier_filter in TIERS else -1)
+        idx = np.flatnonzero(keep)
+        if k < len(idx):
+            idx = idx[np.argpartition(-scores[idx], k - 1)[:k]] if k > 0 else idx[:0]
+        idx = idx[np.argsort(-scores[idx], kind="stable")]
+        return {
+            "index": idx,
+            "score": scores[idx],
+            "tier": tiers[idx],
+            "recency": recency[idx],
+            "access": access[idx],
+        }
+
+    def lifecycle(self, last_accessed: datetime, access_count: int) -> dict:
+        """
+        Decay-invariant lifecycle state to store with a document. Neither
+        value changes as time passes, only when the document is accessed:
+          activation = λ·days from ACTIVATION_EPOCH to the last access, so
+            recency = e^(activation − λ·days(now)) and ordering by activation
+            is ordering by recency;
+          <tier>_until = when the storage score drops below that tier's
+            threshold, so the current tier is an indexed `now < x_until`.
+        """
+        cols = self.lifecycle_batch(
+            np.array([to_epoch_seconds(last_accessed)]),
+            np.array([access_count or 0], dtype=np.float64),
+        )
+        return {name: values[0] for name, values in lifecycle_values(cols).items()}
+
+    def lifecycle_batch(
+        self, last_accessed: np.ndarray, access_counts: np.ndarray
+    ) -> dict[str, np.ndarray]:
+        """
+        lifecycle over whole arrays (last access in epoch seconds, numeric
+        counts). All columns are returned as floats, the *_until columns in
+        epoch seconds; lifecycle_values turns rows into storable values.
+        """
+        last = np.asarray(last_accessed, dtype=np.float64)
+        state = {"activation": self.lambda_decay * (last - ACTIVATION_EPOCH_S) / 86400.0}
+        base = self.w_semantic * STORAGE_SEMANTIC + self.w_access * np.log1p(access_counts) / math.log(1 + 100)
+        headroom_s = FOREVER_S - last
+        for name, threshold in zip(UNTIL_COLUMNS, self.tier_thresholds):
+            # Recency still needed to stay in the tier, relative to its maximum (1.0)
+            need = threshold - base
+            with np.errstate(divide="ignore", invalid="ignore"):
+                if self.lambda_decay > 0:
+                    hold_days = np.log(self.w_recency / need) / self.lambda_decay
+                else:
+                    hold_days = np.where(need <= self.w_recency, np.inf, 0.0)
+            hold_days = np.where(need <= 0, np.inf, np.maximum(np.nan_to_num(hold_days, nan=0.0), 0.0))
+            state[name] = last + np.minimum(hold_days * 86400.0, headroom_s)  # NaN stays NaN
+        return state
+
+    def lifecycle_score(
+        self, activation: float, access_count: int, now: Optional[datetime] = None
+    ) -> float:
+        """compute_storage_score derived from a stored activation."""
+        now_activation = self.lambda_decay * (
+            ((now or datetime.utcnow()) - ACTIVATION_EPOCH).total_seconds() / 86400.0
+        )
+        recency = math.exp(min(0.0, activation - now_activation))
+        score = (
+            self.w_semantic * STORAGE_SEMANTIC
+            + self.w_recency * recency
+            + self.w_access * self.access_score(access_count)
+        )
+        return min(1.0, max(0.0, score))
+
+    def lifecycle_scores(
+        self, activation: np.ndarray, access_counts: np.ndarray, now: Optional[datetime] = None
+    ) -> np.ndarray:
+        """lifecycle_score over whole arrays; NaN where activation is missing."""
+        now_activation = self.lambda_decay * (
+            ((now or datetime.utcnow()) - ACTIVATION_EPOCH).total_seconds() / 86400.0
+        )
+        recency = np.exp(np.minimum(0.0, activation - now_activation))
+        scores = (
+            self.w_semantic * STORAGE_SEMANTIC
+            + self.w_recency * recency
+            + self.w_access * np.log1p(access_counts) / math.log(1 + 100)
+        )
+        return np.clip(scores, 0.0, 1.0)
+
+    def next_crossing(
+        self,
+        semantic_similarity: float,
+        last_accessed: datetime,
+        access_count: int,
+        thresholds: tuple[float, ...] = (),
+        now: Optional[datetime] = None,
+    ) -> datetime:
+        """
+        When compute_score(semantic_similarity, ...) will next fall below a
+        tier threshold (or one of `thresholds`) through recency decay alone;
+        FOREVER if it never will.
+        """
+        now = now or datetime.utcnow()
+        score = self.compute_score(semantic_similarity, last_accessed, access_count)
+        below = [t for t in (*self.tier_thresholds, *thresholds) if t <= score]
+        if not below or self.lambda_decay <= 0:
+            return FOREVER
+        need = max(below) - (
+            self.w_semantic * semantic_similarity + self.w_access * self.access_score(access_count)
+        )
+        if need <= 0:
+            return FOREVER
+        hold_days = math.log(self.w_recency / need) / self.lambda_decay
+        try:
+            return max(now, last_accessed + timedelta(days=hold_days))
+        except OverflowError:
+            return FOREVER
 
     def classify_tier(self, score: float) -> TierName:
-        if score >= settings.tier_active_threshold:
+        active, contextual, archived = self.tier_thresholds
+        if score >= active:
             return "Active"
-        elif score >= settings.tier_contextual_threshold:
+        elif score >= contextual:
             return "Contextual"
-        elif score >= settings.tier_archived_threshold:
+        elif score >= archived:
             return "Archived"
         else:
             return "Dormant"
 
+    def classify_tiers(self, scores: np.ndarray) -> np.ndarray:
+        """classify_tier over an array of scores; returns indexes into TIERS."""
+        thresholds = np.array(self.tier_thresholds[::-1])
+        return (len(TIERS) - 1) - np.searchsorted(thresholds, scores, side="right")
+
     def tier_color(self, tier: str) -> str:
         return TIER_COLORS.get(tier, "#888888")
 
@@ -87,6 +299,10 @@ class CognitionEngine:
         r = self.recency_score(last_accessed)
         a = self.access_score(access_count)
         total = self.compute_score(semantic, last_accessed, access_count)
+        return self.components(semantic, r, a, total)
+
+    def components(self, semantic: float, r: float, a: float, total: float) -> dict:
+        """Breakdown dict from already computed factors (e.g. a rerank row)."""
         return {
             "total": round(total, 4),
             "semantic": round(semantic, 4),
@@ -98,4 +314,17 @@ class CognitionEngine:
         }
 
 
+def lifecycle_values(state: dict[str, np.ndarray], rows=slice(None)) -> dict[str, list]:
+    """
+    Selected rows of a lifecycle_batch result as column values to store:
+    floats and datetimes, None where the last access was missing.
+    """
+    values = {
+        "activation": [None if math.isnan(v) else v for v in state["activation"][rows].tolist()]
+    }
+    for name in UNTIL_COLUMNS:
+        values[name] = [from_epoch_seconds(v) for v in state[name][rows].tolist()]
+    return values
+
+
 cognition_engine = CognitionEngine()
@@ -0,0 +1,144 @@
+import zlib
+import logging
+from typing import Iterator
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+from app.models.document_content import DocumentContent
+
+logger = logging.getLogger(__name__)
+
+# Characters per compressed frame; a span read decompresses only the frames it touches
+FRAME_CHARS = 64 * 1024
+COMPRESSION_LEVEL = 6
+
+
+def compress_frame(text: str) -> bytes:
+    return zlib.compress(text.encode("utf-8"), COMPRESSION_LEVEL)
+
+
+def iter_frames(text: str) -> Iterator[bytes]:
+    for i in range(0, len(text), FRAME_CHARS):
+        yield compress_frame(text[i:i + FRAME_CHARS])
+
+
+class ContentWriter:
+    """
+    Appends text to a document's content as it is extracted. Each frame is
+    compressed and added to the session once full, so at most one frame of
+    text is held; close() stores the remainder and returns the total length.
+    """
+
+    def __init__(self, db: Session, doc_id: str):
+        self._db = db
+        self._doc_id = doc_id
+        self._buffer = ""
+        self._frames = 0
+        self.length = 0
+
+    def write(self, text: str):
+        self.length += len(text)
+        if len(self._buffer) + len(text) < FRAME_CHARS:
+            self._buffer += text
+            return
+        start = FRAME_CHARS - len(self._buffer)
+        self._store(self._buffer + text[:start])
+        while start + FRAME_CHARS <= len(text):
+            self._store(text[start:start + FRAME_CHARS])
+            start += FRAME_CHARS
+        self._buffer = text[start:]
+
+    def close(self) -> int:
+        if self._buffer:
+            self._store(self._buffer)
+            self._buffer = ""
+        return self.length
+
+    def _store(self, text: str):
+        self._db.add(DocumentContent(doc_id=self._doc_id, frame=self._frames, data=compress_frame(text)))
+        self._frames += 1
+
+
+class ContentStore:
+    """
+    Extracted document text, kept out of the documents table as fixed-size
+    zlib frames so row scans stay small and reads decompress only what a
+    snippet or preview needs.
+    """
+
+    def put(self, db: Session, doc_id: str, text: str) -> int:
+        """Store (or replace) a document's text. Returns its length in characters."""
+        writer = self.writer(db, doc_id)
+        writer.write(text)
+        return writer.close()
+
+    def writer(self, db: Session, doc_id: str) -> ContentWriter:
+        """Replace a document's text with one written incrementally."""
+        self.delete(db, doc_id)
+        return ContentWriter(db, doc_id)
+
+    def copy(self, db: Session, src_id: str, dst_id: str):
+        """Give `dst_id` the same text as `src_id` without recompressing it."""
+        db.flush()
+        frames = db.query(DocumentContent.frame, DocumentContent.data).filter(
+            DocumentContent.doc_id == src_id
+        )
+        db.add_all(DocumentContent(doc_id=dst_id, frame=n, data=data) for n, data in frames)
+
+    def get(self, db: Session, doc_id: str) -> str:
+        """A document's full text."""
+        frames = (
+            db.query(DocumentContent.data)
+            .filter(DocumentContent.doc_id == doc_id)
+            .order_by(DocumentContent.frame)
+        )
+        return "".join(zlib.decompress(data).decode("utf-8") for (data,) in frames)
+
+    def read_spans(
+        self, db: Session, spans: dict[object, tuple[str, int, int]]
+    ) -> dict[object, str]:
+        """
+        Text of several (doc_id, start, end) character spans, keyed like `spans`.
+        Only the frames covering the spans are fetched, in a single query.
+        """
+        wanted: dict[str, set[int]] = {}
+        for doc_id, start, end in spans.values():
+            if end > start:
+                wanted.setdefault(doc_id, set()).update(
+                    range(start // FRAME_CHARS, (end - 1) // FRAME_CHARS + 1)
+                )
+        if not wanted:
+            return {key: "" for key in spans}
+
+        rows = db.query(
+            DocumentContent.doc_id, DocumentContent.frame, DocumentContent.data
+        ).filter(or_(*(
+            and_(DocumentContent.doc_id == doc_id, DocumentContent.frame.in_(numbers))
+            for doc_id, numbers in wanted.items()
+        )))
+        frames: dict[tuple[str, int], str] = {
+            (doc_id, n): zlib.decompress(data).decode("utf-8") for doc_id, n, data in rows
+        }
+
+        texts: dict[object, str] = {}
+        for key, (doc_id, start, end) in spans.items():
+            first = start // FRAME_CHARS
+            parts = [
+                frames.get((doc_id, n), "")
+                for n in range(first, max(first, (end - 1) // FRAME_CHARS) + 1)
+            ]
+            offset = start - first * FRAME_CHARS
+            texts[key] = "".join(parts)[offset:offset + max(0, end - start)]
+        return texts
+
+    def read(self, db: Session, doc_id: str, start: int, end: int) -> str:
+        return self.read_spans(db, {doc_id: (doc_id, start, end)})[doc_id]
+
+    def delete(self, db: Session, doc_id: str):
+        db.query(DocumentContent).filter(DocumentContent.doc_id == doc_id).delete(
+            synchronize_session=False
+        )
+
+
+content_store = ContentStore()
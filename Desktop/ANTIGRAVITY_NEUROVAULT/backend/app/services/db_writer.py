@@ -0,0 +1,78 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar
+
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.config import settings
+from app.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+# A write receives its own session; the writer commits after it returns
+WriteFn = Callable[[Session], T]
+
+
+class DbWriter:
+    """
+    Serializes request-path writes (job submissions, deletes, buffered
+    access, score and lifecycle updates). SQLite allows one write
+    transaction at a time, so these are funnelled through a single thread
+    and queue in-process instead of colliding on the database lock; with
+    WAL, readers never wait on them. Background ingestion jobs commit on
+    their own sessions and rely on the busy timeout. With DB_SINGLE_WRITER off (e.g. on Postgres) writes
+    run concurrently on a pool the size of the connection pool.
+    """
+
+    def __init__(
+        self,
+        session_factory: Optional[sessionmaker] = None,
+        single_writer: Optional[bool] = None,
+    ):
+        self._session_factory = session_factory or SessionLocal
+        self._single = settings.db_single_writer if single_writer is None else single_writer
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=1 if self._single else settings.db_pool_size,
+                    thread_name_prefix="db-writer",
+                )
+            return self._executor
+
+    def submit(self, fn: WriteFn) -> Future:
+        """Queue a write; the returned future resolves once it is committed."""
+        return self._get_executor().submit(self._run, fn)
+
+    async def run(self, fn: WriteFn) -> T:
+        """Queue a write and wait for its commit without blocking the event loop."""
+        return await asyncio.wrap_future(self.submit(fn))
+
+    def _run(self, fn: WriteFn) -> T:
+        db = self._session_factory()
+        try:
+            result = fn(db)
+            db.commit()
+            return result
+        except Exception:
+            db.rollback()
+            logger.exception("Queued database write failed")
+            raise
+        finally:
+            db.close()
+
+    def shutdown(self):
+        """Drain queued writes and stop the writer."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+db_writer = DbWriter()
@@ -1,5 +1,5 @@
 import numpy as np
-from typing import Optional
+from typing import Iterable, Iterator, Optional
 import logging
 
 logger = logging.getLogger(__name__)
@@ -32,6 +32,19 @@ class EmbeddingService:
         vecs = self._model.encode(texts, normalize_embeddings=True, show_progress_bar=False)
         return vecs.astype(np.float32)
 
+    def encode_batches(
+        self, texts: Iterable[str], batch_size: int = 64
+    ) -> Iterator[tuple[list[str], np.ndarray]]:
+        """Encode a stream of texts in fixed-size batches, yielding (texts, vectors)."""
+        batch: list[str] = []
+        for text in texts:
+            batch.append(text)
+            if len(batch) >= batch_size:
+                yield batch, self.encode(batch)
+                batch = []
+        if batch:
+            yield batch, self.encode(batch)
+
     def encode_single(self, text: str) -> np.ndarray:
         """Encode a single text, return shape (384,)."""
         return self.encode([text])[0]
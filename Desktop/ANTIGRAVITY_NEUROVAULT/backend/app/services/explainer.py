@@ -1,9 +1,10 @@
 from datetime import datetime
+from typing import Optional
 from app.services.cognition import cognition_engine
 
 
-def _days_since(dt: datetime) -> float:
-    return max(0.0, (datetime.utcnow() - dt).total_seconds() / 86400.0)
+def _days_since(dt: datetime, now: Optional[datetime] = None) -> float:
+    return max(0.0, ((now or datetime.utcnow()) - dt).total_seconds() / 86400.0)
 
 
 def _recency_label(days: float) -> str:
@@ -47,12 +48,16 @@ class ExplainerService:
         access_count: int,
         created_at: datetime,
         tier: str,
+        components: Optional[dict] = None,
+        now: Optional[datetime] = None,
     ) -> dict:
-        components = cognition_engine.score_components(
-            semantic_similarity, last_accessed, access_count
-        )
-        days = _days_since(last_accessed)
-        days_since_created = _days_since(created_at)
+        """`components` and `now` let a batch re-rank reuse what it already computed."""
+        if components is None:
+            components = cognition_engine.score_components(
+                semantic_similarity, last_accessed, access_count
+            )
+        days = _days_since(last_accessed, now)
+        days_since_created = _days_since(created_at, now)
 
         semantic_pct = int(round(semantic_similarity * 100))
         recency_lbl = _recency_label(days)
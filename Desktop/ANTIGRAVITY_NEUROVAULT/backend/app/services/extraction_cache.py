@@ -0,0 +1,124 @@
+import os
+import gzip
+import json
+import uuid
+import logging
+import threading
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ExtractionCache:
+    """
+    On-disk cache of extracted text keyed by the SHA-256 of the source file.
+
+    Entries are gzip-compressed JSON lines (one extracted section per line),
+    written as extraction streams and read back lazily. When the cache grows
+    past its size budget the least recently used entries are evicted.
+    """
+
+    def __init__(self):
+        self._root: Optional[Path] = None
+        self._max_bytes = settings.extraction_cache_max_mb * 1024 * 1024
+        self._total_bytes: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def init(self, root: Path):
+        self._root = root
+        root.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def enabled(self) -> bool:
+        return self._root is not None and self._max_bytes > 0
+
+    def iter_cached(
+        self, digest: str, file_type: str, extract: Callable[[], Iterator[str]]
+    ) -> Iterator[str]:
+        """
+        Yield cached sections for a file, or run `extract` and cache its output.
+        Nothing is cached when `extract` raises, even after yielding sections.
+        """
+        if not self.enabled:
+            yield from extract()
+            return
+
+        path = self._entry_path(digest, file_type)
+        try:
+            fh = gzip.open(path, "rt", encoding="utf-8")
+        except FileNotFoundError:
+            fh = None
+        if fh is not None:
+            os.utime(path)  # mark as recently used
+            with fh:
+                for line in fh:
+                    yield json.loads(line)
+            return
+
+        yield from self._extract_and_store(path, extract)
+
+    def _extract_and_store(
+        self, path: Path, extract: Callable[[], Iterator[str]]
+    ) -> Iterator[str]:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+        sections = 0
+        complete = False
+        try:
+            with gzip.open(tmp, "wt", encoding="utf-8") as out:
+                for section in extract():
+                    out.write(json.dumps(section) + "\n")
+                    sections += 1
+                    yield section
+            complete = True
+        finally:
+            # Only keep entries for extractions that ran to completion and produced text
+            if complete and sections:
+                os.replace(tmp, path)
+                self._account(path.stat().st_size)
+            else:
+                tmp.unlink(missing_ok=True)
+
+    def _entry_path(self, digest: str, file_type: str) -> Path:
+        kind = file_type.lower().replace("/", "_").replace("\\", "_")
+        return self._root / digest[:2] / f"{digest}.{kind}.jsonl.gz"
+
+    def _account(self, added: int):
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = sum(size for _, size, _ in self._entries())
+            else:
+                self._total_bytes += added
+            if self._total_bytes > self._max_bytes:
+                self._evict()
+
+    def _entries(self) -> list[tuple[Path, int, float]]:
+        entries = []
+        for path in self._root.glob("*/*.jsonl.gz"):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((path, st.st_size, st.st_mtime))
+        return entries
+
+    def _evict(self):
+        """Drop least recently used entries until the cache is at 90% of its budget."""
+        entries = sorted(self._entries(), key=lambda e: e[2])
+        total = sum(size for _, size, _ in entries)
+        target = int(self._max_bytes * 0.9)
+        evicted = 0
+        for path, size, _ in entries:
+            if total <= target:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            evicted += 1
+        self._total_bytes = total
+        logger.info(f"Extraction cache evicted {evicted} entries ({total} bytes kept)")
+
+
+extraction_cache = ExtractionCache()
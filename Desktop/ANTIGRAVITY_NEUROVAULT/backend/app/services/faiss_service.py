@@ -1,4 +1,5 @@
 import os
+import threading
 import numpy as np
 import faiss
 import logging
@@ -12,8 +13,10 @@ DIMENSION = 384
 
 class FaissService:
     """
-    Manages per-user FAISS IVF indexes for cosine similarity search.
+    Manages per-user FAISS indexes for cosine similarity search.
     Vectors are L2-normalized so inner product == cosine similarity.
+    Indexes carry explicit IDs (IndexIDMap2) so chunks can be removed;
+    the chunks table maps those IDs back to documents.
     """
 
     _instance: Optional["FaissService"] = None
@@ -26,85 +29,144 @@ class FaissService:
 
     def __init__(self):
         if not self._initialized:
-            self._indexes: dict[str, faiss.IndexFlatIP] = {}
-            self._id_maps: dict[str, dict[int, str]] = {}
+            self._indexes: dict[str, faiss.IndexIDMap2] = {}
             self._counters: dict[str, int] = {}
             self._index_dir: Optional[Path] = None
+            # Ingestion appends while searches run on other threads
+            self._lock = threading.RLock()
             self._initialized = True
 
     def init(self, index_dir: Path):
         self._index_dir = index_dir
         index_dir.mkdir(parents=True, exist_ok=True)
 
-    def _get_index(self, user_id: str) -> faiss.IndexFlatIP:
+    def _get_index(self, user_id: str) -> faiss.IndexIDMap2:
         """Get or create an inner-product (cosine) flat index for a user."""
-        if user_id not in self._indexes:
-            # Try loading from disk first
-            idx_path = self._index_path(user_id)
-            if idx_path.exists():
-                logger.info(f"Loading FAISS index for user {user_id}")
-                self._indexes[user_id] = faiss.read_index(str(idx_path))
-            else:
-                logger.info(f"Creating new FAISS index for user {user_id}")
-                self._indexes[user_id] = faiss.IndexFlatIP(DIMENSION)
-            self._id_maps.setdefault(user_id, {})
-            self._counters.setdefault(user_id, 0)
-        return self._indexes[user_id]
+        with self._lock:
+            if user_id not in self._indexes:
+                # Try loading from disk first
+                idx_path = self._index_path(user_id)
+                if idx_path.exists():
+                    logger.info(f"Loading FAISS index for user {user_id}")
+                    index = faiss.read_index(str(idx_path))
+                    if not isinstance(index, faiss.IndexIDMap2):
+                        index = self._with_ids(index)
+                else:
+                    logger.info(f"Creating new FAISS index for user {user_id}")
+                    index = faiss.IndexIDMap2(faiss.IndexFlatIP(DIMENSION))
+                self._indexes[user_id] = index
+                # Continue numbering after the highest stored ID
+                ids = faiss.vector_to_array(index.id_map)
+                self._counters[user_id] = int(ids.max()) + 1 if ids.size else 0
+            return self._indexes[user_id]
+
+    @staticmethod
+    def _with_ids(flat: faiss.Index) -> faiss.IndexIDMap2:
+        """Wrap a legacy flat index, keeping its implicit sequential IDs."""
+        index = faiss.IndexIDMap2(faiss.IndexFlatIP(flat.d))
+        if flat.ntotal:
+            index.add_with_ids(
+                flat.reconstruct_n(0, flat.ntotal),
+                np.arange(flat.ntotal, dtype=np.int64),
+            )
+        return index
 
     def _index_path(self, user_id: str) -> Path:
         safe = user_id.replace("/", "_").replace("\\", "_")
         return self._index_dir / f"index_{safe}.bin"
 
     def add_vectors(
-        self, user_id: str, doc_id: str, vectors: np.ndarray
+        self, user_id: str, vectors: np.ndarray, persist: bool = True
     ) -> list[int]:
-        """Add multiple chunk vectors for a document. Returns list of FAISS IDs."""
-        index = self._get_index(user_id)
-        start = self._counters.get(user_id, 0)
-        n = vectors.shape[0]
-        faiss_ids = list(range(start, start + n))
-        self._counters[user_id] = start + n
-
-        for fid in faiss_ids:
-            self._id_maps[user_id][fid] = doc_id
-
-        index.add(vectors)
-        self._save_index(user_id)
+        """
+        Add chunk vectors (of one or several documents). Returns their FAISS IDs.
+        Vectors are searchable immediately; pass persist=False when appending
+        in batches and call save() once at the end.
+        """
+        with self._lock:
+            index = self._get_index(user_id)
+            start = self._counters.get(user_id, 0)
+            n = vectors.shape[0]
+            faiss_ids = list(range(start, start + n))
+            self._counters[user_id] = start + n
+
+            index.add_with_ids(vectors, np.asarray(faiss_ids, dtype=np.int64))
+            if persist:
+                self._save_index(user_id)
         return faiss_ids
 
     def search(
         self, user_id: str, query_vec: np.ndarray, k: int = 10
-    ) -> list[dict]:
+    ) -> list[tuple[int, float]]:
         """
-        Search the index. Returns list of {doc_id, score} dicts.
-        Deduplicates by doc_id, keeping best score.
+        Search the index. Returns (faiss_id, score) hits, best first.
+        Oversamples since several hits may belong to the same document.
         """
-        index = self._get_index(user_id)
-        if index.ntotal == 0:
-            return []
-
-        k = min(k * 5, index.ntotal)  # oversample to account for duplicates
         query = query_vec.reshape(1, -1).astype(np.float32)
-        distances, ids = index.search(query, k)
-
-        id_map = self._id_maps.get(user_id, {})
-        seen: dict[str, float] = {}
-        for dist, fid in zip(distances[0], ids[0]):
-            if fid == -1:
-                continue
-            doc_id = id_map.get(int(fid))
-            if doc_id and (doc_id not in seen or dist > seen[doc_id]):
-                seen[doc_id] = float(dist)
-
-        results = [{"doc_id": d, "semantic_score": s} for d, s in seen.items()]
-        results.sort(key=lambda x: x["semantic_score"], reverse=True)
-        return results
-
-    def remove_document(self, user_id: str, faiss_ids: list[int]):
-        """Mark FAISS IDs as removed from the id_map (flat index cannot remove)."""
-        id_map = self._id_maps.get(user_id, {})
-        for fid in faiss_ids:
-            id_map.pop(fid, None)
+        with self._lock:
+            index = self._get_index(user_id)
+            if index.ntotal == 0:
+                return []
+            k = min(k * 5, index.ntotal)
+            distances, ids = index.search(query, k)
+        return [
+            (int(fid), float(dist))
+            for dist, fid in zip(distances[0], ids[0])
+            if fid != -1
+        ]
+
+    def similarities(
+        self, user_id: str, query_vec: np.ndarray, faiss_ids: list[int]
+    ) -> np.ndarray:
+        """
+        Inner product of the query with each stored vector (reconstructed by
+        ID, no search); NaN for IDs no longer in the index.
+        """
+        query = query_vec.reshape(-1).astype(np.float32)
+        scores = np.full(len(faiss_ids), np.nan)
+        with self._lock:
+            index = self._get_index(user_id)
+            for i, fid in enumerate(faiss_ids):
+                try:
+                    scores[i] = float(index.reconstruct(int(fid)) @ query)
+                except RuntimeError:  # removed since the hit was cached
+                    pass
+        return scores
+
+    def match(
+        self, user_id: str, vectors: np.ndarray, threshold: float
+    ) -> list[Optional[int]]:
+        """
+        FAISS ID of the nearest stored vector for each row, or None when
+        nothing in the user's index is at least `threshold` similar.
+        """
+        with self._lock:
+            index = self._get_index(user_id)
+            if index.ntotal == 0:
+                return [None] * vectors.shape[0]
+            distances, ids = index.search(vectors.astype(np.float32), 1)
+        return [
+            int(fid) if fid != -1 and dist >= threshold else None
+            for dist, fid in zip(distances[:, 0], ids[:, 0])
+        ]
+
+    def remove_vectors(
+        self, user_id: str, faiss_ids: list[int], persist: bool = True
+    ):
+        """Remove chunk vectors from the index."""
+        if not faiss_ids:
+            return
+        with self._lock:
+            index = self._get_index(user_id)
+            index.remove_ids(np.asarray(faiss_ids, dtype=np.int64))
+            if persist:
+                self._save_index(user_id)
+
+    def save(self, user_id: str):
+        """Persist a user's index to disk."""
+        with self._lock:
+            if user_id in self._indexes:
+                self._save_index(user_id)
 
     def _save_index(self, user_id: str):
         if self._index_dir:
@@ -0,0 +1,555 @@
+import time
+import hashlib
+import logging
+from collections import Counter, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.chunk import Chunk
+from app.models.document import Document
+from app.services.chunk_service import chunk_service
+from app.services.content_store import ContentWriter, content_store
+from app.services.embedding_service import embedding_service
+from app.services.faiss_service import faiss_service
+from app.services.parser_service import SECTION_SEPARATOR, parser_service
+from app.services.storage_service import StoredFile, storage_service
+from app.services.cognition import cognition_engine
+from app.services.workers import iter_ordered
+
+logger = logging.getLogger(__name__)
+
+
+def chunk_hash(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class IngestionService:
+    """
+    Streaming ingestion pipeline:
+    pages → chunks → fixed-size embedding batches → incremental FAISS appends.
+
+    Each batch is indexed and committed as soon as it is embedded, so the
+    first chunks of a long document are searchable before the last page
+    has been parsed, and only one batch of chunks/vectors (and one frame of
+    extracted text) is held at a time.
+
+    Duplicates are not indexed twice: a file whose SHA-256 matches a stored
+    document shares that document's chunks outright, a chunk whose text hash
+    matches a stored chunk links to it without being embedded, and a chunk
+    vector near-identical to one already in the user's index links to it.
+    """
+
+    def create_document(
+        self,
+        doc_id: str,
+        user_id: str,
+        filename: str,
+        file_type: str,
+        file_size: int,
+        description: Optional[str],
+    ) -> Document:
+        """Build a new, not yet indexed document with its initial lifecycle state."""
+        # Compute initial cognitive score (no query context)
+        now = datetime.utcnow()
+        initial_score = cognition_engine.compute_storage_score(now, 0)
+        return Document(
+            id=doc_id,
+            user_id=user_id,
+            filename=filename,
+            file_type=file_type,
+            chunk_count=0,
+            tier=cognition_engine.classify_tier(initial_score),
+            cognitive_score=initial_score,
+            semantic_score=0.0,
+            access_count=0,
+            last_accessed=now,
+            created_at=now,
+            file_size=file_size,
+            description=description,
+            **cognition_engine.lifecycle(now, 0),
+        )
+
+    def delete_document(self, db: Session, doc: Document, commit: bool = True):
+        """Remove a document, its chunks, its vectors and its stored files."""
+        self._release(db, doc, [c.faiss_id for c in chunk_service.for_document(db, doc.id)])
+        chunk_service.delete_for(db, doc.id)
+        content_store.delete(db, doc.id)
+        storage_service.remove(doc.user_id, doc.id)
+        db.delete(doc)
+        db.flush()
+        for dup in db.query(Document).filter(Document.duplicate_of == doc.id):
+            self._link_summary(db, dup)
+        if commit:
+            db.commit()
+
+    def ingest(
+        self, db: Session, doc: Document, path: Path, digest: Optional[str] = None
+    ) -> dict:
+        """
+        Parse, embed and index a spooled file into an already-committed document.
+        `digest` is the file's SHA-256, used to reuse cached extractions.
+        """
+        added: list[int] = []
+        try:
+            doc.content_hash = digest
+            original = self._find_originals(db, doc.user_id, [digest], exclude=doc.id).get(digest)
+            if original is not None:
+                result = self._link_exact(db, doc, original)
+                db.commit()
+                return result
+            return self._index_chunks(db, doc, path, digest, added, commit_batches=True)
+        except Exception:
+            logger.exception(f"Ingestion failed for {doc.filename} ({doc.id})")
+            faiss_service.remove_vectors(doc.user_id, added, persist=False)
+            db.rollback()
+            chunk_service.delete_for(db, doc.id)
+            content_store.delete(db, doc.id)
+            db.delete(doc)
+            db.commit()
+            raise
+        finally:
+            faiss_service.save(doc.user_id)
+
+    def reindex(
+        self, db: Session, doc: Document, path: Path, digest: Optional[str] = None
+    ) -> dict:
+        """
+        Re-index a document from a new version of its file. Chunks whose hash
+        matches a stored chunk keep their FAISS vector; only new chunks are
+        embedded and chunks that no longer occur are removed from the index.
+        The previous version stays searchable until the new one is committed.
+        """
+        added: list[int] = []
+        try:
+            doc.content_hash = digest
+            return self._index_chunks(db, doc, path, digest, added, commit_batches=False)
+        except Exception:
+            logger.exception(f"Re-index failed for {doc.filename} ({doc.id})")
+            faiss_service.remove_vectors(doc.user_id, added, persist=False)
+            db.rollback()
+            raise
+        finally:
+            faiss_service.save(doc.user_id)
+
+    def _index_chunks(
+        self,
+        db: Session,
+        doc: Document,
+        path: Path,
+        digest: Optional[str],
+        added: list[int],
+        commit_batches: bool,
+    ) -> dict:
+        # Stored chunks by hash; a hash may occur several times in one document
+        previous = chunk_service.for_document(db, doc.id)
+        reusable: dict[str, list[Chunk]] = defaultdict(list)
+        for chunk in previous:
+            reusable[chunk.text_hash].append(chunk)
+        # Vectors of the previous version; changed text must not link back to them
+        previous_own = {c.faiss_id for c in previous if not c.linked}
+        owned: set[int] = set()  # previous vectors that already have an owning row
+        kept: set[int] = set()  # vectors the new version uses
+        retained = 0  # previous chunks carried over unchanged
+        if previous:
+            # Replaced inside this transaction; other sessions see the old rows until commit
+            chunk_service.delete_for(db, doc.id)
+            # The rows are gone; new rows may be flushed under their primary keys
+            for chunk in previous:
+                db.expunge(chunk)
+
+        content = content_store.writer(db, doc.id)
+        unwritten: list[Chunk] = []  # new rows not yet added to the session
+        pending: deque[Chunk] = deque()  # rows still awaiting a vector
+        written = 0  # rows already flushed
+        empty_text = f"[No text extracted from {doc.filename}]"
+
+        def or_fallback(spans: Iterable[tuple[str, int, int]]) -> Iterator[tuple[str, int, int]]:
+            empty = True
+            for span in spans:
+                empty = False
+                yield span
+            if empty:
+                content.write(empty_text)
+                yield empty_text, 0, len(empty_text)
+
+        def new_chunks(spans: Iterable[tuple[str, int, int]]) -> Iterator[str]:
+            nonlocal retained
+            spans = iter(spans)
+            ordinal = 0
+            # Hashes are looked up one embedding batch at a time
+            while batch := list(islice(spans, settings.embedding_batch_size)):
+                hashes = [chunk_hash(text) for text, _, _ in batch]
+                found = self._find_hashes(db, doc, hashes)
+                for (text, start, end), h in zip(batch, hashes):
+                    row = Chunk(
+                        doc_id=doc.id, user_id=doc.user_id, ordinal=ordinal,
+                        char_start=start, char_end=end, text_hash=h,
+                    )
+                    ordinal += 1
+                    unwritten.append(row)
+                    if reusable.get(h):
+                        prev = reusable[h].pop()
+                        row.faiss_id, row.linked = prev.faiss_id, prev.linked
+                        # A vector kept from the previous version needs exactly one owning row
+                        if prev.faiss_id in previous_own:
+                            row.linked = prev.faiss_id in owned
+                            owned.add(prev.faiss_id)
+                        kept.add(prev.faiss_id)
+                        retained += 1
+                        continue
+                    if h in found:
+                        row.faiss_id, row.linked = found[h], True
+                        kept.add(row.faiss_id)
+                        continue
+                    pending.append(row)
+                    yield text
+
+        def write_ready():
+            """Flush rows up to the first one still awaiting a vector."""
+            nonlocal written
+            ready = pending[0].ordinal - written if pending else len(unwritten)
+            db.add_all(unwritten[:ready])
+            del unwritten[:ready]
+            written += ready
+            db.flush()
+
+        sections = self._collect(
+            parser_service.iter_pages(path, doc.file_type, digest), content
+        )
+        spans = or_fallback(parser_service.iter_chunk_spans(sections))
+        embedded = 0
+        for _, vectors in embedding_service.encode_batches(
+            new_chunks(spans), settings.embedding_batch_size
+        ):
+            embedded += vectors.shape[0]
+            placed = self._place(db, doc.user_id, vectors, added, exclude=previous_own)
+            for fid, fresh in zip(*placed):
+                row = pending.popleft()
+                row.faiss_id, row.linked = fid, not fresh
+                kept.add(fid)
+            write_ready()
+            if commit_batches:
+                doc.chunk_count = written
+                db.commit()
+        write_ready()
+
+        stale = [c.faiss_id for c in previous if c.faiss_id not in kept]
+        self._release(db, doc, stale, persist=False)
+
+        doc.content_length = content.close()
+        doc.chunk_count = written
+        dedup = self._link_summary(db, doc)
+        db.commit()
+        return {
+            "chunks_reused": written - embedded,
+            "chunks_embedded": embedded,
+            "chunks_removed": len(previous) - retained,
+            **dedup,
+        }
+
+    def ingest_batch(
+        self,
+        db: Session,
+        user_id: str,
+        files: list[tuple[StoredFile, str]],
+        description: Optional[str] = None,
+    ) -> dict:
+        """
+        Ingest many (stored file, file type) pairs as one unit: files are parsed
+        in parallel, chunks from consecutive documents share large embedding
+        batches, and the documents are committed in a single transaction with
+        one index checkpoint. Returns per-document and overall throughput.
+        """
+        t0 = time.perf_counter()
+        report: list[dict] = []
+        docs: list[Document] = []
+        rows: dict[str, list[Chunk]] = {}
+        pending: list[tuple[Chunk, str]] = []  # (row, chunk text) awaiting embedding
+        added: list[int] = []
+        linked = 0  # chunk rows that reuse a stored vector
+
+        def flush():
+            nonlocal linked
+            vectors = embedding_service.encode([text for _, text in pending])
+            for (row, _), fid, fresh in zip(pending, *self._place(db, user_id, vectors, added)):
+                row.faiss_id, row.linked = fid, not fresh
+                linked += not fresh
+            db.add_all(row for row, _ in pending)
+            db.flush()  # later batches may link to these chunks
+            pending.clear()
+
+        # With dedup enabled, exact duplicates (of stored documents or of an
+        # earlier file in this batch) are not parsed; they share the original's chunks.
+        originals = self._find_originals(db, user_id, [f.digest for f, _ in files])
+        first: dict[str, str] = {}  # digest → doc_id of its first file in the batch
+        if settings.dedup_enabled:
+            for stored, _ in files:
+                if stored.digest not in originals:
+                    first.setdefault(stored.digest, stored.doc_id)
+
+        def is_copy(f: StoredFile) -> bool:
+            return f.digest in originals or first.get(f.digest, f.doc_id) != f.doc_id
+
+        to_parse = [(f.path, ft, f.digest) for f, ft in files if not is_copy(f)]
+        copies: dict[str, str] = {}  # doc_id → doc_id of the batch file it duplicates
+        by_id: dict[str, Document] = {}
+
+        workers = max(1, settings.bulk_parse_workers)
+        try:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bulk-parse") as pool:
+                parsed = iter_ordered(pool, self._parse, iter(to_parse), workers * 2)
+                for stored, file_type in files:
+                    entry = {"filename": stored.filename, "document_id": stored.doc_id}
+                    doc = self.create_document(
+                        stored.doc_id, user_id, stored.filename, file_type,
+                        stored.size, description,
+                    )
+                    doc.content_hash = stored.digest
+
+                    original = originals.get(stored.digest)
+                    source = by_id.get(first.get(stored.digest))
+                    if is_copy(stored):
+                        if original is None and source is None:
+                            report.append({
+                                **entry, "status": "failed",
+                                "error": "Duplicate of a file that failed to parse",
+                            })
+                            storage_service.remove(user_id, stored.doc_id)
+                            continue
+                        if original is not None:
+                            result = self._link_exact(db, doc, original)
+                            linked += doc.chunk_count
+                        else:
+                            content_store.copy(db, source.id, doc.id)
+                            doc.content_length = source.content_length
+                            copies[doc.id] = source.id
+                            result = {"dedup_action": "exact_duplicate"}
+                        db.add(doc)
+                        docs.append(doc)
+                        report.append({
+                            **entry, "status": "indexed", "parse_ms": 0.0, **result,
+                        })
+                        continue
+
+                    try:
+                        pages, parse_s = next(parsed).result()
+                    except Exception as e:
+                        logger.warning(f"Bulk parse failed for {stored.filename}: {e}")
+                        storage_service.remove(user_id, stored.doc_id)
+                        report.append({**entry, "status": "failed", "error": str(e)})
+                        continue
+
+                    empty_text = f"[No text extracted from {stored.filename}]"
+                    text = SECTION_SEPARATOR.join(pages) if pages else empty_text
+                    doc.content_length = content_store.put(db, doc.id, text)
+                    spans = list(parser_service.iter_chunk_spans(pages)) or [
+                        (empty_text, 0, len(empty_text))
+                    ]
+                    doc.chunk_count = len(spans)
+                    db.add(doc)
+                    docs.append(doc)
+                    by_id[doc.id] = doc
+                    rows[doc.id] = []
+                    report.append({
+                        **entry,
+                        "status": "indexed",
+                        "chunks": len(spans),
+                        "parse_ms": round(parse_s * 1000, 1),
+                    })
+
+                    hashes = [chunk_hash(text) for text, _, _ in spans]
+                    found = self._find_hashes(db, doc, hashes)
+                    for ordinal, ((text, start, end), h) in enumerate(zip(spans, hashes)):
+                        row = Chunk(
+                            doc_id=doc.id, user_id=user_id, ordinal=ordinal,
+                            char_start=start, char_end=end, text_hash=h,
+                        )
+                        rows[doc.id].append(row)
+                        if h in found:
+                            row.faiss_id, row.linked = found[h], True
+                            linked += 1
+                            db.add(row)
+                            continue
+                        pending.append((row, text))
+                        if len(pending) >= settings.bulk_embedding_batch_size:
+                            flush()
+            if pending:
+                flush()
+
+            entries = {e["document_id"]: e for e in report if e["status"] == "indexed"}
+            for doc in docs:
+                if doc.id in copies:
+                    source = by_id[copies[doc.id]]
+                    self._copy_chunks(db, doc, rows[source.id])
+                    linked += doc.chunk_count
+                    doc.duplicate_of = source.duplicate_of or source.id
+                    entries[doc.id].update(
+                        duplicate_of=doc.duplicate_of, chunks_linked=doc.chunk_count
+                    )
+                elif doc.id in by_id:
+                    entries[doc.id].update(self._link_summary(db, doc))
+            db.commit()
+        except Exception:
+            logger.exception(f"Bulk ingestion failed for user {user_id}")
+            faiss_service.remove_vectors(user_id, added, persist=False)
+            db.rollback()
+            for stored, _ in files:
+                storage_service.remove(user_id, stored.doc_id)
+            raise
+        finally:
+            faiss_service.save(user_id)
+
+        elapsed = time.perf_counter() - t0
+        succeeded = len(docs)
+        return {
+            "documents": report,
+            "succeeded": succeeded,
+            "failed": len(report) - succeeded,
+            "chunks": len(added),
+            "chunks_linked": linked,
+            "elapsed_s": round(elapsed, 3),
+            "docs_per_sec": round(succeeded / elapsed, 2) if elapsed else 0.0,
+            "chunks_per_sec": round(len(added) / elapsed, 2) if elapsed else 0.0,
+        }
+
+    @staticmethod
+    def _find_originals(
+        db: Session, user_id: str, digests: list[Optional[str]], exclude: Optional[str] = None
+    ) -> dict[str, Document]:
+        """Fully indexed documents of the user whose file hash is in `digests`."""
+        digests = [d for d in set(digests) if d]
+        if not settings.dedup_enabled or not digests:
+            return {}
+        query = db.query(Document).filter(
+            Document.user_id == user_id,
+            Document.content_hash.in_(digests),
+            Document.content_length.isnot(None),  # set once indexing has finished
+        )
+        if exclude:
+            query = query.filter(Document.id != exclude)
+        originals: dict[str, Document] = {}
+        for doc in query.order_by(Document.created_at):
+            originals.setdefault(doc.content_hash, doc)
+        return originals
+
+    @staticmethod
+    def _find_hashes(db: Session, doc: Document, text_hashes: list[str]) -> dict[str, int]:
+        if not settings.dedup_enabled:
+            return {}
+        return chunk_service.find_hashes(db, doc.user_id, text_hashes, exclude_doc=doc.id)
+
+    def _link_exact(self, db: Session, doc: Document, original: Document) -> dict:
+        """Share an identical stored document's chunks instead of indexing the file."""
+        content_store.copy(db, original.id, doc.id)
+        doc.content_length = original.content_length
+        self._copy_chunks(db, doc, chunk_service.for_document(db, original.id))
+        doc.duplicate_of = original.duplicate_of or original.id
+        logger.info(f"{doc.filename} is an exact duplicate of {original.filename} ({original.id})")
+        return {
+            "dedup_action": "exact_duplicate",
+            "duplicate_of": doc.duplicate_of,
+            "chunks_linked": doc.chunk_count,
+            "chunks_embedded": 0,
+        }
+
+    @staticmethod
+    def _copy_chunks(db: Session, doc: Document, chunks: list[Chunk]):
+        db.add_all(
+            Chunk(
+                doc_id=doc.id, user_id=doc.user_id, ordinal=c.ordinal,
+                faiss_id=c.faiss_id, char_start=c.char_start, char_end=c.char_end,
+                text_hash=c.text_hash, linked=True,
+            )
+            for c in chunks
+        )
+        doc.chunk_count = len(chunks)
+
+    @staticmethod
+    def _place(
+        db: Session, user_id: str, vectors, added: list[int], exclude: frozenset = frozenset()
+    ) -> tuple[list[int], list[bool]]:
+        """
+        Link each vector to a near-identical stored chunk when one exists, or
+        add it to the index. Returns a FAISS ID per vector and whether it is new.
+        Vectors in `exclude` (a re-indexed document's previous chunks) are never
+        linked to.
+        """
+        n = vectors.shape[0]
+        matches: list[Optional[int]] = [None] * n
+        if settings.dedup_enabled:
+            matches = faiss_service.match(user_id, vectors, settings.dedup_similarity_threshold)
+            candidates = [m for m in matches if m is not None and m not in exclude]
+            owners = chunk_service.owners(db, user_id, candidates)
+            matches = [m if m in owners and m not in exclude else None for m in matches]
+        fresh = [i for i, m in enumerate(matches) if m is None]
+        new_ids = iter(faiss_service.add_vectors(user_id, vectors[fresh], persist=False) if fresh else [])
+        ids = [next(new_ids) if m is None else m for m in matches]
+        added.extend(ids[i] for i in fresh)
+        return ids, [m is None for m in matches]
+
+    @staticmethod
+    def _link_summary(db: Session, doc: Document) -> dict:
+        """Set `duplicate_of` from the chunks a document links to and report it."""
+        db.flush()
+        linked = [
+            fid for (fid,) in db.query(Chunk.faiss_id).filter(
+                Chunk.doc_id == doc.id, Chunk.linked.is_(True)
+            )
+        ]
+        owners = chunk_service.owners(db, doc.user_id, linked)
+        foreign = Counter(owners[fid] for fid in linked if owners.get(fid, doc.id) != doc.id)
+        count = sum(foreign.values())
+        doc.duplicate_of = foreign.most_common(1)[0][0] if count else None
+        if not count:
+            action = "none"
+        elif count == doc.chunk_count:
+            action = "near_duplicate"
+        else:
+            action = "partial_duplicate"
+        return {"dedup_action": action, "duplicate_of": doc.duplicate_of, "chunks_linked": count}
+
+    def _release(self, db: Session, doc: Document, fids: list[int], persist: bool = True):
+        """
+        Drop chunk vectors a document no longer uses. Vectors owned by another
+        document are left alone; owned vectors that other documents link to are
+        handed to one of them instead of being removed.
+        """
+        if not fids:
+            return
+        owners = chunk_service.owners(db, doc.user_id, fids)
+        own = [fid for fid in set(fids) if owners.get(fid, doc.id) == doc.id]
+        heirs: dict[int, Chunk] = {}
+        for chunk in chunk_service.linking(db, doc.user_id, own, exclude_doc=doc.id):
+            heirs.setdefault(chunk.faiss_id, chunk)
+        for chunk in heirs.values():
+            chunk.linked = False
+        if heirs:
+            db.flush()
+            heir_ids = {c.doc_id for c in heirs.values()}
+            for heir in db.query(Document).filter(Document.id.in_(heir_ids)):
+                self._link_summary(db, heir)
+        faiss_service.remove_vectors(
+            doc.user_id, [fid for fid in own if fid not in heirs], persist
+        )
+
+    @staticmethod
+    def _parse(path: Path, file_type: str, digest: Optional[str]) -> tuple[list[str], float]:
+        t0 = time.perf_counter()
+        pages = list(parser_service.iter_pages(path, file_type, digest))
+        return pages, time.perf_counter() - t0
+
+    @staticmethod
+    def _collect(sections: Iterable[str], content: ContentWriter) -> Iterator[str]:
+        """Pass sections through while appending them to the stored document text."""
+        for n, section in enumerate(sections):
+            content.write(section if n == 0 else SECTION_SEPARATOR + section)
+            yield section
+
+
+ingestion_service = IngestionService()
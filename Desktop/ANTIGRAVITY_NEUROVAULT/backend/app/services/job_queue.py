@@ -0,0 +1,119 @@
+import uuid
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Optional
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.ingest_job import IngestJob
+
+logger = logging.getLogger(__name__)
+
+# A job body receives its own session and returns a JSON-serializable result
+JobFn = Callable[[Session], dict]
+
+
+class JobQueue:
+    """
+    Runs ingestion work off the request path. Jobs are persisted in the
+    ingest_jobs table so their status can be polled, and executed by a
+    fixed-size thread pool (parsing and OCR fan out further into their own
+    process pools).
+    """
+
+    def __init__(self):
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def start(self):
+        self._fail_interrupted()
+        self._get_executor()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=settings.ingest_workers, thread_name_prefix="ingest"
+            )
+        return self._executor
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def submit(
+        self,
+        db: Session,
+        kind: str,
+        user_id: str,
+        fn: JobFn,
+        document_id: Optional[str] = None,
+        filename: Optional[str] = None,
+    ) -> IngestJob:
+        """Record a queued job and hand it to the worker pool."""
+        job = IngestJob(
+            id=str(uuid.uuid4()),
+            user_id=user_id,
+            kind=kind,
+            document_id=document_id,
+            filename=filename,
+            status="queued",
+            created_at=datetime.utcnow(),
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+
+        self._get_executor().submit(self._run, job.id, fn)
+        return job
+
+    def _run(self, job_id: str, fn: JobFn):
+        db = SessionLocal()
+        try:
+            self._update(db, job_id, status="running", started_at=datetime.utcnow())
+            try:
+                result = fn(db)
+            except Exception as e:
+                logger.exception(f"Job {job_id} failed")
+                db.rollback()
+                self._update(
+                    db, job_id, status="failed", error=str(e) or e.__class__.__name__,
+                    finished_at=datetime.utcnow(),
+                )
+                return
+            job = db.get(IngestJob, job_id)
+            job.status = "succeeded"
+            job.finished_at = datetime.utcnow()
+            job.set_result(result)
+            db.commit()
+        finally:
+            db.close()
+
+    @staticmethod
+    def _update(db: Session, job_id: str, **fields):
+        db.query(IngestJob).filter(IngestJob.id == job_id).update(fields)
+        db.commit()
+
+    def _fail_interrupted(self):
+        """Jobs left queued/running by a previous process will never finish."""
+        db = SessionLocal()
+        try:
+            n = (
+                db.query(IngestJob)
+                .filter(IngestJob.status.in_(["queued", "running"]))
+                .update(
+                    {"status": "failed", "error": "Interrupted by server restart",
+                     "finished_at": datetime.utcnow()},
+                    synchronize_session=False,
+                )
+            )
+            db.commit()
+            if n:
+                logger.warning(f"Marked {n} interrupted ingest jobs as failed")
+        finally:
+            db.close()
+
+
+job_queue = JobQueue()
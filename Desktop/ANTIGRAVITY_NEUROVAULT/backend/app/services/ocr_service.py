@@ -0,0 +1,121 @@
+import os
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterator, Optional
+
+from app.config import settings
+from app.services.workers import iter_ordered
+
+logger = logging.getLogger(__name__)
+
+
+class IncompleteOcr(Exception):
+    """Some frames of an image could not be recognized; the others were yielded."""
+
+
+def _otsu_threshold(histogram: list[int]) -> int:
+    """Grey level that best separates ink from background (Otsu's method)."""
+    total = sum(histogram)
+    sum_all = sum(i * h for i, h in enumerate(histogram))
+    sum_bg = 0
+    weight_bg = 0
+    best_t, best_var = 127, 0.0
+    for t, h in enumerate(histogram):
+        weight_bg += h
+        if weight_bg == 0:
+            continue
+        weight_fg = total - weight_bg
+        if weight_fg == 0:
+            break
+        sum_bg += t * h
+        mean_bg = sum_bg / weight_bg
+        mean_fg = (sum_all - sum_bg) / weight_fg
+        var = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+        if var > best_var:
+            best_t, best_var = t, var
+    return best_t
+
+
+def _preprocess(frame, max_dimension: int):
+    """Greyscale → downscale to max_dimension → binarize."""
+    from PIL import Image
+
+    page = frame.convert("L")
+    if max(page.size) > max_dimension:
+        page.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+    threshold = _otsu_threshold(page.histogram())
+    return page.point([255 if i > threshold else 0 for i in range(256)], mode="1")
+
+
+def _ocr_frame(path: str, frame: int, max_dimension: int, timeout: float) -> str:
+    """Process-pool worker: OCR a single frame of an image file."""
+    import pytesseract
+    from PIL import Image
+
+    with Image.open(path) as img:
+        img.seek(frame)
+        page = _preprocess(img, max_dimension)
+    return pytesseract.image_to_string(page, timeout=timeout)
+
+
+class OcrService:
+    """
+    Runs Tesseract in a bounded process pool. Multi-page images (TIFF) are
+    split into frames that are preprocessed and recognized in parallel, each
+    with its own timeout, and yielded back in page order. Frames that fail
+    or time out are skipped, and IncompleteOcr is raised after the rest.
+    """
+
+    def __init__(self):
+        self._pool: Optional[ProcessPoolExecutor] = None
+        # Images from concurrent uploads may request the pool at the same time
+        self._pool_lock = threading.Lock()
+        self._workers = settings.ocr_workers or max(1, (os.cpu_count() or 2) // 2)
+
+    def iter_frames(self, path: Path) -> Iterator[str]:
+        from PIL import Image
+
+        with Image.open(path) as img:
+            frame_count = getattr(img, "n_frames", 1)
+
+        failed = 0
+        # pytesseract kills Tesseract and raises once a page exceeds its timeout
+        tasks = (
+            (str(path), i, settings.ocr_max_dimension, settings.ocr_page_timeout_s)
+            for i in range(frame_count)
+        )
+        for frame, fut in enumerate(
+            iter_ordered(self._get_pool(), _ocr_frame, tasks, self._workers * 2)
+        ):
+            try:
+                text = fut.result()
+            except Exception as e:
+                logger.warning(f"OCR failed on {path.name} frame {frame}: {e}")
+                failed += 1
+                continue
+            if text.strip():
+                yield text.strip()
+        if failed:
+            raise IncompleteOcr(f"{failed} of {frame_count} frames of {path.name} were not recognized")
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self._workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._pool
+
+    def shutdown(self):
+        """Stop worker processes."""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(cancel_futures=True)
+                self._pool = None
+
+
+ocr_service = OcrService()
@@ -1,66 +1,189 @@
-import io
+import os
+import re
 import logging
-from typing import Optional
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from app.config import settings
+from app.services.extraction_cache import extraction_cache
+from app.services.ocr_service import ocr_service
+from app.services.workers import iter_ordered
 
 logger = logging.getLogger(__name__)
 
 CHUNK_SIZE = 512
 CHUNK_OVERLAP = 64
 
+# Stored document text is the extracted sections joined by this separator
+SECTION_SEPARATOR = "\n\n"
+WORD_RE = re.compile(r"\S+")
+# A line holding only whitespace ends a paragraph
+BLANK_LINE_RE = re.compile(r"\n[^\S\n]*\n")
+
+# Upper bound on a single text section, so one huge paragraph can't be materialized whole
+MAX_SECTION_CHARS = 64 * 1024
+
+
+def _iter_pdf_pages(path: str, start: int, stop: int) -> Iterator[str]:
+    import PyPDF2
+
+    # Pass an open handle: given a path, PdfReader reads the whole file into memory
+    with open(path, "rb") as fh:
+        reader = PyPDF2.PdfReader(fh)
+        for i in range(start, stop):
+            text = reader.pages[i].extract_text()
+            yield text.strip() if text else ""
+
+
+def _extract_pdf_pages(path: str, start: int, stop: int) -> list[str]:
+    """Process-pool worker: extract the text of pages [start, stop) of a PDF."""
+    return list(_iter_pdf_pages(path, start, stop))
+
 
 class ParserService:
     """Extracts text from PDF, DOCX, TXT and image files."""
 
-    def extract_text(self, file_bytes: bytes, file_type: str) -> str:
-        """Dispatch to the correct extractor based on MIME / extension."""
-        ft = file_type.lower()
+    def __init__(self):
+        self._pdf_pool: Optional[ProcessPoolExecutor] = None
+        # Parsing runs on several threads (uploads, bulk ingestion, sync)
+        self._pdf_pool_lock = threading.Lock()
+        self._pdf_workers = settings.pdf_parse_workers or os.cpu_count() or 1
+
+    def extract_text(
+        self, path: Path, file_type: str, digest: Optional[str] = None
+    ) -> str:
+        """Extract the full text of a file (pages joined by blank lines)."""
+        return "\n\n".join(self.iter_pages(path, file_type, digest))
+
+    def iter_pages(
+        self, path: Path, file_type: str, digest: Optional[str] = None
+    ) -> Iterator[str]:
+        """
+        Yield the text of a file section by section (PDF pages, DOCX
+        paragraphs, text paragraphs, OCR'd images) without materializing
+        the whole document. When the file's SHA-256 `digest` is given, the
+        extraction cache is consulted first.
+
+        A failing extraction ends the document with the text extracted so
+        far; it is logged rather than raised, and never cached.
+        """
+        if digest:
+            sections = extraction_cache.iter_cached(
+                digest, file_type, lambda: self._iter_extracted(path, file_type)
+            )
+        else:
+            sections = self._iter_extracted(path, file_type)
+        return self._until_failure(sections, file_type)
+
+    @staticmethod
+    def _until_failure(sections: Iterator[str], file_type: str) -> Iterator[str]:
         try:
-            if ft in ("application/pdf", "pdf"):
-                return self._extract_pdf(file_bytes)
-            elif ft in (
-                "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-                "docx",
-            ):
-                return self._extract_docx(file_bytes)
-            elif ft in ("text/plain", "txt", "md", "csv"):
-                return file_bytes.decode("utf-8", errors="replace")
-            elif ft.startswith("image/") or ft in ("png", "jpg", "jpeg", "tiff", "bmp"):
-                return self._extract_image(file_bytes)
-            else:
-                # Attempt UTF-8 decode as fallback
-                return file_bytes.decode("utf-8", errors="replace")
+            yield from sections
         except Exception as e:
-            logger.warning(f"Text extraction failed ({ft}): {e}")
-            return ""
+            logger.warning(f"Text extraction failed ({file_type.lower()}): {e}")
 
-    def _extract_pdf(self, data: bytes) -> str:
+    def _iter_extracted(self, path: Path, file_type: str) -> Iterator[str]:
+        """Extract a file's sections; raises if any part of the file could not be read."""
+        ft = file_type.lower()
+        if ft in ("application/pdf", "pdf"):
+            yield from self._iter_pdf(path)
+        elif ft in (
+            "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+            "docx",
+        ):
+            yield from self._iter_docx(path)
+        elif ft in ("text/plain", "txt", "md", "csv"):
+            yield from self._iter_text(path)
+        elif ft.startswith("image/") or ft in ("png", "jpg", "jpeg", "tiff", "bmp"):
+            yield from ocr_service.iter_frames(path)
+        else:
+            # Attempt UTF-8 decode as fallback
+            yield from self._iter_text(path)
+
+    def _iter_pdf(self, path: Path) -> Iterator[str]:
         import PyPDF2
 
-        reader = PyPDF2.PdfReader(io.BytesIO(data))
-        pages = []
-        for page in reader.pages:
-            text = page.extract_text()
+        with open(path, "rb") as fh:
+            page_count = len(PyPDF2.PdfReader(fh).pages)
+
+        if self._pdf_workers <= 1 or page_count < settings.pdf_parallel_min_pages:
+            texts = _iter_pdf_pages(str(path), 0, page_count)
+        else:
+            texts = self._iter_pdf_parallel(path, page_count)
+        for text in texts:
             if text:
-                pages.append(text.strip())
-        return "\n\n".join(pages)
+                yield text
 
-    def _extract_docx(self, data: bytes) -> str:
-        import docx
+    def _iter_pdf_parallel(self, path: Path, page_count: int) -> Iterator[str]:
+        """
+        Split the page range across the process pool and yield pages in order.
+        At most two tasks per worker are in flight, so memory stays bounded.
+        """
+        step = max(1, settings.pdf_pages_per_task)
+        ranges = (
+            (str(path), start, min(start + step, page_count))
+            for start in range(0, page_count, step)
+        )
+        for fut in iter_ordered(
+            self._get_pdf_pool(), _extract_pdf_pages, ranges, self._pdf_workers * 2
+        ):
+            yield from fut.result()
 
-        doc = docx.Document(io.BytesIO(data))
-        paragraphs = [p.text for p in doc.paragraphs if p.text.strip()]
-        return "\n\n".join(paragraphs)
+    def _get_pdf_pool(self) -> ProcessPoolExecutor:
+        with self._pdf_pool_lock:
+            if self._pdf_pool is None:
+                self._pdf_pool = ProcessPoolExecutor(
+                    max_workers=self._pdf_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._pdf_pool
 
-    def _extract_image(self, data: bytes) -> str:
-        try:
-            import pytesseract
-            from PIL import Image
+    def shutdown(self):
+        """Stop worker processes."""
+        with self._pdf_pool_lock:
+            if self._pdf_pool is not None:
+                self._pdf_pool.shutdown(cancel_futures=True)
+                self._pdf_pool = None
 
-            img = Image.open(io.BytesIO(data))
-            return pytesseract.image_to_string(img)
-        except Exception as e:
-            logger.warning(f"OCR failed: {e}")
-            return ""
+    def _iter_docx(self, path: Path) -> Iterator[str]:
+        import docx
+
+        doc = docx.Document(str(path))
+        for p in doc.paragraphs:
+            if p.text.strip():
+                yield p.text
+
+    def _iter_text(self, path: Path) -> Iterator[str]:
+        """
+        Yield blank-line separated paragraphs, capped at MAX_SECTION_CHARS.
+        The file is read in blocks of that size, so text without line breaks
+        is never held whole; a longer paragraph is cut at its last line break
+        within the cap, or at the cap when it has none.
+        """
+        with open(path, encoding="utf-8", errors="replace") as fh:
+            pending = ""
+            eof = False
+            while not eof:
+                block = fh.read(MAX_SECTION_CHARS)
+                eof = not block
+                pending += block
+                while pending:
+                    blank = BLANK_LINE_RE.search(pending, 0, MAX_SECTION_CHARS + 1)
+                    if blank is not None:
+                        section, pending = pending[:blank.start()], pending[blank.end():]
+                    elif len(pending) > MAX_SECTION_CHARS:
+                        cut = pending.rfind("\n", 0, MAX_SECTION_CHARS)
+                        cut = cut if cut > 0 else MAX_SECTION_CHARS
+                        section, pending = pending[:cut], pending[cut:]
+                    elif eof:
+                        section, pending = pending, ""
+                    else:
+                        break  # the paragraph may continue in the next block
+                    if section.strip():
+                        yield section.strip()
 
     def chunk_text(
         self,
@@ -71,18 +194,62 @@ class ParserService:
         """Split text into overlapping chunks by word count."""
         if not text or not text.strip():
             return []
-        words = text.split()
-        chunks = []
-        start = 0
-        while start < len(words):
-            end = start + chunk_size
-            chunk = " ".join(words[start:end])
-            if chunk.strip():
-                chunks.append(chunk)
-            if end >= len(words):
-                break
-            start += chunk_size - overlap
-        return chunks
+        return list(self.iter_chunks([text], chunk_size, overlap))
+
+    def iter_chunks(
+        self,
+        sections: Iterable[str],
+        chunk_size: int = CHUNK_SIZE,
+        overlap: int = CHUNK_OVERLAP,
+    ) -> Iterator[str]:
+        """Chunk texts only; see iter_chunk_spans."""
+        for chunk, _, _ in self.iter_chunk_spans(sections, chunk_size, overlap):
+            yield chunk
+
+    def iter_chunk_spans(
+        self,
+        sections: Iterable[str],
+        chunk_size: int = CHUNK_SIZE,
+        overlap: int = CHUNK_OVERLAP,
+    ) -> Iterator[tuple[str, int, int]]:
+        """
+        Pack a stream of sections into chunks of at most `chunk_size` words.
+
+        Small consecutive sections are merged and chunks break on section
+        boundaries where possible; sections longer than `chunk_size` are split
+        into overlapping windows. Only one chunk's worth of words is buffered.
+
+        Yields (chunk, char_start, char_end), the span being the chunk's
+        position in SECTION_SEPARATOR.join(sections).
+        """
+        buffer: list[tuple[str, int, int]] = []  # (word, start, end)
+
+        def emit(words: list[tuple[str, int, int]]) -> tuple[str, int, int]:
+            return " ".join(w for w, _, _ in words), words[0][1], words[-1][2]
+
+        offset = 0
+        for section in sections:
+            words = [(m.group(), offset + m.start(), offset + m.end())
+                     for m in WORD_RE.finditer(section)]
+            offset += len(section) + len(SECTION_SEPARATOR)
+            if not words:
+                continue
+            if len(buffer) + len(words) <= chunk_size:
+                buffer.extend(words)
+                continue
+            if buffer:
+                yield emit(buffer)
+                buffer = []
+            if len(words) <= chunk_size:
+                buffer = words
+                continue
+            start = 0
+            while start + chunk_size < len(words):
+                yield emit(words[start:start + chunk_size])
+                start += chunk_size - overlap
+            buffer = words[start:]
+        if buffer:
+            yield emit(buffer)
 
     def get_preview(self, text: str, max_chars: int = 300) -> str:
         """Return a short preview of the document text."""
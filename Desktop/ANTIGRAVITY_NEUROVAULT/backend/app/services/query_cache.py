@@ -0,0 +1,123 @@
+import random
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import faiss
+import numpy as np
+
+from app.config import settings
+from app.services.faiss_service import DIMENSION
+from app.services.search_cache import search_cache
+
+logger = logging.getLogger(__name__)
+
+# Cached queries compared per lookup (the nearest may be cached for a smaller k)
+PROBE = 4
+
+
+class _UserQueries:
+    """Recent query vectors of one user and the candidates each retrieved."""
+
+    def __init__(self, generation: int):
+        self.generation = generation
+        self.index = faiss.IndexIDMap2(faiss.IndexFlatIP(DIMENSION))
+        # query id → (k it was run for, resolved candidates)
+        self.entries: OrderedDict[int, tuple[int, list[dict]]] = OrderedDict()
+        self.next_id = 0
+
+
+class QueryCache:
+    """
+    Semantic cache of search candidates. Each user has a small FAISS index
+    of recent query embeddings; a new query within QUERY_CACHE_MAX_DISTANCE
+    (cosine distance) of a cached one reuses that query's candidate set and
+    skips the vector search: its candidate chunks are re-scored against the
+    new query (stored vectors, no search), then the document fetch and
+    cognitive re-rank run again. Entries share the per-user generation
+    counter of the result cache, so changed data drops them. A sample of hits
+    (QUERY_CACHE_VERIFY_RATE) is checked against a real search to report
+    accuracy as recall@k.
+    """
+
+    def __init__(self):
+        self._users: dict[str, _UserQueries] = {}
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.hits = 0
+        self.verified = 0
+        self._recall_sum = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return settings.query_cache_size > 0
+
+    def lookup(self, user_id: str, query_vec: np.ndarray, k: int) -> Optional[list[dict]]:
+        """Candidates of a cached near-identical query run for at least k results."""
+        generation = search_cache.generation(user_id)
+        query = query_vec.reshape(1, -1).astype(np.float32)
+        with self._lock:
+            self.lookups += 1
+            user = self._users.get(user_id)
+            if user is None or user.generation != generation or user.index.ntotal == 0:
+                return None
+            sims, ids = user.index.search(query, min(PROBE, user.index.ntotal))
+            for sim, qid in zip(sims[0], ids[0]):
+                if qid == -1 or 1.0 - sim > settings.query_cache_max_distance:
+                    break
+                cached_k, candidates = user.entries[int(qid)]
+                if cached_k >= k:
+                    user.entries.move_to_end(int(qid))
+                    self.hits += 1
+                    return candidates
+        return None
+
+    def store(
+        self, user_id: str, generation: int, query_vec: np.ndarray, k: int, candidates: list[dict]
+    ):
+        """Remember a query's candidates, computed from data at `generation`."""
+        if not self.enabled:
+            return
+        with self._lock:
+            if generation != search_cache.generation(user_id):
+                return  # data changed while the search ran
+            user = self._users.get(user_id)
+            if user is None or user.generation != generation:
+                user = self._users[user_id] = _UserQueries(generation)
+            qid = user.next_id
+            user.next_id += 1
+            user.index.add_with_ids(
+                query_vec.reshape(1, -1).astype(np.float32), np.array([qid], dtype=np.int64)
+            )
+            user.entries[qid] = (k, candidates)
+            while len(user.entries) > settings.query_cache_size:
+                oldest, _ = user.entries.popitem(last=False)
+                user.index.remove_ids(np.array([oldest], dtype=np.int64))
+
+    def should_verify(self) -> bool:
+        return random.random() < settings.query_cache_verify_rate
+
+    def record_accuracy(self, cached_ids: list[str], exact_ids: list[str]):
+        """Recall of the exact top documents among the reused ones."""
+        recall = len(set(cached_ids) & set(exact_ids)) / len(exact_ids) if exact_ids else 1.0
+        with self._lock:
+            self.verified += 1
+            self._recall_sum += recall
+        if recall < 1.0:
+            logger.debug(f"Query cache hit with recall@{len(exact_ids)} = {recall:.2f}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "users": len(self._users),
+                "queries": sum(len(u.entries) for u in self._users.values()),
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "hit_rate": round(self.hits / self.lookups, 4) if self.lookups else 0.0,
+                "verified": self.verified,
+                "mean_recall": round(self._recall_sum / self.verified, 4) if self.verified else None,
+            }
+
+
+query_cache = QueryCache()
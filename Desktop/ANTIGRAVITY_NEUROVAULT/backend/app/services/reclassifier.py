@@ -0,0 +1,163 @@
+import time
+import logging
+import threading
+from datetime import datetime
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal, epoch_seconds
+from app.models.document import Document
+from app.services.cognition import TIERS, UNTIL_COLUMNS, cognition_engine, lifecycle_values
+from app.services.db_writer import db_writer
+from app.services.search_cache import invalidate_on_commit
+
+logger = logging.getLogger(__name__)
+
+LOAD_BATCH = 50_000
+TIER_INDEX = {tier: i for i, tier in enumerate(TIERS)}
+LIFECYCLE_COLUMNS = ("activation", *UNTIL_COLUMNS)
+# Stored boundaries closer than this (seconds) to the recomputed ones count as unchanged
+UNTIL_TOLERANCE_S = 1.0
+
+_documents = Document.__table__
+_UPDATE_LIFECYCLE = (
+    update(_documents)
+    .where(_documents.c.id == bindparam("doc_id"))
+    .values(
+        cognitive_score=bindparam("score"),
+        tier=bindparam("new_tier"),
+        **{name: bindparam(f"new_{name}") for name in LIFECYCLE_COLUMNS},
+    )
+)
+
+
+class Reclassifier:
+    """
+    Recomputes every document's lifecycle state without query context. Tiers
+    themselves need no periodic rewrite (they are read from the decay-
+    invariant *_until columns), so this pass only picks up changed scoring
+    weights, thresholds or decay rate, and refreshes the stored tier and
+    score. A user's whole corpus is loaded as NumPy arrays and processed in
+    one vectorized pass; only rows that differ are written, in bulk UPDATEs
+    on the DB writer. Runs at startup and, if RECLASSIFY_INTERVAL_MIN is
+    set, periodically after that.
+    """
+
+    def __init__(self):
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="reclassify", daemon=True)
+        self._thread.start()
+
+    def shutdown(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def run_all(self, now: Optional[datetime] = None) -> list[dict]:
+        with SessionLocal() as db:
+            users = db.scalars(select(Document.user_id).distinct()).all()
+        return [self.reclassify_user(user_id, now) for user_id in users if not self._stop.is_set()]
+
+    def reclassify_user(self, user_id: str, now: Optional[datetime] = None) -> dict:
+        """Recompute one user's lifecycle state and write back what changed."""
+        t0 = time.perf_counter()
+        ids, last_accessed, access_counts, tiers, stored = self._load(user_id)
+        scores = cognition_engine.storage_scores(last_accessed, access_counts, now)
+        new_tiers = cognition_engine.classify_tiers(scores)
+        state = cognition_engine.lifecycle_batch(last_accessed, access_counts)
+
+        differs = new_tiers != tiers
+        differs |= ~np.isclose(
+            state["activation"], stored["activation"], rtol=0, atol=1e-9, equal_nan=True
+        )
+        for name in UNTIL_COLUMNS:
+            new, old = state[name], stored[name]
+            differs |= (np.isnan(new) != np.isnan(old)) | (np.abs(new - old) > UNTIL_TOLERANCE_S)
+        changed = np.flatnonzero(differs)
+
+        batch_size = settings.reclassify_batch_size
+        for start in range(0, len(changed), batch_size):
+            idx = changed[start:start + batch_size]
+            values = lifecycle_values(state, idx)
+            rows = [
+                {
+                    "doc_id": ids[i],
+                    "score": float(scores[i]),
+                    "new_tier": TIERS[new_tiers[i]],
+                    **{f"new_{name}": values[name][j] for name in LIFECYCLE_COLUMNS},
+                }
+                for j, i in enumerate(idx)
+            ]
+            # Wait for each batch so a large pass cannot flood the writer queue
+            db_writer.submit(lambda db, rows=rows: self._write(db, user_id, rows)).result()
+
+        elapsed = time.perf_counter() - t0
+        if len(changed):
+            logger.info(
+                f"Reclassified {len(changed)}/{len(ids)} documents of {user_id} "
+                f"in {elapsed:.2f}s"
+            )
+        return {"user_id": user_id, "documents": len(ids), "reclassified": len(changed)}
+
+    @staticmethod
+    def _write(db: Session, user_id: str, rows: list[dict]):
+        db.execute(_UPDATE_LIFECYCLE, rows)
+        invalidate_on_commit(db, {user_id})
+
+    def _load(self, user_id: str) -> tuple:
+        """
+        ids, last_accessed, access_count, stored tier index and stored
+        lifecycle columns. Times are selected as epoch seconds, so every
+        numeric column becomes a float64 array without per-row conversion.
+        """
+        columns = [
+            Document.id, epoch_seconds(Document.last_accessed), Document.access_count,
+            Document.tier, Document.activation,
+            *(epoch_seconds(getattr(Document, name)) for name in UNTIL_COLUMNS),
+        ]
+        loaded: list[list] = [[] for _ in columns]
+        with SessionLocal() as db:
+            result = db.execute(
+                select(*columns)
+                .where(Document.user_id == user_id)
+                .execution_options(yield_per=LOAD_BATCH)
+            )
+            for batch in result.partitions():
+                for values, column in zip(loaded, zip(*batch)):
+                    values.extend(column)
+        ids, last, counts, tiers, activation, *untils = loaded
+        stored = {"activation": np.array(activation, dtype=np.float64)}  # None → NaN
+        for name, values in zip(UNTIL_COLUMNS, untils):
+            stored[name] = np.array(values, dtype=np.float64)
+        return (
+            ids,
+            np.array(last, dtype=np.float64),
+            np.nan_to_num(np.array(counts, dtype=np.float64)),
+            np.fromiter((TIER_INDEX.get(t, -1) for t in tiers), dtype=np.int64, count=len(tiers)),
+            stored,
+        )
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.run_all()
+            except Exception:
+                logger.exception("Tier reclassification failed")
+            if settings.reclassify_interval_min <= 0:
+                break
+            self._stop.wait(settings.reclassify_interval_min * 60)
+        self._thread = None
+
+
+reclassifier = Reclassifier()
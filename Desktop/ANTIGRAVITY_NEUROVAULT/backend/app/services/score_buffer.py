@@ -0,0 +1,105 @@
+import logging
+import threading
+from typing import Optional
+
+from sqlalchemy import bindparam, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.document import Document
+from app.services.db_writer import db_writer
+from app.services.search_cache import invalidate_on_commit
+
+logger = logging.getLogger(__name__)
+
+_documents = Document.__table__
+# Core executemany: documents deleted since the search are simply not matched
+_UPDATE_SCORES = (
+    update(_documents)
+    .where(_documents.c.id == bindparam("doc_id"))
+    .values(
+        semantic_score=bindparam("semantic"),
+        cognitive_score=bindparam("cognitive"),
+        tier=bindparam("new_tier"),
+    )
+)
+
+
+class ScoreBuffer:
+    """
+    Write-behind buffer for the scores search assigns to documents
+    (semantic_score, cognitive_score, tier). Updates are coalesced per
+    document, newest wins, and written by the DB writer in one bulk UPDATE
+    every SCORE_FLUSH_INTERVAL_MS or once SCORE_FLUSH_MAX_PENDING documents
+    are pending, so searches never open a write transaction.
+    """
+
+    def __init__(self):
+        self._pending: dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._loop, name="score-flush", daemon=True
+            )
+            self._thread.start()
+
+    def add(self, updates: list[dict]):
+        """Buffer {id, user_id, semantic_score, cognitive_score, tier} rows."""
+        with self._lock:
+            for row in updates:
+                self._pending[row["id"]] = {
+                    "doc_id": row["id"],
+                    "owner": row["user_id"],
+                    "semantic": row["semantic_score"],
+                    "cognitive": row["cognitive_score"],
+                    "new_tier": row["tier"],
+                }
+            full = len(self._pending) >= settings.score_flush_max_pending
+        if full:
+            self._wake.set()
+
+    def discard(self, doc_id: str):
+        """Drop a pending update (the document was deleted)."""
+        with self._lock:
+            self._pending.pop(doc_id, None)
+
+    def flush(self):
+        """Hand everything pending to the writer as one bulk UPDATE."""
+        with self._lock:
+            rows, self._pending = list(self._pending.values()), {}
+        if rows:
+            db_writer.submit(lambda db: self._write(db, rows))
+
+    @staticmethod
+    def _write(db: Session, rows: list[dict]):
+        db.execute(_UPDATE_SCORES, rows)
+        invalidate_on_commit(db, {row["owner"] for row in rows})
+        logger.debug(f"Flushed scores of {len(rows)} documents")
+
+    def _loop(self):
+        interval = settings.score_flush_interval_ms / 1000
+        while not self._stop.is_set():
+            self._wake.wait(interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Score flush failed")
+
+    def shutdown(self):
+        """Stop the flusher and write out what is still pending."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+
+score_buffer = ScoreBuffer()
@@ -0,0 +1,113 @@
+import re
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Hashable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    return _SPACE_RE.sub(" ", query).strip().casefold()
+
+
+class SearchCache:
+    """
+    Bounded LRU cache of search responses. Every entry is tagged with its
+    user's generation counter, read before the search ran; any committed
+    change to that user's documents or chunks bumps the counter, so entries
+    computed from older data are never served. Scores also decay with time,
+    so an entry expires at the earlier of SEARCH_CACHE_TTL_S and the moment
+    one of its results would cross a tier (or min_score) threshold.
+    """
+
+    def __init__(self):
+        self._entries: OrderedDict[Hashable, tuple[int, datetime, Any]] = OrderedDict()
+        self._generations: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return settings.search_cache_size > 0 and settings.search_cache_ttl_s > 0
+
+    def generation(self, user_id: str) -> int:
+        with self._lock:
+            return self._generations.get(user_id, 0)
+
+    def bump(self, user_id: str):
+        """Invalidate everything cached for a user."""
+        with self._lock:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+
+    def get(self, key: Hashable, user_id: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                generation, expires_at, value = entry
+                if generation == self._generations.get(user_id, 0) and datetime.utcnow() < expires_at:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, generation: int, expires_at: datetime, value: Any):
+        with self._lock:
+            if generation != self._generations.get(key[0], 0):
+                return  # data changed while the search ran
+            self._entries[key] = (generation, expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > settings.search_cache_size:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+search_cache = SearchCache()
+
+
+# ── Invalidation: bump users whose documents or chunks were committed ──
+def _touched_users(session: Session) -> set[str]:
+    return session.info.setdefault("search_cache_users", set())
+
+
+def invalidate_on_commit(session: Session, user_ids):
+    """
+    Bump these users once `session` commits. For Core bulk statements
+    (executemany UPDATEs), which the flush hook below never sees.
+    """
+    _touched_users(session).update(user_ids)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_users(session: Session, _flush_context):
+    from app.models.chunk import Chunk
+    from app.models.document import Document
+
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, (Document, Chunk)):
+            _touched_users(session).add(obj.user_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_users(session: Session):
+    for user_id in session.info.pop("search_cache_users", ()):
+        search_cache.bump(user_id)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_users(session: Session, _previous_transaction):
+    session.info.pop("search_cache_users", None)
@@ -0,0 +1,37 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Hashable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key: the first caller starts
+    the work, later callers await the same task and share its result (or
+    exception). The task is shielded, so a caller that disconnects does not
+    cancel it for the others. Scope is one event loop, i.e. one worker process.
+    """
+
+    def __init__(self):
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        self.started = 0
+        self.joined = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> tuple[T, bool]:
+        """Run fn() once per key at a time. Returns (result, shared with an earlier caller)."""
+        task = self._inflight.get(key)
+        shared = task is not None
+        if shared:
+            self.joined += 1
+        else:
+            self.started += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task), shared
+
+    def stats(self) -> dict:
+        return {"in_flight": len(self._inflight), "started": self.started, "joined": self.joined}
@@ -0,0 +1,147 @@
+import uuid
+import shutil
+import hashlib
+import logging
+import zipfile
+from pathlib import Path
+from typing import Iterator, NamedTuple, Optional
+
+import aiofiles
+from fastapi import UploadFile
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _safe_name(name: str) -> str:
+    return name.replace("/", "_").replace("\\", "_")
+
+
+def _is_document(info: zipfile.ZipInfo) -> bool:
+    """Archive members worth expanding: files that are not hidden or metadata."""
+    name = Path(info.filename).name
+    return (
+        not info.is_dir() and bool(name) and not name.startswith(".")
+        and "__MACOSX" not in info.filename
+    )
+
+
+class StoredFile(NamedTuple):
+    doc_id: str
+    filename: str
+    path: Path
+    size: int
+    digest: str  # SHA-256 of the file contents
+
+
+class StorageService:
+    """
+    Spools uploaded files to disk under uploads/<user>/<doc_id>/ so that
+    parsing reads from a file handle instead of an in-memory copy.
+    """
+
+    def __init__(self):
+        self._root: Optional[Path] = None
+
+    def init(self, root: Path):
+        self._root = root
+        root.mkdir(parents=True, exist_ok=True)
+
+    def document_dir(self, user_id: str, doc_id: str) -> Path:
+        root = self._root or settings.upload_dir
+        return root / _safe_name(user_id) / doc_id
+
+    def staging_dir(self, user_id: str, batch_id: str) -> Path:
+        root = self._root or settings.upload_dir
+        return root / _safe_name(user_id) / "_staging" / batch_id
+
+    async def spool(
+        self, upload: UploadFile, user_id: str, doc_id: str
+    ) -> tuple[Path, int, str]:
+        """Stream an upload to disk block by block. Returns (path, size, sha256)."""
+        return await self._spool_into(upload, self.document_dir(user_id, doc_id))
+
+    async def stage(
+        self, upload: UploadFile, user_id: str, batch_id: str
+    ) -> tuple[Path, int, str]:
+        """Spool an upload into a batch staging area (e.g. an archive to expand later)."""
+        return await self._spool_into(upload, self.staging_dir(user_id, batch_id))
+
+    async def _spool_into(
+        self, upload: UploadFile, dest_dir: Path
+    ) -> tuple[Path, int, str]:
+        dest_dir.mkdir(parents=True, exist_ok=True)
+        dest = dest_dir / _safe_name(Path(upload.filename or "upload").name)
+
+        size = 0
+        digest = hashlib.sha256()
+        async with aiofiles.open(dest, "wb") as out:
+            while True:
+                block = await upload.read(settings.upload_chunk_bytes)
+                if not block:
+                    break
+                size += len(block)
+                digest.update(block)
+                await out.write(block)
+        return dest, size, digest.hexdigest()
+
+    def extract_archive(
+        self, archive: Path, user_id: str, max_files: Optional[int] = None
+    ) -> Iterator[StoredFile]:
+        """
+        Expand a zip archive member by member into per-document directories,
+        hashing each file as it is copied. Directories and hidden/metadata
+        entries are skipped; at most `max_files` (default BULK_MAX_FILES)
+        members are expanded, and an archive expanding past
+        BULK_MAX_EXPANDED_MB is rejected with a ValueError before anything
+        is written.
+        """
+        limit = settings.bulk_max_files if max_files is None else max(0, max_files)
+        with zipfile.ZipFile(archive) as zf:
+            members = [info for info in zf.infolist() if _is_document(info)]
+            if len(members) > limit:
+                logger.warning(f"{archive.name}: stopping after {limit} files")
+                members = members[:limit]
+            # zipfile stops each member at its declared size, so the headers bound the output
+            expanded = sum(info.file_size for info in members)
+            if expanded > settings.bulk_max_expanded_mb * 1024 * 1024:
+                raise ValueError(
+                    f"{archive.name} expands to {expanded // (1024 * 1024)} MB, "
+                    f"over the {settings.bulk_max_expanded_mb} MB limit"
+                )
+
+            for info in members:
+                name = Path(info.filename).name
+                doc_id = str(uuid.uuid4())
+                dest_dir = self.document_dir(user_id, doc_id)
+                dest_dir.mkdir(parents=True, exist_ok=True)
+                dest = dest_dir / _safe_name(name)
+                size = 0
+                digest = hashlib.sha256()
+                with zf.open(info) as src, open(dest, "wb") as out:
+                    while True:
+                        block = src.read(settings.upload_chunk_bytes)
+                        if not block:
+                            break
+                        size += len(block)
+                        digest.update(block)
+                        out.write(block)
+                yield StoredFile(doc_id, name, dest, size, digest.hexdigest())
+
+    def prune(self, user_id: str, doc_id: str, keep: Path):
+        """Delete a document's previous files, keeping only `keep`."""
+        for path in self.document_dir(user_id, doc_id).iterdir():
+            if path != keep and path.is_file():
+                path.unlink(missing_ok=True)
+
+    def remove(self, user_id: str, doc_id: str):
+        """Delete a document's spooled files, if any."""
+        shutil.rmtree(self.document_dir(user_id, doc_id), ignore_errors=True)
+
+    def remove_staging(self, user_id: str, batch_id: str):
+        """Delete a batch's staging area."""
+        shutil.rmtree(self.staging_dir(user_id, batch_id), ignore_errors=True)
+
+
+storage_service = StorageService()
@@ -0,0 +1,242 @@
+import os
+import time
+import uuid
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, Optional
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.document import Document
+from app.models.sync_manifest import SyncManifestEntry
+from app.services.ingestion import ingestion_service
+from app.services.storage_service import StoredFile
+
+logger = logging.getLogger(__name__)
+
+# Extension → parser file type for files picked up from disk
+SYNC_FILE_TYPES = {
+    ".pdf": "pdf",
+    ".docx": "docx",
+    ".txt": "txt",
+    ".md": "md",
+    ".csv": "csv",
+    ".png": "png",
+    ".jpg": "jpg",
+    ".jpeg": "jpg",
+    ".tif": "tiff",
+    ".tiff": "tiff",
+    ".bmp": "bmp",
+}
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(settings.upload_chunk_bytes), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _walk(root: Path) -> Iterator[tuple[str, os.stat_result]]:
+    """Yield (relative posix path, stat) for supported files, skipping hidden entries."""
+    stack = [root]
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                if entry.name.startswith("."):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(Path(entry.path))
+                elif entry.is_file() and Path(entry.name).suffix.lower() in SYNC_FILE_TYPES:
+                    yield Path(entry.path).relative_to(root).as_posix(), entry.stat()
+
+
+class SyncService:
+    """
+    Mirrors a directory into a user's vault.
+
+    A persisted manifest records (size, mtime, sha256, document) for every
+    synced file. Files whose size and mtime are unchanged are skipped on
+    stat alone; the rest are hashed, and only new or modified content is
+    fed to the ingestion pipeline. Files that disappeared are deleted.
+
+    Runs as a job in the API server, next to the FAISS indexes it writes;
+    syncs of the same directory are serialized.
+    """
+
+    def __init__(self):
+        self._locks: dict[tuple[str, str], threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def sync(self, db: Session, root: Path, user_id: str) -> dict:
+        root = root.resolve()
+        with self._locks_guard:
+            lock = self._locks.setdefault((user_id, str(root)), threading.Lock())
+        with lock:
+            return self._sync(db, root, user_id)
+
+    def _sync(self, db: Session, root: Path, user_id: str) -> dict:
+        t0 = time.perf_counter()
+        root_key = str(root)
+        manifest: dict[str, SyncManifestEntry] = {
+            e.rel_path: e
+            for e in db.query(SyncManifestEntry).filter(
+                SyncManifestEntry.user_id == user_id, SyncManifestEntry.root == root_key
+            )
+        }
+
+        # 1. Stat pass: anything whose size or mtime moved is a candidate
+        seen: set[str] = set()
+        candidates: list[tuple[str, os.stat_result]] = []
+        for rel, st in _walk(root):
+            seen.add(rel)
+            entry = manifest.get(rel)
+            if entry is None or entry.size != st.st_size or entry.mtime != st.st_mtime:
+                candidates.append((rel, st))
+
+        # 2. Hash candidates in parallel to separate real edits from touches
+        with ThreadPoolExecutor(max_workers=settings.sync_hash_workers) as pool:
+            digests = list(pool.map(lambda c: _sha256(root / c[0]), candidates))
+
+        new: list[tuple[str, os.stat_result, str]] = []
+        changed: list[tuple[SyncManifestEntry, os.stat_result, str]] = []
+        touched = 0
+        for (rel, st), digest in zip(candidates, digests):
+            entry = manifest.get(rel)
+            if entry is None:
+                new.append((rel, st, digest))
+            elif entry.sha256 == digest:
+                entry.size, entry.mtime = st.st_size, st.st_mtime
+                touched += 1
+            else:
+                changed.append((entry, st, digest))
+        deleted = [e for rel, e in manifest.items() if rel not in seen]
+
+        # Edited files whose document was removed through the API are ingested afresh
+        live = {
+            doc_id for (doc_id,) in db.query(Document.id).filter(
+                Document.id.in_([e.document_id for e, _, _ in changed])
+            )
+        }
+        for entry, st, digest in [c for c in changed if c[0].document_id not in live]:
+            db.delete(entry)
+            new.append((entry.rel_path, st, digest))
+        changed = [c for c in changed if c[0].document_id in live]
+
+        # 3. Apply changes
+        errors: list[dict] = []
+        self._ingest_new(db, root, root_key, user_id, new, errors)
+        self._reindex_changed(db, root, user_id, changed, errors)
+        for entry in deleted:
+            doc = db.query(Document).filter(Document.id == entry.document_id).first()
+            if doc:
+                ingestion_service.delete_document(db, doc, commit=False)
+            db.delete(entry)
+        db.commit()
+
+        stats = {
+            "root": root_key,
+            "scanned": len(seen),
+            "unchanged": len(seen) - len(candidates),
+            "touched": touched,
+            "new": len(new),
+            "changed": len(changed),
+            "deleted": len(deleted),
+            "failed": len(errors),
+            "errors": errors,
+            "elapsed_s": round(time.perf_counter() - t0, 3),
+        }
+        logger.info(f"Sync {root_key}: {stats}")
+        return stats
+
+    def _ingest_new(
+        self,
+        db: Session,
+        root: Path,
+        root_key: str,
+        user_id: str,
+        new: list[tuple[str, os.stat_result, str]],
+        errors: list[dict],
+    ):
+        """Ingest new files in bulk batches, adding each failed file to `errors`."""
+        size = max(1, settings.sync_batch_size)
+        for i in range(0, len(new), size):
+            batch = new[i:i + size]
+            files = [
+                (
+                    StoredFile(str(uuid.uuid4()), rel, root / rel, st.st_size, digest),
+                    SYNC_FILE_TYPES[Path(rel).suffix.lower()],
+                )
+                for rel, st, digest in batch
+            ]
+            try:
+                result = ingestion_service.ingest_batch(db, user_id, files)
+            except Exception as e:
+                logger.exception(f"Sync batch of {len(batch)} files from {root_key} failed")
+                errors.extend({"path": rel, "error": str(e)} for rel, _, _ in batch)
+                continue
+            for (rel, st, digest), item in zip(batch, result["documents"]):
+                if item["status"] != "indexed":
+                    errors.append({"path": rel, "error": item.get("error", item["status"])})
+                    continue
+                db.add(SyncManifestEntry(
+                    user_id=user_id,
+                    root=root_key,
+                    rel_path=rel,
+                    size=st.st_size,
+                    mtime=st.st_mtime,
+                    sha256=digest,
+                    document_id=item["document_id"],
+                    synced_at=datetime.utcnow(),
+                ))
+            db.commit()
+
+    def _reindex_changed(
+        self,
+        db: Session,
+        root: Path,
+        user_id: str,
+        changed: list[tuple[SyncManifestEntry, os.stat_result, str]],
+        errors: list[dict],
+    ):
+        """
+        Re-index modified files in parallel (one session per worker), adding
+        each failed file to `errors`.
+        """
+
+        def reindex(doc_id: str, rel: str, st: os.stat_result, digest: str) -> Optional[str]:
+            session = SessionLocal()
+            try:
+                doc = session.query(Document).filter(Document.id == doc_id).one()
+                doc.file_size = st.st_size
+                ingestion_service.reindex(session, doc, root / rel, digest)
+                return None
+            except Exception as e:
+                logger.exception(f"Sync re-index of {rel} failed")
+                return str(e) or e.__class__.__name__
+            finally:
+                session.close()
+
+        # A re-index holds its write transaction while it embeds; SQLite has one writer
+        workers = 1 if settings.is_sqlite else settings.bulk_parse_workers
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(
+                lambda c: reindex(c[0].document_id, c[0].rel_path, c[1], c[2]), changed
+            ))
+
+        for (entry, st, digest), error in zip(changed, results):
+            if error is not None:
+                errors.append({"path": entry.rel_path, "error": error})
+                continue
+            entry.size, entry.mtime, entry.sha256 = st.st_size, st.st_mtime, digest
+            entry.synced_at = datetime.utcnow()
+
+
+sync_service = SyncService()
@@ -0,0 +1,31 @@
+from collections import deque
+from concurrent.futures import Executor, Future
+from typing import Callable, Iterable, Iterator
+
+
+def iter_ordered(
+    pool: Executor, fn: Callable, arg_tuples: Iterable[tuple], window: int
+) -> Iterator[Future]:
+    """
+    Submit fn(*args) for each tuple and yield the futures in submission order,
+    keeping at most `window` tasks in flight. Unconsumed futures are cancelled
+    when the caller stops iterating.
+    """
+    args_iter = iter(arg_tuples)
+    pending: deque[Future] = deque()
+
+    def submit_next() -> None:
+        args = next(args_iter, None)
+        if args is not None:
+            pending.append(pool.submit(fn, *args))
+
+    for _ in range(max(1, window)):
+        submit_next()
+    try:
+        while pending:
+            fut = pending.popleft()
+            submit_next()
+            yield fut
+    finally:
+        for fut in pending:
+            fut.cancel()
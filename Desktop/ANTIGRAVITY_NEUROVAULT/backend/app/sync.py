@@ -0,0 +1,56 @@
+"""
+Mirror a local directory into a vault:
+
+    python -m app.sync ~/Notes --user default_user
+
+Only files that are new or whose content changed since the last run are
+ingested; files removed from the directory are deleted from the vault.
+The sync runs as a job inside the API server (which owns the FAISS
+indexes), so the server must be running; this command submits the job
+and waits for its result.
+"""
+import sys
+import json
+import time
+import argparse
+import urllib.error
+import urllib.parse
+import urllib.request
+from pathlib import Path
+
+POLL_INTERVAL_S = 1.0
+
+
+def _call(method: str, url: str) -> dict:
+    with urllib.request.urlopen(urllib.request.Request(url, method=method)) as resp:
+        return json.load(resp)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync a directory into NeuroVault")
+    parser.add_argument("directory", type=Path)
+    parser.add_argument("--user", default="default_user")
+    parser.add_argument("--server", default="http://localhost:8000", help="NeuroVault API URL")
+    args = parser.parse_args()
+    if not args.directory.is_dir():
+        parser.error(f"{args.directory} is not a directory")
+
+    api = args.server.rstrip("/")
+    query = urllib.parse.urlencode({"directory": str(args.directory.resolve()), "user_id": args.user})
+    try:
+        job = _call("POST", f"{api}/api/documents/sync?{query}")
+        while job["status"] in ("queued", "running"):
+            time.sleep(POLL_INTERVAL_S)
+            job = _call("GET", f"{api}/api/jobs/{job['job_id']}")
+    except urllib.error.HTTPError as e:
+        sys.exit(f"Sync rejected: {json.load(e).get('detail', e.reason)}")
+    except urllib.error.URLError as e:
+        sys.exit(f"Cannot reach the NeuroVault server at {api}: {e}")
+
+    if job["status"] != "succeeded":
+        sys.exit(f"Sync failed: {job['error']}")
+    print(json.dumps(job["result"], indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Throughput of lifecycle reclassification: scoring documents one at a time
+with compute_storage_score / classify_tier versus the vectorized pass over
+a whole corpus, then a full reclassify_user run (load, score, write back).
+
+    python -m benchmarks.reclassify --docs 1000000 --db-docs 200000
+
+Runs against a throwaway SQLite database, never the configured one.
+"""
+import os
+import time
+import random
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp.name}/bench.db"
+
+import numpy as np  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+
+from app.database import SessionLocal, init_db  # noqa: E402
+from app.models.document import Document  # noqa: E402
+from app.services.cognition import cognition_engine, to_epoch_seconds  # noqa: E402
+from app.services.db_writer import db_writer  # noqa: E402
+from app.services.reclassifier import reclassifier  # noqa: E402
+
+USER = "bench_user"
+
+
+def corpus(n: int) -> tuple[list[datetime], list[int]]:
+    now = datetime.utcnow()
+    last = [now - timedelta(days=random.random() * 120) for _ in range(n)]
+    counts = [random.randint(0, 200) for _ in range(n)]
+    return last, counts
+
+
+def per_document(last: list[datetime], counts: list[int]) -> list[str]:
+    return [
+        cognition_engine.classify_tier(cognition_engine.compute_storage_score(la, ac))
+        for la, ac in zip(last, counts)
+    ]
+
+
+def vectorized(last_s: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """Inputs as reclassify_user loads them: epoch seconds and float counts."""
+    return cognition_engine.classify_tiers(cognition_engine.storage_scores(last_s, counts))
+
+
+def seed(n: int):
+    last, counts = corpus(n)
+    rows = [
+        {
+            "id": f"{i:08d}-0000-0000-0000-000000000000", "user_id": USER,
+            "filename": f"doc_{i}.txt", "file_type": "txt", "content_length": 0,
+            "chunk_count": 1, "tier": "Active", "cognitive_score": 1.0,
+            "last_accessed": la, "created_at": la, "access_count": ac,
+        }
+        for i, (la, ac) in enumerate(zip(last, counts))
+    ]
+    with SessionLocal() as db:
+        for i in range(0, n, 50_000):
+            db.execute(insert(Document), rows[i:i + 50_000])
+        db.commit()
+
+
+def rate(n: int, seconds: float) -> str:
+    return f"{seconds:7.2f}s  ({n / seconds * 60 / 1e6:6.2f}M docs/min)"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--docs", type=int, default=1_000_000)
+    parser.add_argument("--db-docs", type=int, default=200_000)
+    args = parser.parse_args()
+
+    last, counts = corpus(args.docs)
+    t0 = time.perf_counter()
+    per_document(last, counts)
+    print(f"per document   {rate(args.docs, time.perf_counter() - t0)}")
+    arrays = np.array([to_epoch_seconds(la) for la in last]), np.array(counts, dtype=np.float64)
+    t0 = time.perf_counter()
+    vectorized(*arrays)
+    print(f"vectorized     {rate(args.docs, time.perf_counter() - t0)}")
+
+    init_db()
+    seed(args.db_docs)
+    t0 = time.perf_counter()
+    stats = reclassifier.reclassify_user(USER)
+    print(
+        f"full pass      {rate(args.db_docs, time.perf_counter() - t0)}  "
+        f"{stats['reclassified']}/{stats['documents']} tiers changed"
+    )
+    db_writer.shutdown()
+
+
+if __name__ == "__main__":
+    main()
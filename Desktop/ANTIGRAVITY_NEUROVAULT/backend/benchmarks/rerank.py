@@ -0,0 +1,77 @@
+"""
+Cost of the cognitive re-rank for one search: the per-candidate loop
+(compute_score + classify_tier, sort) over datetimes versus
+CognitionEngine.rerank over arrays with argpartition, built from the
+epoch seconds fetch_candidates loads.
+
+    python -m benchmarks.rerank --candidates 50 500 5000 --k 10
+"""
+import time
+import random
+import argparse
+import statistics
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from app.services.cognition import cognition_engine, to_epoch_seconds
+
+
+def candidates(n: int) -> tuple[list[float], list[datetime], list[int]]:
+    now = datetime.utcnow()
+    return (
+        [random.random() for _ in range(n)],
+        [now - timedelta(days=random.random() * 90) for _ in range(n)],
+        [random.randint(0, 100) for _ in range(n)],
+    )
+
+
+def as_loaded(semantic, last, counts) -> tuple[list[float], list[float], list[int]]:
+    """The same candidates with last access as the epoch seconds selected in SQL."""
+    return semantic, [to_epoch_seconds(la) for la in last], counts
+
+
+def loop(semantic, last, counts, k: int) -> list:
+    ranked = []
+    for sim, la, ac in zip(semantic, last, counts):
+        score = cognition_engine.compute_score(sim, la, ac)
+        ranked.append((score, cognition_engine.classify_tier(score)))
+    ranked.sort(key=lambda x: x[0], reverse=True)
+    return ranked[:k]
+
+
+def vectorized(semantic, last_s, counts, k: int) -> dict:
+    return cognition_engine.rerank(
+        np.array(semantic, dtype=np.float64),
+        np.array(last_s, dtype=np.float64),
+        np.array(counts, dtype=np.float64),
+        k=k,
+    )
+
+
+def median_ms(fn, args, rounds: int) -> float:
+    timings = []
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        fn(*args)
+        timings.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--candidates", type=int, nargs="+", default=[50, 500, 5000])
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    for n in args.candidates:
+        data = candidates(n)
+        print(
+            f"{n:>6} candidates   loop {median_ms(loop, (*data, args.k), args.rounds):8.3f} ms   "
+            f"rerank {median_ms(vectorized, (*as_loaded(*data), args.k), args.rounds):8.3f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
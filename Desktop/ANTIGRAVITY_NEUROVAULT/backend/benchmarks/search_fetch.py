@@ -0,0 +1,95 @@
+"""
+Latency of fetching search candidates: one query per candidate (full rows)
+versus the single IN query with scoring columns only used by /api/search.
+
+    python -m benchmarks.search_fetch --docs 5000 --candidates 45 --text-kb 64
+
+Runs against a throwaway SQLite database, never the configured one.
+"""
+import os
+import time
+import random
+import argparse
+import tempfile
+import statistics
+from datetime import datetime, timedelta
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp.name}/bench.db"
+
+from app.database import SessionLocal, init_db  # noqa: E402
+from app.models.document import Document  # noqa: E402
+from app.routers.search import fetch_candidates  # noqa: E402
+from app.services.content_store import content_store  # noqa: E402
+
+USER = "bench_user"
+
+
+def seed(n_docs: int, text_kb: int) -> list[str]:
+    db = SessionLocal()
+    now = datetime.utcnow()
+    text = ("lorem ipsum dolor sit amet " * 40 * text_kb)[: text_kb * 1024]
+    ids = []
+    for i in range(n_docs):
+        doc_id = f"{i:08d}-0000-0000-0000-000000000000"
+        ids.append(doc_id)
+        db.add(Document(
+            id=doc_id, user_id=USER, filename=f"doc_{i}.txt", file_type="txt",
+            content_length=content_store.put(db, doc_id, text), chunk_count=1,
+            last_accessed=now - timedelta(days=random.random() * 90),
+            created_at=now - timedelta(days=90), access_count=random.randint(0, 50),
+        ))
+        if i % 1000 == 999:
+            db.commit()
+    db.commit()
+    db.close()
+    return ids
+
+
+def fetch_one_by_one(db, user_id: str, doc_ids: list[str]) -> dict[str, tuple]:
+    """The previous search path: one full-row query per candidate."""
+    docs = {}
+    for doc_id in doc_ids:
+        doc = db.query(Document).filter(Document.id == doc_id).first()
+        if doc and doc.user_id == user_id:
+            docs[doc_id] = (doc, doc.last_accessed)
+    return docs
+
+
+def measure(fn, ids: list[str], candidates: int, rounds: int) -> list[float]:
+    timings = []
+    for _ in range(rounds):
+        sample = random.sample(ids, candidates)
+        db = SessionLocal()  # fresh session: no identity-map hits between rounds
+        t0 = time.perf_counter()
+        docs = fn(db, USER, sample)
+        for doc, _ in docs.values():  # touch what scoring reads
+            doc.access_count, doc.filename
+        timings.append((time.perf_counter() - t0) * 1000)
+        db.close()
+    return timings
+
+
+def report(name: str, timings: list[float]):
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(f"{name:<14} median {statistics.median(timings):8.2f} ms   p95 {p95:8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--docs", type=int, default=5000)
+    parser.add_argument("--candidates", type=int, default=45)
+    parser.add_argument("--text-kb", type=int, default=64)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    init_db()
+    ids = seed(args.docs, args.text_kb)
+    print(f"{args.docs} documents × {args.text_kb} KiB, {args.candidates} candidates per query")
+    report("one-by-one", measure(fetch_one_by_one, ids, args.candidates, args.rounds))
+    report("single IN", measure(fetch_candidates, ids, args.candidates, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Read/write concurrency on SQLite: reader threads issue search-style fetches
+while writer threads record score updates, under three profiles —
+SQLite defaults (rollback journal), the WAL + pragma profile, and the WAL
+profile with writes serialized through the single-writer queue.
+
+    python -m benchmarks.sqlite_concurrency --docs 5000 --readers 8 --writers 4 --seconds 5
+
+Runs against throwaway SQLite databases, never the configured one.
+"""
+import os
+import time
+import random
+import argparse
+import tempfile
+import threading
+from datetime import datetime, timedelta
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp.name}/bench.db"
+
+from sqlalchemy import create_engine, update  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.database import Base, configure_sqlite  # noqa: E402
+from app.models.document import Document  # noqa: E402
+from app.routers.search import fetch_candidates  # noqa: E402
+from app.services.db_writer import DbWriter  # noqa: E402
+
+USER = "bench_user"
+CANDIDATES = 45
+
+
+def make_engine(name: str, wal: bool):
+    engine = create_engine(
+        f"sqlite:///{_tmp.name}/{name}.db",
+        connect_args={"check_same_thread": False},
+        pool_size=16,
+        max_overflow=16,
+    )
+    if wal:
+        configure_sqlite(engine)
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+
+def seed(factory, n_docs: int) -> list[str]:
+    now = datetime.utcnow()
+    ids = [f"{i:08d}-0000-0000-0000-000000000000" for i in range(n_docs)]
+    with factory() as db:
+        db.add_all(
+            Document(
+                id=doc_id, user_id=USER, filename=f"doc_{i}.txt", file_type="txt",
+                content_length=0, chunk_count=1,
+                last_accessed=now - timedelta(days=random.random() * 90),
+                created_at=now - timedelta(days=90), access_count=random.randint(0, 50),
+            )
+            for i, doc_id in enumerate(ids)
+        )
+        db.commit()
+    return ids
+
+
+def score_updates(ids: list[str]) -> list[dict]:
+    return [
+        {"id": doc_id, "semantic_score": random.random(), "cognitive_score": random.random()}
+        for doc_id in random.sample(ids, 10)
+    ]
+
+
+def run(factory, ids: list[str], readers: int, writers: int, seconds: float, writer=None) -> dict:
+    stop = threading.Event()
+    lock = threading.Lock()
+    stats = {"reads": [], "writes": [], "errors": 0}
+
+    def record(kind: str, t0: float):
+        with lock:
+            stats[kind].append((time.perf_counter() - t0) * 1000)
+
+    def read_loop():
+        while not stop.is_set():
+            t0 = time.perf_counter()
+            try:
+                with factory() as db:
+                    fetch_candidates(db, USER, random.sample(ids, CANDIDATES))
+                record("reads", t0)
+            except OperationalError:
+                with lock:
+                    stats["errors"] += 1
+
+    def write_loop():
+        while not stop.is_set():
+            updates = score_updates(ids)
+            t0 = time.perf_counter()
+            try:
+                if writer is not None:
+                    writer.submit(lambda s: s.execute(update(Document), updates)).result()
+                else:
+                    with factory() as db:
+                        db.execute(update(Document), updates)
+                        db.commit()
+                record("writes", t0)
+            except OperationalError:
+                with lock:
+                    stats["errors"] += 1
+
+    threads = [threading.Thread(target=read_loop) for _ in range(readers)]
+    threads += [threading.Thread(target=write_loop) for _ in range(writers)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    return stats
+
+
+def report(name: str, stats: dict, seconds: float):
+    def p95(timings: list[float]) -> float:
+        timings = sorted(timings)
+        return timings[max(int(len(timings) * 0.95) - 1, 0)] if timings else float("nan")
+
+    print(
+        f"{name:<22} reads {len(stats['reads']) / seconds:8.1f}/s  p95 {p95(stats['reads']):7.2f} ms   "
+        f"writes {len(stats['writes']) / seconds:7.1f}/s  p95 {p95(stats['writes']):7.2f} ms   "
+        f"lock errors {stats['errors']}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--docs", type=int, default=5000)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    print(f"{args.docs} documents, {args.readers} readers, {args.writers} writers, {args.seconds:g}s each")
+    for name, wal, single in [
+        ("defaults", False, False),
+        ("WAL + pragmas", True, False),
+        ("WAL + single writer", True, True),
+    ]:
+        engine = make_engine(name.replace(" ", "_").replace("+", ""), wal)
+        factory = sessionmaker(bind=engine, autoflush=False)
+        ids = seed(factory, args.docs)
+        writer = DbWriter(session_factory=factory, single_writer=True) if single else None
+        stats = run(factory, ids, args.readers, args.writers, args.seconds, writer)
+        if writer is not None:
+            writer.shutdown()
+        report(name, stats, args.seconds)
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
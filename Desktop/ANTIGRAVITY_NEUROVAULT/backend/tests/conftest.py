@@ -0,0 +1,10 @@
+import os
+import tempfile
+
+# Point the app at throwaway storage before app.config is first imported
+_tmp = tempfile.mkdtemp(prefix="neurovault-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp}/test.db"
+os.environ["ASYNC_DATABASE_URL"] = ""
+os.environ["FAISS_INDEX_PATH"] = f"{_tmp}/faiss"
+os.environ["UPLOAD_PATH"] = f"{_tmp}/uploads"
+os.environ["EXTRACTION_CACHE_PATH"] = f"{_tmp}/extraction_cache"
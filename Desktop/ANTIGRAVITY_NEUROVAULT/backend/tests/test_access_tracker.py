@@ -0,0 +1,49 @@
+import uuid
+from datetime import datetime, timedelta
+
+from app.database import SessionLocal, init_db
+from app.models.document import Document
+from app.services.access_tracker import access_tracker
+from app.services.cognition import cognition_engine
+from app.services.db_writer import db_writer
+from app.services.ingestion import ingestion_service
+
+
+def test_accesses_are_buffered_then_counted_into_the_document():
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    init_db()
+    user = f"user-{uuid.uuid4()}"
+    kept, deleted = str(uuid.uuid4()), str(uuid.uuid4())
+    with SessionLocal() as db:
+        for doc_id in (kept, deleted):
+            doc = ingestion_service.create_document(doc_id, user, "f.txt", "txt", 0, None)
+            doc.last_accessed = datetime.utcnow() - timedelta(days=30)
+            db.add(doc)
+        db.commit()
+
+    client = TestClient(app)
+    for expected in (1, 2, 3):
+        resp = client.post(f"/api/documents/{kept}/access")
+        assert resp.status_code == 200
+        assert resp.json()["cognitive_score"] > cognition_engine.compute_storage_score(
+            datetime.utcnow(), expected - 1
+        )
+    client.post(f"/api/documents/{deleted}/access")
+    with SessionLocal() as db:
+        assert db.get(Document, kept).access_count == 0  # nothing written yet
+        db.delete(db.get(Document, deleted))
+        db.commit()
+    assert client.post(f"/api/documents/{deleted}/access").status_code == 404
+
+    access_tracker.flush()
+    db_writer.submit(lambda db: None).result()
+    with SessionLocal() as db:
+        doc = db.get(Document, kept)
+        assert doc.access_count == 3
+        assert datetime.utcnow() - doc.last_accessed < timedelta(minutes=1)
+        expected = cognition_engine.lifecycle(doc.last_accessed, 3)
+        assert abs(doc.activation - expected["activation"]) < 1e-6
+        assert doc.tier == doc.tier_at(datetime.utcnow()) == "Contextual"
@@ -0,0 +1,22 @@
+from app.services.content_store import FRAME_CHARS, ContentWriter, iter_frames
+
+
+class _Session:
+    def __init__(self):
+        self.added = []
+
+    def add(self, obj):
+        self.added.append(obj)
+
+
+def test_writer_frames_match_whole_text_frames():
+    pieces = ["a" * 10, "b" * (FRAME_CHARS - 3), "c" * (2 * FRAME_CHARS + 5), "", "d"]
+    session = _Session()
+    writer = ContentWriter(session, "doc")
+    for piece in pieces:
+        writer.write(piece)
+    text = "".join(pieces)
+
+    assert writer.close() == len(text)
+    assert [f.frame for f in session.added] == list(range(len(session.added)))
+    assert [f.data for f in session.added] == list(iter_frames(text))
@@ -0,0 +1,25 @@
+import uuid
+
+from app.database import SessionLocal, init_db
+from app.models.document import Document
+from app.services.ingestion import ingestion_service
+
+
+def test_documents_are_only_deleted_by_their_owner():
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    init_db()
+    doc_id = str(uuid.uuid4())
+    with SessionLocal() as db:
+        db.add(ingestion_service.create_document(doc_id, "owner", "f.txt", "txt", 0, None))
+        db.commit()
+
+    client = TestClient(app)
+    assert client.delete(f"/api/documents/{doc_id}", params={"user_id": "someone-else"}).status_code == 404
+    with SessionLocal() as db:
+        assert db.get(Document, doc_id) is not None
+    assert client.delete(f"/api/documents/{doc_id}", params={"user_id": "owner"}).status_code == 200
+    with SessionLocal() as db:
+        assert db.get(Document, doc_id) is None
@@ -0,0 +1,44 @@
+import pytest
+
+from app.services.extraction_cache import ExtractionCache
+from app.services.ocr_service import IncompleteOcr
+from app.services.parser_service import ParserService
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ExtractionCache()
+    cache._max_bytes = 1024 * 1024
+    cache.init(tmp_path / "cache")
+    return cache
+
+
+def test_failed_extraction_is_not_cached(cache):
+    def partial():
+        yield "page one"
+        raise IncompleteOcr("1 of 2 frames of scan.tiff were not recognized")
+
+    with pytest.raises(IncompleteOcr):
+        list(cache.iter_cached("ab" * 32, "tiff", partial))
+    assert not list(cache._root.glob("*/*.jsonl.gz"))
+
+    assert list(cache.iter_cached("ab" * 32, "tiff", lambda: iter(["page one", "page two"]))) == [
+        "page one", "page two",
+    ]
+    assert list(cache.iter_cached("ab" * 32, "tiff", lambda: iter(()))) == ["page one", "page two"]
+
+
+def test_parser_keeps_partial_text_without_caching_it(cache, monkeypatch, tmp_path):
+    from app.services import parser_service as parser_module
+
+    def failing_frames(path):
+        yield "recognized frame"
+        raise IncompleteOcr("1 of 2 frames were not recognized")
+
+    monkeypatch.setattr(parser_module, "extraction_cache", cache)
+    monkeypatch.setattr(parser_module.ocr_service, "iter_frames", failing_frames)
+    image = tmp_path / "scan.tiff"
+    image.write_bytes(b"")
+
+    assert list(ParserService().iter_pages(image, "tiff", "cd" * 32)) == ["recognized frame"]
+    assert not list(cache._root.glob("*/*.jsonl.gz"))
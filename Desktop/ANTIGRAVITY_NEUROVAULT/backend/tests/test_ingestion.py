@@ -0,0 +1,107 @@
+import hashlib
+import uuid
+import warnings
+
+import numpy as np
+import pytest
+from sqlalchemy.exc import SAWarning
+
+from app.database import SessionLocal, init_db
+from app.models.chunk import Chunk
+from app.services.content_store import content_store
+from app.services.embedding_service import embedding_service
+from app.services.faiss_service import DIMENSION, faiss_service
+from app.services.ingestion import ingestion_service
+
+WORDS_PER_PARAGRAPH = 400  # below CHUNK_SIZE, so every paragraph is one chunk
+
+
+def bag_of_words(texts: list[str]) -> np.ndarray:
+    """Deterministic stand-in for the model: texts sharing most words are near-identical."""
+    vecs = np.zeros((len(texts), DIMENSION), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for word in text.split():
+            vecs[row, int(hashlib.md5(word.encode()).hexdigest(), 16) % DIMENSION] += 1
+    return vecs / np.linalg.norm(vecs, axis=1, keepdims=True)
+
+
+def paragraph(seed: int) -> str:
+    return " ".join(f"w{seed}_{i}" for i in range(WORDS_PER_PARAGRAPH))
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    init_db()
+    faiss_service.init(tmp_path / "faiss")
+    monkeypatch.setattr(embedding_service, "encode", bag_of_words)
+    with SessionLocal() as session:
+        yield session
+
+
+def test_reindex_embeds_changed_text_and_counts_retired_chunks(db, tmp_path):
+    user = f"user-{uuid.uuid4()}"
+    doc = ingestion_service.create_document(str(uuid.uuid4()), user, "notes.txt", "txt", 0, None)
+    db.add(doc)
+    db.commit()
+
+    v1 = tmp_path / "v1.txt"
+    v1.write_text("\n\n".join(paragraph(n) for n in range(3)))
+    ingestion_service.ingest(db, doc, v1)
+    assert doc.chunk_count == 3
+
+    # One word changed: the new chunk is ~99% similar to the chunk it replaces
+    edited = paragraph(1).replace("w1_7 ", "changed ")
+    v2 = tmp_path / "v2.txt"
+    text = "\n\n".join([paragraph(0), edited, paragraph(2)])
+    v2.write_text(text)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", SAWarning)
+        result = ingestion_service.reindex(db, doc, v2)
+
+    assert result["chunks_embedded"] == 1
+    assert result["chunks_removed"] == 1
+    assert result["dedup_action"] == "none"
+    rows = db.query(Chunk).filter(Chunk.doc_id == doc.id).order_by(Chunk.ordinal).all()
+    assert [r.linked for r in rows] == [False, False, False]
+    assert len({r.faiss_id for r in rows}) == 3
+    assert faiss_service.get_stats(user)["total_vectors"] == 3
+    assert content_store.get(db, doc.id) == text
+    assert doc.content_length == len(text)
+
+
+def _stored(tmp_path, name: str, text: str):
+    from app.services.storage_service import StoredFile
+
+    path = tmp_path / name
+    path.write_text(text)
+    return StoredFile(str(uuid.uuid4()), name, path, len(text), hashlib.sha256(text.encode()).hexdigest())
+
+
+def test_bulk_ingest_counts_every_linked_chunk(db, tmp_path):
+    user = f"user-{uuid.uuid4()}"
+    text = "\n\n".join(paragraph(n) for n in range(2))
+    ingestion_service.ingest_batch(db, user, [(_stored(tmp_path, "a.txt", text), "txt")])
+    files = [
+        (_stored(tmp_path, "copy.txt", text), "txt"),  # exact copy: 2 linked chunks
+        (_stored(tmp_path, "copy2.txt", text), "txt"),  # second copy: 2 more
+        (_stored(tmp_path, "b.txt", "\n\n".join([paragraph(0), paragraph(5)])), "txt"),  # 1 hash link
+    ]
+    result = ingestion_service.ingest_batch(db, user, files)
+
+    assert result["succeeded"] == 3
+    assert result["chunks"] == 1
+    assert result["chunks_linked"] == 5
+
+
+def test_bulk_ingest_without_dedup_parses_identical_files(db, tmp_path, monkeypatch):
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "dedup_enabled", False)
+    user = f"user-{uuid.uuid4()}"
+    text = paragraph(7)
+    files = [(_stored(tmp_path, "a.txt", text), "txt"), (_stored(tmp_path, "b.txt", text), "txt")]
+    result = ingestion_service.ingest_batch(db, user, files)
+
+    assert [d.get("dedup_action") for d in result["documents"]] == ["none", "none"]
+    assert result["chunks"] == 2
+    assert result["chunks_linked"] == 0
@@ -0,0 +1,58 @@
+import json
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+from app import database
+
+# documents / access_logs as created by the first release
+BASELINE_SCHEMA = [
+    """CREATE TABLE documents (
+        id VARCHAR(36) PRIMARY KEY, user_id VARCHAR(100) NOT NULL,
+        filename VARCHAR(500) NOT NULL, file_type VARCHAR(50) NOT NULL,
+        content_text TEXT, chunk_count INTEGER, tier VARCHAR(20),
+        cognitive_score FLOAT, semantic_score FLOAT, access_count INTEGER,
+        last_accessed DATETIME, created_at DATETIME, faiss_ids TEXT,
+        file_size INTEGER, project_tags TEXT, description TEXT)""",
+    "CREATE INDEX ix_documents_id ON documents (id)",
+    "CREATE INDEX ix_documents_user_id ON documents (user_id)",
+    """CREATE TABLE access_logs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, document_id VARCHAR(36) NOT NULL,
+        user_id VARCHAR(100) NOT NULL, accessed_at DATETIME, query_used TEXT,
+        relevance_score FLOAT, access_type VARCHAR(50))""",
+]
+
+
+@pytest.fixture
+def baseline_engine(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path}/baseline.db")
+    with engine.begin() as conn:
+        for ddl in BASELINE_SCHEMA:
+            conn.execute(text(ddl))
+        now = datetime.utcnow()
+        conn.execute(text(
+            "INSERT INTO documents (id, user_id, filename, file_type, content_text, chunk_count, "
+            "tier, cognitive_score, semantic_score, access_count, last_accessed, created_at, "
+            "faiss_ids, file_size, project_tags) VALUES ('d1', 'u', 'a.txt', 'txt', 'hello world', "
+            "2, 'Contextual', 0.5, 0.0, 3, :now, :now, :fids, 11, '[]')"
+        ), {"now": now, "fids": json.dumps([0, 1])})
+    monkeypatch.setattr(database, "engine", engine)
+    return engine
+
+
+def test_init_db_upgrades_a_baseline_database(baseline_engine):
+    database.init_db()
+
+    columns = {c["name"] for c in inspect(baseline_engine).get_columns("documents")}
+    assert {"content_hash", "duplicate_of", "content_length", "activation"} <= columns
+    indexes = {i["name"] for i in inspect(baseline_engine).get_indexes("documents")}
+    assert "ix_documents_content_hash" in indexes
+    with baseline_engine.connect() as conn:
+        chunks = conn.execute(text("SELECT ordinal, faiss_id, text_hash FROM chunks ORDER BY ordinal")).all()
+        doc = conn.execute(text("SELECT content_text, content_length, activation FROM documents")).one()
+    assert [(c.ordinal, c.faiss_id) for c in chunks] == [(0, 0), (1, 1)]
+    assert doc.content_text is None and doc.content_length == len("hello world")
+    assert doc.activation is not None
+
+    database.init_db()  # idempotent
@@ -0,0 +1,39 @@
+import threading
+import time
+
+from app.services import parser_service as parser_module
+from app.services.parser_service import ParserService
+
+
+def test_concurrent_callers_share_one_pdf_pool(monkeypatch):
+    created = []
+
+    class SlowPool:
+        def __init__(self, **kwargs):
+            time.sleep(0.05)  # widen the window between the check and the assignment
+            created.append(self)
+
+    monkeypatch.setattr(parser_module, "ProcessPoolExecutor", SlowPool)
+    service = ParserService()
+    pools = []
+    threads = [threading.Thread(target=lambda: pools.append(service._get_pdf_pool())) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(created) == 1
+    assert all(pool is created[0] for pool in pools)
+
+
+def test_text_without_line_breaks_is_read_in_bounded_sections(tmp_path):
+    words = " ".join(f"w{i}" for i in range(60_000))  # ~400K characters, one line
+    path = tmp_path / "dump.txt"
+    path.write_text("intro line\n  \nsecond paragraph\n\n" + words)
+
+    sections = list(ParserService()._iter_text(path))
+
+    assert sections[:2] == ["intro line", "second paragraph"]
+    assert all(len(s) <= parser_module.MAX_SECTION_CHARS for s in sections)
+    # Hard cuts fall anywhere; only whitespace at a cut is trimmed
+    assert "".join(sections[2:]).replace(" ", "") == words.replace(" ", "")
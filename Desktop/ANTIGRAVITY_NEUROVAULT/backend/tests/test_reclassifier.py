@@ -0,0 +1,76 @@
+import random
+import uuid
+from datetime import datetime, timedelta
+
+from app.database import SessionLocal, init_db
+from app.models.document import Document
+from app.services.cognition import UNTIL_COLUMNS, cognition_engine
+from app.services.ingestion import ingestion_service
+from app.services.reclassifier import reclassifier
+
+
+def test_reclassify_fills_lifecycle_state_and_then_finds_nothing_to_change():
+    init_db()
+    user = f"user-{uuid.uuid4()}"
+    now = datetime.utcnow()
+    with SessionLocal() as db:
+        for _ in range(40):
+            doc = ingestion_service.create_document(str(uuid.uuid4()), user, "f.txt", "txt", 0, None)
+            doc.last_accessed = now - timedelta(days=random.random() * 200)
+            doc.access_count = random.randint(0, 50)
+            doc.activation = doc.active_until = None
+            db.add(doc)
+        db.commit()
+
+    assert reclassifier.reclassify_user(user)["reclassified"] == 40
+    assert reclassifier.reclassify_user(user)["reclassified"] == 0
+    with SessionLocal() as db:
+        for doc in db.query(Document).filter(Document.user_id == user):
+            expected = cognition_engine.lifecycle(doc.last_accessed, doc.access_count)
+            assert abs(doc.activation - expected["activation"]) < 1e-9
+            for name in UNTIL_COLUMNS:
+                assert abs((getattr(doc, name) - expected[name]).total_seconds()) < 0.01
+            assert doc.tier == cognition_engine.classify_tier(
+                cognition_engine.compute_storage_score(doc.last_accessed, doc.access_count)
+            )
+
+
+def test_new_document_starts_contextual():
+    doc = ingestion_service.create_document(str(uuid.uuid4()), "u", "f.txt", "txt", 0, None)
+    assert doc.tier == "Contextual"
+    assert doc.tier_at(datetime.utcnow() + timedelta(minutes=1)) == "Contextual"
+
+
+def test_analytics_counts_tiers_and_lists_by_current_score():
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    init_db()
+    user = f"user-{uuid.uuid4()}"
+    now = datetime.utcnow()
+    with SessionLocal() as db:
+        # Access counts count too: the busy document outranks more recent ones
+        for filename, days, count in [(f"{d}.txt", d, 20) for d in (0, 3, 10, 30, 90)] + [("busy.txt", 3, 100)]:
+            doc = ingestion_service.create_document(str(uuid.uuid4()), user, filename, "txt", 0, None)
+            doc.last_accessed = now - timedelta(days=days)
+            doc.access_count = count
+            for name, value in cognition_engine.lifecycle(doc.last_accessed, count).items():
+                setattr(doc, name, value)
+            db.add(doc)
+        db.commit()
+        expected = {}
+        for doc in db.query(Document).filter(Document.user_id == user):
+            expected[doc.tier_at(now)] = expected.get(doc.tier_at(now), 0) + 1
+
+    client = TestClient(app)
+    tiers = client.get("/api/analytics/tiers", params={"user_id": user}).json()
+    assert {t: s["count"] for t, s in tiers.items() if s["count"]} == expected
+    analytics = client.get("/api/analytics/", params={"user_id": user}).json()
+    ranked = ["busy.txt", "0.txt", "3.txt", "10.txt", "30.txt", "90.txt"]
+    assert analytics["total_documents"] == 6
+    assert [d["filename"] for d in analytics["top_documents"]] == ranked
+    listed = client.get("/api/documents/", params={"user_id": user}).json()
+    assert [d["filename"] for d in listed] == ranked
+    page = client.get("/api/documents/", params={"user_id": user, "skip": 1, "limit": 2}).json()
+    assert [d["filename"] for d in page] == ranked[1:3]
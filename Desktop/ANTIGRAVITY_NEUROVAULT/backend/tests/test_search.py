@@ -0,0 +1,75 @@
+import uuid
+
+import numpy as np
+import pytest
+
+from app.database import SessionLocal, init_db
+from app.routers.search import rescore_candidates
+from app.services.access_tracker import access_tracker
+from app.services.db_writer import db_writer
+from app.services.embedding_service import embedding_service
+from app.services.faiss_service import faiss_service
+from app.services.ingestion import ingestion_service
+from app.services.score_buffer import score_buffer
+from tests.test_ingestion import bag_of_words, paragraph
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    init_db()
+    faiss_service.init(tmp_path / "faiss")
+    monkeypatch.setattr(embedding_service, "encode", bag_of_words)
+    with SessionLocal() as session:
+        yield session
+
+
+def test_reused_candidates_are_rescored_for_the_new_query(tmp_path):
+    faiss_service.init(tmp_path / "faiss")
+    user = f"user-{uuid.uuid4()}"
+    vectors = bag_of_words(["alpha beta", "gamma delta", "alpha gamma"])
+    fids = faiss_service.add_vectors(user, vectors, persist=False)
+    cached = [
+        {"doc_id": f"d{i}", "semantic_score": 0.9 - i / 10, "chunk_id": i, "faiss_id": fid}
+        for i, fid in enumerate(fids)
+    ]
+    faiss_service.remove_vectors(user, [fids[2]], persist=False)
+
+    query = bag_of_words(["gamma delta"])[0]
+    rescored = rescore_candidates(user, query, cached)
+
+    assert [c["doc_id"] for c in rescored] == ["d1", "d0"]  # d2's vector is gone
+    assert np.isclose(rescored[0]["semantic_score"], 1.0)
+    assert np.isclose(rescored[1]["semantic_score"], float(vectors[0] @ query))
+    assert cached[0]["semantic_score"] == 0.9  # the cached entries are not modified
+
+
+def test_flushed_accesses_invalidate_cached_searches(db, tmp_path):
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    user = f"user-{uuid.uuid4()}"
+    doc = ingestion_service.create_document(str(uuid.uuid4()), user, "notes.txt", "txt", 0, None)
+    db.add(doc)
+    db.commit()
+    path = tmp_path / "notes.txt"
+    path.write_text(paragraph(7))
+    ingestion_service.ingest(db, doc, path)
+
+    client = TestClient(app)
+    words = paragraph(7).split()
+    search = {"query": " ".join(words[:len(words) // 2]), "user_id": user, "k": 1}
+    client.post("/api/search/", json=search)
+    score_buffer.flush()  # search write-backs invalidate too; settle them first
+    db_writer.submit(lambda s: None).result()
+    before = client.post("/api/search/", json=search).json()["results"][0]
+    assert client.post("/api/search/", json=search).json()["results"][0] == before  # cached
+
+    for _ in range(30):
+        assert client.post(f"/api/documents/{doc.id}/access").status_code == 200
+    access_tracker.flush()
+    db_writer.submit(lambda s: None).result()
+
+    after = client.post("/api/search/", json=search).json()["results"][0]
+    assert after["final_score"] > before["final_score"]
+    assert (before["tier"], after["tier"]) == ("Contextual", "Active")
@@ -0,0 +1,17 @@
+import asyncio
+
+from sqlalchemy import select
+
+
+def test_app_imports_and_serves_async_sessions():
+    import app.main  # noqa: F401  (builds both engines at import)
+    from app.database import AsyncSessionLocal, init_db
+    from app.models.document import Document
+
+    init_db()
+
+    async def query():
+        async with AsyncSessionLocal() as db:
+            return list(await db.scalars(select(Document).limit(1)))
+
+    assert isinstance(asyncio.run(query()), list)
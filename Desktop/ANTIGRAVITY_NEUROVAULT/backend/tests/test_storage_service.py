@@ -0,0 +1,77 @@
+import time
+import zipfile
+
+import pytest
+
+from app.config import settings
+from app.services.storage_service import StorageService
+
+
+@pytest.fixture
+def storage(tmp_path):
+    service = StorageService()
+    service.init(tmp_path / "uploads")
+    return service
+
+
+def make_archive(path, members: dict[str, bytes]):
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+    return path
+
+
+def test_archive_members_are_expanded_and_metadata_skipped(storage, tmp_path):
+    archive = make_archive(tmp_path / "a.zip", {
+        "notes/a.txt": b"alpha", "b.md": b"beta", ".DS_Store": b"", "__MACOSX/._a.txt": b"",
+    })
+    members = list(storage.extract_archive(archive, "u"))
+    assert sorted(m.filename for m in members) == ["a.txt", "b.md"]
+    assert all(m.path.read_bytes() in (b"alpha", b"beta") for m in members)
+
+
+def test_archive_expanding_past_the_limit_is_rejected(storage, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "bulk_max_expanded_mb", 1)
+    archive = make_archive(tmp_path / "bomb.zip", {"zeros.txt": b"\0" * (2 * 1024 * 1024)})
+
+    with pytest.raises(ValueError, match="over the 1 MB limit"):
+        list(storage.extract_archive(archive, "u"))
+    assert not (tmp_path / "uploads" / "u").exists()
+
+
+def test_bulk_file_limit_spans_every_archive_in_the_request(tmp_path, monkeypatch):
+    import io
+
+    from fastapi.testclient import TestClient
+
+    from app.database import init_db
+    from app.main import app
+    from app.routers import documents
+
+    init_db()
+    monkeypatch.setattr(settings, "bulk_max_files", 3)
+    received = []
+    monkeypatch.setattr(
+        documents.ingestion_service, "ingest_batch",
+        lambda db, user_id, batch, description: received.extend(batch) or {
+            "succeeded": len(batch), "failed": 0, "chunks": 0, "elapsed_s": 0,
+        },
+    )
+    archives = [
+        make_archive(tmp_path / f"{n}.zip", {f"{n}_{i}.txt": b"text" for i in range(2)}) for n in "ab"
+    ]
+    client = TestClient(app)
+
+    files = [("files", ("c.txt", io.BytesIO(b"plain"), "text/plain"))] + [
+        ("files", (a.name, a.open("rb"), "application/zip")) for a in archives
+    ]
+    job = client.post("/api/documents/bulk", params={"user_id": "u"}, files=files).json()
+    deadline = time.monotonic() + 30
+    while job["status"] in ("queued", "running") and time.monotonic() < deadline:
+        time.sleep(0.05)
+        job = client.get(f"/api/jobs/{job['job_id']}").json()
+
+    assert job["status"] == "succeeded", job["error"]
+    assert len(received) == 3
+    too_many = [("files", (f"{i}.txt", io.BytesIO(b"x"), "text/plain")) for i in range(4)]
+    assert client.post("/api/documents/bulk", files=too_many).status_code == 400
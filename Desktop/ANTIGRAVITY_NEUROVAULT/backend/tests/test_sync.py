@@ -0,0 +1,84 @@
+import time
+import uuid
+
+import pytest
+
+from app.config import settings
+from app.database import SessionLocal, init_db
+from app.models.document import Document
+from app.services import sync_service as sync_module
+from app.services.embedding_service import embedding_service
+from app.services.faiss_service import faiss_service
+from app.services.sync_service import sync_service
+from tests.test_ingestion import bag_of_words, paragraph
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    init_db()
+    faiss_service.init(tmp_path / "faiss")
+    monkeypatch.setattr(embedding_service, "encode", bag_of_words)
+    with SessionLocal() as session:
+        yield session
+
+
+def test_sync_reports_failed_files(db, tmp_path, monkeypatch):
+    user = f"user-{uuid.uuid4()}"
+    root = tmp_path / "notes"
+    root.mkdir()
+    (root / "a.txt").write_text(paragraph(1))
+    assert sync_service.sync(db, root, user)["new"] == 1
+
+    (root / "a.txt").write_text(paragraph(2))
+
+    def broken(*args):
+        raise RuntimeError("disk went away")
+
+    monkeypatch.setattr(sync_module.ingestion_service, "reindex", broken)
+    stats = sync_service.sync(db, root, user)
+
+    assert stats["changed"] == 1
+    assert stats["failed"] == 1
+    assert stats["errors"] == [{"path": "a.txt", "error": "disk went away"}]
+    assert db.query(Document).filter(Document.user_id == user).count() == 1
+
+
+def test_sync_endpoint_only_reads_allowed_roots(db, tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    allowed, outside = tmp_path / "allowed", tmp_path / "outside"
+    allowed.mkdir()
+    outside.mkdir()
+    client = TestClient(app)
+
+    for directory in (outside, allowed / ".." / "outside", allowed):
+        assert client.post("/api/documents/sync", params={"directory": str(directory)}).status_code == 403
+    monkeypatch.setattr(settings, "sync_roots", str(allowed))
+    assert client.post("/api/documents/sync", params={"directory": str(outside)}).status_code == 403
+    assert client.post("/api/documents/sync", params={"directory": str(allowed / ".." / "outside")}).status_code == 403
+
+
+def test_sync_endpoint_runs_the_sync_as_a_job(db, tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    user = f"user-{uuid.uuid4()}"
+    root = tmp_path / "notes"
+    root.mkdir()
+    (root / "a.txt").write_text(paragraph(3))
+    monkeypatch.setattr(settings, "sync_roots", str(tmp_path))
+    client = TestClient(app)  # no lifespan: the test fixtures stand in for startup
+
+    assert client.post("/api/documents/sync", params={"directory": str(tmp_path / "missing")}).status_code == 400
+    job = client.post("/api/documents/sync", params={"directory": str(root), "user_id": user}).json()
+    deadline = time.monotonic() + 30
+    while job["status"] in ("queued", "running") and time.monotonic() < deadline:
+        time.sleep(0.05)
+        job = client.get(f"/api/jobs/{job['job_id']}").json()
+
+    assert job["kind"] == "sync"
+    assert job["status"] == "succeeded", job["error"]
+    assert job["result"]["new"] == 1
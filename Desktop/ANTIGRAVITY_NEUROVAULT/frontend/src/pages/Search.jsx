@@ -1,5 +1,5 @@
 import { useState } from 'react'
-import { semanticSearch } from '../utils/api'
+import { getExplanation, semanticSearch } from '../utils/api'
 import { Search as SearchIcon, Loader, Zap, Filter } from 'lucide-react'
 import TierBadge from '../components/TierBadge'
 import ExplainPanel from '../components/ExplainPanel'
@@ -9,6 +9,24 @@ const TIERS = ['All', 'Active', 'Contextual', 'Archived', 'Dormant']
 
 function ResultCard({ result, rank }) {
     const [showExplain, setShowExplain] = useState(false)
+    // Searches run without explain; the breakdown is fetched the first time it is shown
+    const [breakdown, setBreakdown] = useState(result.breakdown || null)
+    const [explaining, setExplaining] = useState(false)
+
+    const toggleExplain = async () => {
+        const show = !showExplain
+        setShowExplain(show)
+        if (!show || breakdown) return
+        setExplaining(true)
+        try {
+            const res = await getExplanation(result.document_id, result.semantic_score)
+            setBreakdown(res.data)
+        } catch {
+            toast.error('Could not load the explanation')
+            setShowExplain(false)
+        }
+        setExplaining(false)
+    }
 
     const scoreColor = result.final_score >= 0.75 ? '#00ff88'
         : result.final_score >= 0.50 ? '#00d4ff'
@@ -49,17 +67,19 @@ function ResultCard({ result, rank }) {
                 {/* Score mini bars */}
                 <div style={{ display: 'flex', gap: 8, marginBottom: 14, flexWrap: 'wrap' }}>
                     {[
-                        { label: 'Semantic', pct: result.breakdown.semantic_percentage, color: '#a855f7' },
-                        { label: 'Recency', val: result.breakdown.recency_score, color: '#00d4ff' },
-                        { label: 'Access', val: result.breakdown.access_score, color: '#00ff88' },
-                    ].map(({ label, pct, val, color }) => (
+                        { label: 'Semantic', val: result.semantic_score, color: '#a855f7' },
+                        ...(breakdown ? [
+                            { label: 'Recency', val: breakdown.recency_score, color: '#00d4ff' },
+                            { label: 'Access', val: breakdown.access_score, color: '#00ff88' },
+                        ] : []),
+                    ].map(({ label, val, color }) => (
                         <div key={label} style={{
                             display: 'flex', alignItems: 'center', gap: 6,
                             padding: '4px 10px', borderRadius: 20,
                             background: `${color}11`, border: `1px solid ${color}33`,
                         }}>
                             <div style={{ width: 6, height: 6, borderRadius: '50%', background: color }} />
-                            <span style={{ fontSize: 11, color }}>{label}: {pct ?? Math.round((val || 0) * 100)}%</span>
+                            <span style={{ fontSize: 11, color }}>{label}: {Math.round((val || 0) * 100)}%</span>
                         </div>
                     ))}
                 </div>
@@ -75,15 +95,16 @@ function ResultCard({ result, rank }) {
                 <button
                     className="btn-ghost"
                     style={{ fontSize: 12, padding: '5px 14px' }}
-                    onClick={() => setShowExplain(v => !v)}
+                    onClick={toggleExplain}
+                    disabled={explaining}
                 >
-                    <Zap size={12} />
+                    {explaining ? <Loader size={12} className="spin" /> : <Zap size={12} />}
                     {showExplain ? 'Hide' : 'Show'} AI Explanation
                 </button>
 
-                {showExplain && (
+                {showExplain && breakdown && (
                     <div style={{ marginTop: 12 }}>
-                        <ExplainPanel breakdown={result.breakdown} />
+                        <ExplainPanel breakdown={breakdown} />
                     </div>
                 )}
             </div>
@@ -1,7 +1,7 @@
 import { useState, useCallback, useEffect, useRef } from 'react'
 import { useDropzone } from 'react-dropzone'
 import toast from 'react-hot-toast'
-import { uploadDocument, listDocuments, deleteDocument } from '../utils/api'
+import { uploadDocument, waitForJob, listDocuments, deleteDocument } from '../utils/api'
 import { Upload as UploadIcon, FileText, CheckCircle, XCircle, Loader, Trash2, RefreshCw } from 'lucide-react'
 import DocumentCard from '../components/DocumentCard'
 
@@ -16,8 +16,11 @@ function UploadZone({ onUpload }) {
         setUploading(true)
         for (const file of acceptedFiles) {
             try {
-                await uploadDocument(file, 'default_user', descRef.current)
-                toast.success(`✅ Uploaded: ${file.name}`, { style: { background: 'var(--bg-card)', color: 'var(--text-primary)' } })
+                const { data: job } = await uploadDocument(file, 'default_user', descRef.current)
+                const { result } = await waitForJob(job.job_id)
+                const note = result?.dedup_action === 'exact_duplicate' ? ' (duplicate, linked to existing copy)'
+                    : result?.dedup_action === 'near_duplicate' ? ' (near-duplicate, linked to existing chunks)' : ''
+                toast.success(`✅ Uploaded: ${file.name}${note}`, { style: { background: 'var(--bg-card)', color: 'var(--text-primary)' } })
             } catch {
                 toast.error(`❌ Failed: ${file.name}`)
             }
@@ -27,13 +27,38 @@ export const uploadDocument = (file, userId = 'default_user', description = '')
     })
 }
 
+// Many files and/or .zip archives in one batch job
+export const bulkUpload = (files, userId = 'default_user', description = '') => {
+    const form = new FormData()
+    for (const file of files) form.append('files', file)
+    return api.post(`/documents/bulk?user_id=${userId}&description=${encodeURIComponent(description)}`, form, {
+        headers: { 'Content-Type': 'multipart/form-data' },
+    })
+}
+
 export const listDocuments = (userId = 'default_user', tier = null, skip = 0, limit = 50) => {
     const params = { user_id: userId, skip, limit }
     if (tier) params.tier = tier
     return api.get('/documents/', { params })
 }
 
-export const getDocument = (docId) => api.get(`/documents/${docId}`)
+export const getDocument = (docId, explain = false) =>
+    api.get(`/documents/${docId}`, { params: { explain } })
+
+// Score breakdown on demand; pass a search result's semantic_score to explain that hit
+export const getExplanation = (docId, semanticScore = null) =>
+    api.get(`/documents/${docId}/explanation`, {
+        params: semanticScore === null ? {} : { semantic_score: semanticScore },
+    })
+
+export const updateDocument = (docId, file, description = null) => {
+    const form = new FormData()
+    form.append('file', file)
+    const query = description === null ? '' : `?description=${encodeURIComponent(description)}`
+    return api.put(`/documents/${docId}${query}`, form, {
+        headers: { 'Content-Type': 'multipart/form-data' },
+    })
+}
 
 export const deleteDocument = (docId, userId = 'default_user') =>
     api.delete(`/documents/${docId}?user_id=${userId}`)
@@ -41,14 +66,29 @@ export const deleteDocument = (docId, userId = 'default_user') =>
 export const recordAccess = (docId, query = '', score = 0) =>
     api.post(`/documents/${docId}/access?query_used=${encodeURIComponent(query)}&relevance_score=${score}`)
 
+// ── Ingestion jobs ─────────────────────────────────
+export const getJob = (jobId) => api.get(`/jobs/${jobId}`)
+
+// Uploads return 202 with a job; poll until it finishes and resolve with the final job
+export const waitForJob = async (jobId, intervalMs = 1000) => {
+    for (;;) {
+        const { data } = await getJob(jobId)
+        if (data.status === 'succeeded') return data
+        if (data.status === 'failed') throw new Error(data.error || 'Ingestion failed')
+        await new Promise(resolve => setTimeout(resolve, intervalMs))
+    }
+}
+
 // ── Search ──────────────────────────────────────────
-export const semanticSearch = (query, userId = 'default_user', k = 5, minScore = 0, tierFilter = null) =>
+// Breakdowns cost extra work per hit; fetch them lazily with getExplanation instead
+export const semanticSearch = (query, userId = 'default_user', k = 5, minScore = 0, tierFilter = null, explain = false) =>
     api.post('/search/', {
         query,
         user_id: userId,
         k,
         min_score: minScore,
         tier_filter: tierFilter || null,
+        explain,
     })
 
 // ── Analytics ──────────────────────────────────────